@@ -1,12 +1,42 @@
 appconfig = {
-    'clock_font': 'font/mono-numbers-14.bdf',
+    'clock_font': 'font/mono-numbers-14.bdf', # or a .bin made by tools/font2bin.py
     'clock_font_height': 10, # use 13 for aux_zones = 1, 10 for aux_zones 2 or 4
     'clock_y_offset': -6,
     'label_font': 'terminalio.FONT',
     'label_font_height': 9,
     'show_am_pm': False,
+    'batch_refresh': True, # Refresh the panel once per frame instead of on every change
+    'clock_backend': 'label', # 'label' or 'atlas' (digits drawn as tiles, no allocations per tick)
     'feed_log': "big-board.big-board-log",
     'aux_time_zone_s': 3,
-    'aux_zones': 2, # Number of zones to show below the line: 1, 2 or 4
-    'warn_minutes': 55
+    'almanac_days': 3, # Days of sunrise/sunset to compute at a time
+    'aux_zones': 2, # Number of zones to show below the line. 1 splits the display in two; more go in a grid
+    'aux_columns': 0, # Columns of aux zones, or 0 for as few as fit
+    'display_width': 64, # Pixels across all chained panels, e.g. 128 for two side by side
+    'display_height': 32, # Pixels down all chained panels
+    'display_tile_rows': 1, # Rows of chained panels
+    'zone_label': 'tz_abbr', # Shown next to each time: 'tz_abbr' or 'description' (scrolls if it doesn't fit)
+    'scroll_step_s': 0.25, # Seconds between scroll steps of a zone name that doesn't fit
+    'scroll_hold_steps': 6, # Scroll steps to wait at each end of a zone name
+    'warn_minutes': 55,
+    'cache_file': 'zone_cache.bin', # Zone state saved across resets
+    'cache_write_s': 10 * 60, # Minimum seconds between cache writes
+    'catalog_file': 'locations.bin', # Every configured location, read from flash as it's shown
+    'aux_prefetch': 3, # Rotating zones kept in memory, counting the one on show
+    'network_timeout_s': 1, # Socket timeout for API requests, so a frame is at most about this late
+    'network_timeout_max_s': 10, # Longest that timeout grows to for a service that keeps timing out
+    'stats_upload_s': 60 * 60, # Seconds between timing summaries sent to feed_log
+    'heap_profile': False, # Sample heap use per phase and print a report with each timing summary
+    'gc_idle_free': 8 * 1024, # Collect between frames when fewer bytes than this are free (0: never)
+    'keepalive_s': 30, # Close kept-alive API connections idle longer than this
+    'keepalive_hosts': 2, # Most API hosts to keep a connection open to
+    'retry_max_s': 30 * 60, # Longest wait between retries of a failing service or task
+    'breaker_failures': 3, # Failures in a row before a service is reported as down
+    'sync_min_s': 60 * 60, # Shortest time between clock syncs
+    'sync_max_s': 12 * 60 * 60, # Longest time between clock syncs, once the RTC's drift is predictable
+    'sync_tolerance_s': 1, # Clock error at a sync that still counts as predictable
+    'render_phase_lock': True, # Draw each frame just after the RTC's second ticks over, instead of once a second from boot
+    'night_brightness': 0.25, # Panel brightness between sunset and sunrise where the user is: 1 for none, 0 to blank it
+    'dark_frame_s': 60, # Seconds between looks at the clock while the panel is blank
+    'light_sleep': True # Light sleep between deadlines while the panel is blank, where the board has alarm
 }
\ No newline at end of file
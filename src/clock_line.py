@@ -0,0 +1,99 @@
+import displayio
+from adafruit_display_shapes.rect import Rect
+from adafruit_display_text.label import Label
+from appconfig import appconfig
+from util_display import writer
+import util_font
+
+# Blink the colon once per second.
+BLINK = True
+
+
+# One line of the clock: the time, the zone name and a PM marker.
+# Each part of the time is a Label, so this works with any font.
+class ClockLine():
+    def __init__(self, clock_font, clock_font_height, label_font, label_font_height, parent):
+        self.label_hours = Label(clock_font)
+        self.label_separator = Label(clock_font)
+        self.label_minutes = Label(clock_font)
+        self.clock_height = clock_font_height
+        self.show_label = True
+
+        # Measured once per font and shared.
+        metrics = util_font.clock_metrics(clock_font)
+        max_hr_width = metrics.hours_width
+        max_w = metrics.minutes_width
+        width_separator = metrics.separator_width
+        ht = metrics.height
+        self.label_height = label_font_height
+
+        self.CloockWidth = max_hr_width + width_separator + max_w
+        print("width: {}, {}, {}".format(max_hr_width, width_separator, max_w))
+
+        self.ClockGroup = displayio.Group()
+
+        self.label_hours.anchor_point = (1.0, 0)
+        self.label_hours.anchored_position = (max_hr_width, 0)
+
+        self.label_separator.anchor_point = (0, 1.0)
+        self.label_separator.anchored_position = (max_hr_width, ht)
+
+        self.label_minutes.anchor_point = (0, 0)
+        self.label_minutes.anchored_position = (max_hr_width + width_separator, 0)
+
+        self.ClockGroup.append(self.label_hours)
+        self.ClockGroup.append(self.label_separator)
+        self.ClockGroup.append(self.label_minutes)
+
+        self.zone_label = Label(label_font)
+        self.zone_label.anchor_point = (0, 1.0)
+        self.zone_label.anchored_position = (self.CloockWidth + 1, ht)
+        self.zone_label.scrolling = True
+        self.ClockGroup.append(self.zone_label)
+
+        # PM marker. Default off.
+        self.pm_marker = Rect(max_hr_width + 1, 0, 1, 1, fill=0x000000)
+        self.ClockGroup.append(self.pm_marker)
+        # Color for the PM marker if it is visible.
+        self.pm_marker_color = 0x0000FF
+
+        parent.append(self.ClockGroup)
+
+    def SetClockColor(self, color):
+        writer.set(self.label_hours, "color", color)
+        writer.set(self.label_separator, "color", color)
+        writer.set(self.label_minutes, "color", color)
+        self.pm_marker_color = color
+
+    def SetTime(self, now, show_colon):
+        pm_fill = 0x000000
+
+        hours = now[3]
+        if appconfig["show_am_pm"]:
+            if hours >= 12:
+                # Turn on the PM marker before we adjust the hours.
+                pm_fill = self.pm_marker_color
+
+            if hours > 12:  # Handle times later than 12:59
+                hours -= 12
+            elif not hours:  # Handle times between 0:00 and 0:59
+                hours = 12
+
+        if hours < 10:
+            # Pad with a space
+            hours = " {hours}".format(hours=hours)
+        else:
+            hours = "{hours}".format(hours=hours)
+
+        minutes = now[4]
+
+        if BLINK:
+            # Colon on for even seconds.
+            colon = ":" if show_colon or now[5] % 2 else " "
+        else:
+            colon = ":"
+
+        writer.set(self.pm_marker, "fill", pm_fill)
+        writer.set(self.label_hours, "text", "{}".format(hours))
+        writer.set(self.label_separator, "text", colon)
+        writer.set(self.label_minutes, "text", "{minutes:02d}".format(minutes=minutes))
@@ -0,0 +1,129 @@
+import displayio
+from adafruit_display_shapes.rect import Rect
+from adafruit_display_text.label import Label
+from appconfig import appconfig
+import clock_line
+from util_display import writer
+
+# Characters the clock draws. The tile index of each is its position here.
+ATLAS_CHARS = "0123456789: "
+TILE_SPACE = ATLAS_CHARS.index(" ")
+TILE_COLON = ATLAS_CHARS.index(":")
+
+# Atlases already built, keyed by font, so lines that share a font share the bitmap.
+_atlases = {}
+
+
+# The clock characters from a font, drawn once into one bitmap of equal sized tiles.
+class GlyphAtlas():
+    def __init__(self, font):
+        glyphs = [font.get_glyph(ord(c)) for c in ATLAS_CHARS]
+
+        # Every tile is as wide as the widest advance, so the digits line up.
+        self.tile_width = max([g.shift_x for g in glyphs if g])
+        ascent = max([g.height + g.dy for g in glyphs if g])
+        descent = max([max(0, -g.dy) for g in glyphs if g])
+        self.tile_height = ascent + descent
+
+        self.bitmap = displayio.Bitmap(self.tile_width * len(ATLAS_CHARS), self.tile_height, 2)
+        for idx in range(len(glyphs)):
+            glyph = glyphs[idx]
+            # Blank glyphs like the space are 0x0 and leave the tile empty.
+            if glyph and glyph.width and glyph.height:
+                self._copy_glyph(glyph, idx * self.tile_width + max(0, glyph.dx), ascent - glyph.height - glyph.dy)
+
+    # Copies a glyph's pixels into the atlas. Only done at startup.
+    def _copy_glyph(self, glyph, x0, y0):
+        source = glyph.bitmap
+        # Built in fonts keep all glyphs in one bitmap. BDF glyphs have their own.
+        tiles_per_row = max(1, source.width // glyph.width)
+        sx = (glyph.tile_index % tiles_per_row) * glyph.width
+        sy = (glyph.tile_index // tiles_per_row) * glyph.height
+
+        for y in range(glyph.height):
+            if not 0 <= y0 + y < self.tile_height:
+                continue
+            for x in range(glyph.width):
+                if (x0 + x < self.bitmap.width) and source[sx + x, sy + y]:
+                    self.bitmap[x0 + x, y0 + y] = 1
+
+
+def get_atlas(font):
+    key = id(font)
+    if key not in _atlases:
+        _atlases[key] = GlyphAtlas(font)
+    return _atlases[key]
+
+
+# One line of the clock, drawn as tiles from a GlyphAtlas.
+# Changing the time only changes tile indexes, so nothing is laid out or
+# allocated each tick. Has the same interface as clock_line.ClockLine.
+class AtlasClockLine():
+    def __init__(self, clock_font, clock_font_height, label_font, label_font_height, parent):
+        self.clock_height = clock_font_height
+        self.label_height = label_font_height
+        self.show_label = True
+
+        atlas = get_atlas(clock_font)
+        ht = atlas.tile_height
+
+        # One color for all the digits. Index 0 is see through.
+        self.palette = displayio.Palette(2)
+        self.palette[0] = 0x000000
+        self.palette.make_transparent(0)
+        self.palette[1] = 0x000000
+
+        # HH:MM
+        self.tiles = displayio.TileGrid(atlas.bitmap, pixel_shader=self.palette,
+            width=5, height=1, tile_width=atlas.tile_width, tile_height=ht,
+            default_tile=TILE_SPACE)
+        self.CloockWidth = atlas.tile_width * 5
+        print("width: {}".format(self.CloockWidth))
+
+        self.ClockGroup = displayio.Group()
+        self.ClockGroup.append(self.tiles)
+
+        self.zone_label = Label(label_font)
+        self.zone_label.anchor_point = (0, 1.0)
+        self.zone_label.anchored_position = (self.CloockWidth + 1, ht)
+        self.zone_label.scrolling = True
+        self.ClockGroup.append(self.zone_label)
+
+        # PM marker. Default off.
+        self.pm_marker = Rect(atlas.tile_width * 2 + 1, 0, 1, 1, fill=0x000000)
+        self.ClockGroup.append(self.pm_marker)
+        # Color for the PM marker if it is visible.
+        self.pm_marker_color = 0x0000FF
+
+        parent.append(self.ClockGroup)
+
+    def SetClockColor(self, color):
+        writer.set_color_item(self.palette, 1, color)
+        self.pm_marker_color = color
+
+    def SetTime(self, now, show_colon):
+        pm = False
+        hours = now[3]
+        if appconfig["show_am_pm"]:
+            pm = hours >= 12
+
+            if hours > 12:  # Handle times later than 12:59
+                hours -= 12
+            elif not hours:  # Handle times between 0:00 and 0:59
+                hours = 12
+
+        writer.set(self.pm_marker, "fill", self.pm_marker_color if pm else 0x000000)
+
+        if clock_line.BLINK:
+            # Colon on for even seconds.
+            colon = TILE_COLON if show_colon or now[5] % 2 else TILE_SPACE
+        else:
+            colon = TILE_COLON
+
+        tiles = self.tiles
+        # Pad the hours with a space.
+        writer.set_item(tiles, 0, hours // 10 if hours >= 10 else TILE_SPACE)
+        writer.set_item(tiles, 1, hours % 10)
+        writer.set_item(tiles, 2, colon)
+        writer.set_item(tiles, 3, now[4] // 10)
+        writer.set_item(tiles, 4, now[4] % 10)
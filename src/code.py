@@ -7,16 +7,14 @@
 
 # general reference: https://learn.adafruit.com/adafruit-matrixportal-m4/matrixportal-library-overview
 
-import json
+import asyncio
+import binascii
 import time
 # import board
 # import busio
 import displayio
-import re
 import terminalio
 from adafruit_display_shapes.rect import Rect
-from adafruit_display_text.label import Label
-from adafruit_bitmap_font import bitmap_font
 # This is used for PyPortal.
 # from adafruit_pyportal.network import Network
 #from adafruit_pyportal import PyPortal
@@ -25,126 +23,62 @@ from adafruit_matrixportal.network import Network
 from adafruit_matrixportal.matrix import Matrix
 from adafruit_matrixportal.matrixportal import MatrixPortal
 import adafruit_requests as requests
+from clock_line import ClockLine
+from clock_line_atlas import AtlasClockLine
 import util_network
+import util_phase
+import util_power
 import util
+import util_almanac
+import util_cache
+import util_catalog
+import util_clock
+import util_font
+import util_heap
+import util_json
+import util_layout
+import util_retry
+import util_scheduler
+import util_scroll
 import util_time
+from util_time import rtc
+import util_timing
+from util_display import writer
+import util_tz
 
 # ------------------------------------------------------------------------------------
 # --    Classes
 # ------------------------------------------------------------------------------------
 
 class ZoneInfo():
-    def __init__(self, config):
+    def __init__(self, config, index=0):
         self.utc_offset_sec = 0
         if ('utc_offset' in config) and (config["utc_offset"] != -999):
             self.utc_offset_sec = config["utc_offset"] * 60 * 60
 
         self.is_utc = False
         self.tz_abbr = config["tz_abbr"]
+        # Like "Madison, Wisconsin". Shown instead of tz_abbr if zone_label asks for it.
+        self.description = config.get("description", config.get("descr", ""))
+        # IANA name like "America/Chicago". Learned from the API if not configured.
+        self.tz_name = config["tz_name"] if "tz_name" in config else ""
         self.latitude = config["latitude"]
         self.longitude = config["longitude"]
         self.sunrise = 0
         self.sunset = 0
+        # Table of (sunrise, sunset) for the next few days.
+        self.almanac = []
         self.dst_start = 0
         self.dst_end = 0
         self.next_check = 0
+        # Position in the catalog.
+        self.index = index
 
-class ClockLine():
-    def __init__(self, clock_font, clock_font_height, label_font, label_font_height):
-        self.label_hours = Label(clock_font)
-        self.label_separator = Label(clock_font)
-        self.label_minutes = Label(clock_font)
-        self.clock_height = clock_font_height
-        self.show_label = True
-        
-        global group
-
-        # This is a temporary label that we'll use for measuring stuff
-        temp_label = Label(clock_font)
-        max_hr_width = 0
-        max_w = 0
-        for i in range(0, 60):
-            temp_label.text = "{value:02d}".format(value=i)
-            max_w = max(max_w, temp_label.bounding_box[2])
-
-            if (i == 23):
-                max_hr_width = max_w
-
-        ht = temp_label.bounding_box[3]
-        self.label_height = label_font_height
-
-        temp_label.text = ":"
-        width_separator = temp_label.bounding_box[2]
-
-        self.CloockWidth = max_hr_width + width_separator + max_w
-        print("width: {}, {}, {}".format(max_hr_width, width_separator, max_w))
-
-        self.ClockGroup = displayio.Group()
-
-        self.label_hours.anchor_point = (1.0, 0)
-        self.label_hours.anchored_position = (max_hr_width, 0)
-
-        self.label_separator.anchor_point = (0, 1.0)
-        self.label_separator.anchored_position = (max_hr_width, ht)
-
-        self.label_minutes.anchor_point = (0, 0)
-        self.label_minutes.anchored_position = (max_hr_width + width_separator, 0)
-
-        self.ClockGroup.append(self.label_hours)
-        self.ClockGroup.append(self.label_separator)
-        self.ClockGroup.append(self.label_minutes)
-
-        self.zone_label = Label(label_font)
-        self.zone_label.anchor_point = (0, 1.0)
-        self.zone_label.anchored_position = (self.CloockWidth + 1, ht)
-        self.zone_label.scrolling = True
-        self.ClockGroup.append(self.zone_label)
-
-        # PM marker. Default off.
-        self.pm_marker = Rect(max_hr_width + 1, 0, 1, 1, fill=0x000000)
-        self.ClockGroup.append(self.pm_marker)
-        # Color for the PM marker if it is visible.
-        self.pm_marker_color = 0x0000FF
-
-        group.append(self.ClockGroup)
-
-    def SetClockColor(self, color):
-        self.label_hours.color = color
-        self.label_separator.color = color
-        self.label_minutes.color = color
-        self.pm_marker_color = color
-
-    def SetTime(self, now, show_colon):
-        self.pm_marker.fill = 0x000000
-
-        hours = now[3]
-        if appconfig["show_am_pm"]:
-            if hours >= 12:
-                # Turn on the PM marker before we adjust the hours.
-                self.pm_marker.fill = self.pm_marker_color
-
-            if hours > 12:  # Handle times later than 12:59
-                hours -= 12
-            elif not hours:  # Handle times between 0:00 and 0:59
-                hours = 12
-
-        if hours < 10:
-            # Pad with a space
-            hours = " {hours}".format(hours=hours)
-        else:
-            hours = "{hours}".format(hours=hours)
-
-        minutes = now[4]
-
-        if BLINK:
-            # Colon on for even seconds.
-            colon = ":" if show_colon or now[5] % 2 else " "
-        else:
-            colon = ":"
-
-        self.label_hours.text = "{}".format(hours)
-        self.label_separator.text = colon
-        self.label_minutes.text = "{minutes:02d}".format(minutes=minutes)
+    # True if config describes this location.
+    def matches(self, config):
+        return ((config["tz_abbr"] == self.tz_abbr)
+            and (abs(config["latitude"] - self.latitude) < util_cache.COORD_TOLERANCE)
+            and (abs(config["longitude"] - self.longitude) < util_cache.COORD_TOLERANCE))
 
 
 # ------------------------------------------------------------------------------------
@@ -152,26 +86,59 @@ class ClockLine():
 # ------------------------------------------------------------------------------------
 # --    Constants
 # ------------------------------------------------------------------------------------
-BLINK = True
 DEBUG = False
+# How often to check for location changes, in seconds.
+CONFIG_INTERVAL_S = 60 * 60
+# Time between display updates, in seconds.
+FRAME_S = 1
+# Fields read from the config payload and from timeapi.io. Nothing else is parsed.
+CONFIG_FIELDS = ("latitude", "longitude", "locations.*", "bundle.built", "bundle.valid_until", "bundle.zones.*")
+TIMEAPI_FIELDS = ("timeZone", "currentUtcOffset.seconds", "dstInterval.dstStart", "dstInterval.dstEnd")
 # ------------------------------------------------------------------------------------
 
 # ------------------------------------------------------------------------------------
 # --    Module Level Variables
 # ------------------------------------------------------------------------------------
-next_update = 0
 next_time_update = 0
+# Frames drawn, frames more than a frame late, the worst lateness in seconds,
+# and phase locked frames that missed the RTC's second edge.
+render_stats = {"frames": 0, "late": 0, "max_late": 0, "unlocked": 0}
 # Start this at zero. It will be incremented before the first read.
 aux_zone_index = 0
-next_aux_zone_time = 0
 clock_lines = []
+# The zones in memory, by catalog index. Set up with the catalog below.
 zone_info = []
+# While the config is read, "loc" is the user's location once it's known, and
+# "held" is True if its place in the catalog is being held until then.
+config_local = {"loc": None, "held": False}
+# Bundle entries as the config is read (see apply_bundle()): the state of each
+# time zone, the time zone of each location, and sun times for zones in memory.
+bundle_states = {}
+bundle_names = []
+bundle_sun = {}
+# Where the last config came from and a checksum of it, so an unchanged config
+# isn't applied again.
+config_hash = None
+# ETag from the config endpoint, if it sends one.
+config_etag = None
 # ------------------------------------------------------------------------------------
 
 from appconfig import appconfig
 
+if appconfig["heap_profile"]:
+    util_heap.enable()
+
 from locations import locations
 
+zone_cache = util_cache.ZoneCache(appconfig["cache_file"], appconfig["cache_write_s"])
+# Every location, on flash. Only the zones on show and the next few in the
+# rotation are kept in memory.
+catalog = util_catalog.Catalog(appconfig["catalog_file"])
+
+# Corrects the RTC between network syncs, and spaces the syncs out when it can.
+discipline = util_clock.ClockDiscipline(appconfig["sync_min_s"], appconfig["sync_max_s"], appconfig["sync_tolerance_s"])
+rtc.discipline = discipline
+
 # Get wifi details and more from a secrets.py file
 try:
     from secrets import secrets
@@ -181,21 +148,38 @@ except ImportError:
 
 # --- Display setup ---
 # This is used for Matrix Portal.
-hardware = MatrixPortal()
+# Chained panels make one display, tile_rows panels high.
+hardware = MatrixPortal(width=appconfig["display_width"], height=appconfig["display_height"],
+    tile_rows=appconfig["display_tile_rows"])
 # This is used for PyPortal.
 # hardware = PyPortal()
 
 display = hardware.display
+# Only redraw what changed, and refresh the panel once per frame.
+writer.attach(display, appconfig["batch_refresh"])
+# Sleeps between deadlines, lightly while the panel is dark.
+power = util_power.PowerManager(appconfig["light_sleep"])
 
 # --- Network setup ---
 # This is used for PyPortal and MagTag.
 # network = hardware.network
 # This is used for Matrix Portal.
 network = hardware.network #Network(status_neopixel=board.NEOPIXEL, debug=False)
+# Kept-alive sessions for the config endpoint and timeapi.io. Adafruit IO stays
+# on network's own session.
+pool = util_network.SessionPool(network, appconfig["keepalive_s"], appconfig["keepalive_hosts"])
+# Failure tracking for each service, so one that's down or slow gets backed off
+# instead of hammered. Sun times are worked out locally, so there's no
+# sunrise-sunset.org to track.
+timeapi = util_retry.endpoint("timeapi", max_s=appconfig["retry_max_s"], threshold=appconfig["breaker_failures"],
+    timeout_s=appconfig["network_timeout_s"], max_timeout_s=appconfig["network_timeout_max_s"])
+adafruit_io = util_retry.endpoint("io", max_s=appconfig["retry_max_s"], threshold=appconfig["breaker_failures"])
+config_api = util_retry.endpoint("config", max_s=appconfig["retry_max_s"], threshold=appconfig["breaker_failures"],
+    timeout_s=appconfig["network_timeout_s"], max_timeout_s=appconfig["network_timeout_max_s"])
 
 # --- Drawing setup ---
 group = displayio.Group()  # Create a Group
-bitmap = displayio.Bitmap(64, 32, 2)  # Create a bitmap object,width, height, bit depth
+bitmap = displayio.Bitmap(display.width, display.height, 2)  # Create a bitmap object,width, height, bit depth
 color = displayio.Palette(4)  # Create a color palette
 color[0] = 0x000000  # black background
 color[1] = 0xFF0000  # red
@@ -207,11 +191,9 @@ tile_grid = displayio.TileGrid(bitmap, pixel_shader=color)
 group.append(tile_grid)  # Add the TileGrid to the Group
 display.show(group)
 
-aux_zones = appconfig["aux_zones"]
-
 # Fonts: https://learn.adafruit.com/custom-fonts-for-pyportal-circuitpython-display
 if not DEBUG:
-    font = bitmap_font.load_font(appconfig["clock_font"])
+    font = util_font.load_font(appconfig["clock_font"])
     fontHeight = appconfig["clock_font_height"]
     if fontHeight == 0:
         # Default to half of the display height.
@@ -223,68 +205,74 @@ else:
 if appconfig["label_font"] == "terminalio.FONT":
     font2 = terminalio.FONT
 else:
-    font2 = bitmap_font.load_font(appconfig["label_font"])
+    # The label font also shows zone names and status codes.
+    font2 = util_font.load_font(appconfig["label_font"], None)
 
 font2Height = appconfig["label_font_height"]
 
 print("font heights: {}, {}".format(fontHeight, font2Height))
 
+# Where every clock line goes, for this display and these fonts.
+clock_metrics = util_font.clock_metrics(font)
+aux_metrics = util_font.clock_metrics(font2)
+layout = util_layout.Layout(display.width, display.height,
+    fontHeight, clock_metrics.hours_width + clock_metrics.separator_width + clock_metrics.minutes_width,
+    font2Height, aux_metrics.hours_width + aux_metrics.separator_width + aux_metrics.minutes_width,
+    util_font.text_width(font2, "MMM"), appconfig["aux_zones"], appconfig["aux_columns"],
+    appconfig["clock_y_offset"], appconfig["warn_minutes"])
+
 # Number of aux zones to show.
-print("{} aux zones".format(aux_zones))
+aux_zones = layout.aux_zones()
+print("{} aux zones in {} columns on {}x{}".format(aux_zones, layout.columns, display.width, display.height))
+
+if appconfig["clock_backend"] == "atlas":
+    # Digits drawn from a shared tile atlas.
+    clock_line_class = AtlasClockLine
+else:
+    clock_line_class = ClockLine
 
-clock_lines = [ ClockLine(font, fontHeight, font2, font2Height) ]
+start_time = time.monotonic()
+clock_lines = [ clock_line_class(font, fontHeight, font2, font2Height, group) ]
 for idx in range(aux_zones):
-    if aux_zones == 1:
+    if layout.split:
         # Just one extra line, so use the same clock font.
-        clock_lines.append(ClockLine(font, fontHeight, font2, font2Height))
+        clock_lines.append(clock_line_class(font, fontHeight, font2, font2Height, group))
     else:
-        clock_lines.append(ClockLine(font2, font2Height, font2, font2Height))
+        clock_lines.append(clock_line_class(font2, font2Height, font2, font2Height, group))
+print("clock lines built in {sec}".format(sec=time.monotonic() - start_time))
 
-top = 0
 for idx in range(len(clock_lines)):
-    if aux_zones == 1:
-        # For one aux zone, we just use the top and bottom halves of the display.
-        top = 8 + ((display.height // 2) + 1) * idx + appconfig["clock_y_offset"]
-
-    clock_lines[idx].ClockGroup.y = top
-    if (aux_zones == 4) and (idx > 0):
-        # Auxilliary zone
-        # Don't show the label if we have four zones.
-        clock_lines[idx].show_label = False
-        if (idx % 2) == 0:
-            # Even numbered idx that isn't the primary zone.
-            # Move to the second column.
-            clock_lines[idx].ClockGroup.x = display.width // 2 + 2
-            # Odd numbered idx.
-            # Move to the next line.
-            top += clock_lines[idx].clock_height
-    else:
-        top += clock_lines[idx].clock_height
-        if idx == 0:
-            top += 3
+    slot = layout.slots[idx]
+    clock_lines[idx].ClockGroup.x = slot.x
+    clock_lines[idx].ClockGroup.y = slot.y
+    clock_lines[idx].show_label = slot.show_label
 
     print("zone {} at ({}, {})".format(idx, clock_lines[idx].ClockGroup.x, clock_lines[idx].ClockGroup.y))
 
-    clock_lines[idx].zone_label.color = 0x0000FF
+    writer.set(clock_lines[idx].zone_label, "color", 0x0000FF)
 
 
-line_y = clock_lines[0].clock_height + 2
-# Solid horizontal line separating the two times.
-rect = Rect(0, line_y, display.width, 1, fill=0x000055)
-group.append(rect)
-if aux_zones == 4:
-    # Solid vertical line separating columns.
-    rect = Rect(display.width // 2 - 1, line_y, 1, display.height - line_y, fill=0x000055)
+# Zone names too long for their room scroll, a step at a time between frames.
+scroller = util_scroll.Scroller(appconfig["scroll_hold_steps"])
+for idx in range(len(clock_lines)):
+    scroller.add(clock_lines[idx].zone_label, font2, layout.slots[idx].label_width)
+label_descriptions = appconfig["zone_label"] == "description"
+
+# Solid lines under the main zone and between columns. Colors go through the
+# writer so they dim with everything else.
+for x, y, width, height in layout.dividers:
+    rect = Rect(x, y, width, height)
+    writer.set(rect, "fill", 0x000055)
     group.append(rect)
 
 # Cyan bar to show the seconds.
-seconds_width = display.width / 12
-seconds_incr = (display.width - seconds_width) / 60
-seconds_rect = Rect(0, line_y + 1, round(seconds_width), 1, fill=0x005555)
+seconds_rect = Rect(0, layout.seconds_y, layout.seconds_width, 1)
+writer.set(seconds_rect, "fill", 0x005555)
 group.append(seconds_rect)
 
 # Red box within 5 minutes of the hour.
-warn_rect = Rect(display.width, line_y - 1, 25, 3, fill=0x550000)
+warn_rect = Rect(display.width, layout.warn_y, 25, 3)
+writer.set(warn_rect, "fill", 0x550000)
 group.append(warn_rect)
 
 
@@ -301,25 +289,191 @@ def ensure_connected():
     return network.is_connected
 
 
-def load_locations(loc):
-    global zone_info
+# Builds the zone for catalog location idx, picking up where we left off if
+# we had it before a reset.
+def make_zone(config, idx):
+    zone = ZoneInfo(config, idx)
+    zone_cache.restore(zone)
+    return zone
+
+
+# True if a zone in memory is still the location in config.
+def keep_zone(zone, config):
+    if not zone.matches(config):
+        return False
+    if ("tz_name" in config) and (config["tz_name"] != zone.tz_name):
+        # The time zone was corrected. Look it up again.
+        zone.tz_name = config["tz_name"]
+        zone.next_check = 0
+    return True
+
+
+# Keeps the fixed zones and the next few in the rotation in memory. Returns
+# the number read in from the catalog.
+def focus_zones():
+    return zone_info.focus(aux_zone_index if aux_zone_index >= 0 else aux_zones)
+
+
+# Call after the catalog changes. Keeps the state of any zone we already have.
+def set_zones(count_before):
     global aux_zone_index
 
-    zone_info = []
-    print("found {} locations:".format(len(loc)))
-    for idx in range(len(loc)):
-        print(loc[idx])
-        zone_info.append(ZoneInfo(loc[idx]))
+    zone_info.reload(keep_zone)
+    if len(zone_info) != count_before or aux_zone_index >= len(zone_info):
+        # Start with either the last clock line or last zone.   
+        aux_zone_index = min(len(clock_lines), len(zone_info)) - 1
+    focus_zones()
+
+
+# Makes the locations added to the catalog since catalog.begin() the ones shown.
+def finish_locations():
+    count_before = len(zone_info)
+    if catalog.finish():
+        print("{} locations, was {}".format(len(zone_info), count_before))
+        set_zones(count_before)
+
 
-    # Start with either the last clock line or last zone.   
-    aux_zone_index = min(len(clock_lines), len(zone_info)) - 1
+# Loads a list of locations, keeping the state of any zone we already have.
+def load_locations(loc):
+    print("found {} locations".format(len(loc)))
+    catalog.begin()
+    for config in loc:
+        catalog.add(config)
+    finish_locations()
+
+
+# The user's location, from the config's latitude and longitude.
+def local_location(latitude, longitude):
+    loc = {'descr': 'local', 'latitude': latitude, 'longitude': longitude, 'tz_abbr': 'LCL'}
+    if 'timezone' in secrets:
+        loc['tz_name'] = secrets['timezone']
+    return loc
+
+
+# Starts reading a config: locations go straight to the catalog, and bundle
+# entries are boiled down, as they stream in.
+def begin_config():
+    catalog.begin()
+    config_local["loc"] = None
+    config_local["held"] = False
+    clear_bundle()
+
+
+# Drops a config read part way, or one that turned out to be unchanged,
+# leaving the catalog as it was.
+def discard_config():
+    catalog.abort()
+    clear_bundle()
+
+
+def clear_bundle():
+    bundle_states.clear()
+    bundle_sun.clear()
+    del bundle_names[:]
+
+
+# Called by the config Extractor for each location and bundle entry as it's read.
+def config_item(fields, path, value):
+    if path == "locations.*":
+        if (config_local["loc"] is None) and not config_local["held"]:
+            # The user's location comes first.
+            add_local_location(fields)
+        catalog.add(value)
+        return
+
+    # A bundle entry: [tz_name, utc_offset, dst_start, dst_end, [[sunrise, sunset], ...]].
+    idx = len(bundle_names)
+    tz_name = value[0]
+    state = bundle_states.get(tz_name)
+    if state is None:
+        state = value[:4]
+        bundle_states[tz_name] = state
+    # One copy of each name, however many locations share it.
+    bundle_names.append(state[0])
+    if zone_info.is_resident(idx):
+        bundle_sun[idx] = [(day[0], day[1]) for day in value[4]]
+
+
+# Adds the user's location as catalog location 0. If the latitude and longitude
+# haven't been read yet, its place is held and filled in at the end.
+def add_local_location(fields):
+    results = fields.results
+    if ("latitude" in results) and ("longitude" in results):
+        config_local["loc"] = local_location(results["latitude"], results["longitude"])
+        catalog.add(config_local["loc"])
+    else:
+        config_local["held"] = True
+        catalog.hold()
+
+
+# Ends reading a config, and makes its locations the ones shown.
+def finish_config(fields):
+    results = fields.results
+    if config_local["loc"] is None:
+        if config_local["held"]:
+            catalog.put(0, local_location(results["latitude"], results["longitude"]))
+        else:
+            add_local_location(fields)
+    finish_locations()
+    if bundle_names:
+        apply_bundle(results.get("bundle.built"), results.get("bundle.valid_until"))
+
+
+# Takes each zone's offset, DST window and sun times from a config bundle (see
+# tools/bundle_server.py), so update_time_zone() needn't ask timeapi.io or work
+# out the almanac. Entry 0 is the user's location, then one per location.
+# The offsets hold from built, the server's time, so they're kept but not used
+# until the RTC is set and reads later than that. Locations without a tz_name
+# get the bundle's, and zones in memory its sun times; zones read in later
+# work out their own.
+def apply_bundle(built, valid_until):
+    if not built:
+        built = rtc.utc_s
+    for tz_name in bundle_states:
+        state = bundle_states[tz_name]
+        util_tz.remember(tz_name, state[1], state[2], state[3], built, valid_until)
+
+    count = min(len(bundle_names), len(zone_info))
+    for idx in range(count):
+        if zone_info.is_resident(idx):
+            zone = zone_info[idx]
+            if not zone.tz_name:
+                zone.tz_name = bundle_names[idx]
+            if idx in bundle_sun:
+                zone.almanac = bundle_sun[idx]
+            # Show it on the next zones pass.
+            zone.next_check = 0
+        if "tz_name" not in catalog.location(idx):
+            catalog.learn(idx, bundle_names[idx])
+
+    util.log("bundle: {count} zones, {names} time zones until {until}".format(count=count,
+        names=len(bundle_states),
+        until=util_time.format_time(time.localtime(valid_until)) if valid_until else "?"))
+    clear_bundle()
+
+
+# True if the config from source has the same checksum as last time. Remembers
+# it if not. Not hash(): on the board a str's hash is only a byte or two.
+def config_unchanged(source, checksum):
+    global config_hash
+
+    h = (source, checksum)
+    if h == config_hash:
+        return True
+
+    config_hash = h
+    return False
 
 
 def get_config():
+    global config_etag
+
     KEY_ENDPOINT = "config_endpoint"
     KEY_FEED = "config_feed"
 
     feed_valid = False
+    # The endpoint's ETag for this config, kept once the config is applied.
+    etag = None
 
     if ensure_connected():
         print("getting config")
@@ -328,9 +482,46 @@ def get_config():
 
         if KEY_ENDPOINT in secrets:
             # Call the config endpoint
-            response = network.fetch_data(secrets[KEY_ENDPOINT])
-            # Parse the JSON response into a dictionary.
-            response = json.loads(response)
+            headers = {}
+            if config_etag:
+                headers["If-None-Match"] = config_etag
+            with config_api:
+                with util_timing.span("fetch"):
+                    response = pool.get(secrets[KEY_ENDPOINT], headers=headers, timeout=config_api.timeout_s)
+                print("response in {sec}".format(sec=time.monotonic() - start_time))
+                if response.status_code == 304:
+                    util.log("config not modified")
+                    response.close()
+                    return
+                if response.status_code != 200:
+                    response.close()
+                    raise RuntimeError("config endpoint returned {}".format(response.status_code))
+                for key in response.headers:
+                    if key.lower() == "etag":
+                        etag = response.headers[key]
+                if etag and etag == config_etag:
+                    # The server ignored If-None-Match, but it's the config we have.
+                    util.log("config unchanged")
+                    response.close()
+                    return
+
+                # Pull out just the fields we use as the body streams in, so the
+                # whole payload is never in memory at once.
+                begin_config()
+                fields = util_json.Extractor(CONFIG_FIELDS, lambda path, value: config_item(fields, path, value))
+                try:
+                    with util_timing.span("json"):
+                        fields.read(response)
+                except Exception:
+                    discard_config()
+                    raise
+                finally:
+                    response.close()
+            if config_unchanged(KEY_ENDPOINT, fields.checksum):
+                util.log("config unchanged")
+                discard_config()
+                config_etag = etag
+                return
 
             feed_valid = True
         else:
@@ -347,155 +538,215 @@ def get_config():
                 # We found a feed.
 
                 # Get the feed.
-                response = network.get_io_feed(feed)
+                with adafruit_io, util_timing.span("fetch"):
+                    response = network.get_io_feed(feed)
                 print("response in {sec}".format(sec=time.monotonic() - start_time))
 
                 last_update = util_time.parse_time(response["updated_at"])
-                now_utc_s = time.mktime(time.localtime())
+                now_utc_s = time.time()
                 age_days = (now_utc_s - last_update) / 60 / 60 / 24
                 if (age_days > 5):
                     # The API expires data after seven days.
                     # Re-upload the data to force a new update date.
                     util.log("re-uploading feed {feed}".format(feed=feed))
-                    network.push_to_io(feed, response['last_value'])
+                    with adafruit_io:
+                        network.push_to_io(feed, response['last_value'])
                 else:
                     util.log("feed {feed} is {d} days old".format(feed=feed, d=age_days))
 
-                # The value is a JSON string, so we need to parse it.
-                response = json.loads(response['last_value'])
+                payload = response['last_value'].encode("utf-8")
+                # Only the bytes are needed from here.
+                response = None
+                if config_unchanged(KEY_FEED, binascii.crc32(payload)):
+                    util.log("config unchanged")
+                    return
+
+                # The value is a JSON string. Parse just the fields we use.
+                begin_config()
+                fields = util_json.Extractor(CONFIG_FIELDS, lambda path, value: config_item(fields, path, value))
+                try:
+                    with util_timing.span("json"):
+                        fields.feed(payload)
+                except Exception:
+                    discard_config()
+                    raise
 
         if feed_valid:
-            # Build a list of locations from the feed.
-            feed_locations = []
-            # First element is the user's location.
-            loc = {'descr': 'local', 'latitude': response['latitude'], 'longitude': response['longitude'], 'tz_abbr': 'LCL'}
-            feed_locations.append(loc)
-            # Append any locations from the value we read.
-            for idx in range(len(response['locations'])):
-                feed_locations.append(response['locations'][idx])
-            # Load for use by the clock.
-            load_locations(feed_locations)
-        else:
+            # The user's location, then the locations from the value we read.
+            finish_config(fields)
+            # Only once it's applied, so a config that failed isn't skipped as not modified.
+            config_etag = etag
+        elif not config_unchanged("locations.py", 0):
             # Use locations.py
             load_locations(locations)
 
 
 # Shows a short status message in red in the time zone name area.
 def set_status(message):
-    clock_lines[0].zone_label.color = 0xFF0000
-    clock_lines[0].zone_label.text = message
+    writer.set(clock_lines[0].zone_label, "color", 0xFF0000)
+    scroller.set_text(clock_lines[0].zone_label, message)
+    # Show it now. The display may not get another turn until a request finishes.
+    writer.refresh()
+
+
+# Gets the UTC offset and DST window for a location from timeapi.io, learning
+# its tz_name on the way. Shared with any other location in the same zone.
+# Call ensure_connected() first.
+def fetch_zone_state(zone, now_utc_s):
+    util.log("getting timezone {zone} info".format(zone=zone.tz_abbr))
+    start_time = time.monotonic()
+    # Counts as a timeapi.io failure if the request or the read fails.
+    with timeapi:
+        with util_timing.span("fetch"):
+            response = pool.get("https://www.timeapi.io/api/timezone/coordinate?latitude={lat}&longitude={lng}".format(lat=zone.latitude, lng=zone.longitude),
+                timeout=timeapi.timeout_s)
+        print("response in {sec}".format(sec=time.monotonic() - start_time))
+        if response.status_code != 200:
+            response.close()
+            raise RuntimeError("timeapi.io returned {}".format(response.status_code))
+
+        # Read just the fields we use. Stops reading once they're all found.
+        with util_timing.span("json"):
+            fields = util_json.extract(response, TIMEAPI_FIELDS)
+        response.close()
+
+    zone.tz_name = fields["timeZone"]
+    # Zones read in again later start with it.
+    catalog.learn(zone.index, zone.tz_name)
+    if util_tz.find_rule(zone.tz_name):
+        util.log("{zone} is {name}, using local rules from now on".format(zone=zone.tz_abbr, name=zone.tz_name))
+        return util_tz.zone_state(zone.tz_name, now_utc_s)
+
+    dst_start = 0
+    dst_end = 0
+    if fields.get("dstInterval.dstStart") and fields.get("dstInterval.dstEnd"):
+        # Get the DST start and end in UTC, in seconds. null means no DST.
+        dst_start = util_time.parse_time(fields["dstInterval.dstStart"])
+        dst_end = util_time.parse_time(fields["dstInterval.dstEnd"])
+    return util_tz.remember(zone.tz_name, int(fields["currentUtcOffset.seconds"]), dst_start, dst_end, now_utc_s)
 
 
 # Updates the UTC offset, DST start and end, and sunrise/sunset for a location.
-# zone: the ZoneInfo to display.
-# idx:  the line number where zone will be displayed.
-def update_time_zone(zone, idx):
-    if zone.next_check < time.mktime(time.localtime()):
-        # Time to refresh the zone info.
-
-        ensure_connected()
-
-        # ------------------------------------------------------------
-        # --    Time zone info from lat/long.
-        # ------------------------------------------------------------
-        util.log("getting timezone {zone} info".format(zone=zone.tz_abbr))
-        # set_status("api")
-        # network.push_to_io(appconfig["feed_log"],
-        #     "getting timezone {zone} info".format(zone=zone.tz_abbr))
-        # Get the time zone data
-        set_status("TZ{idx}".format(idx=idx))
-        start_time = time.monotonic()
-        response = network.fetch_data("https://www.timeapi.io/api/timezone/coordinate?latitude={lat}&longitude={lng}".format(lat=zone.latitude, lng=zone.longitude))
-        print("response in {sec}".format(sec=time.monotonic() - start_time))
-        
-        # Parse the JSON response into a dictionary.
-        response = json.loads(response)
-        zone.utc_offset_sec = int(response["currentUtcOffset"]["seconds"])
-        zone.tz_name = response["timeZone"]
-        # Get the DST start and end in UTC, in seconds.
-        zone.dst_start = util_time.parse_time(response["dstInterval"]["dstStart"])
-        zone.dst_end = util_time.parse_time(response["dstInterval"]["dstEnd"])
-        # ------------------------------------------------------------
-
-        # Calls can take a little. Update the display between.
-        update_display()
-
-        # ------------------------------------------------------------
-        # Get the almanac (sunrise/sunset) info.
-        # ------------------------------------------------------------
-        util.log("getting almanac {zone} info".format(zone=idx))
-        # Get the almanac (sunrise/sunset) data
-        set_status("ss{idx}".format(idx=idx))
-        start_time = time.monotonic()
-        response = network.fetch_data("https://api.sunrise-sunset.org/json?formatted=0&lat={lat}&lng={lng}".format(lat=zone.latitude, lng=zone.longitude))
-        print("response in {sec}".format(sec=time.monotonic() - start_time))
-        # Parse the JSON response into a dictionary.
-        zone.almanac = json.loads(response)["results"]
-        # Get the sunrise and sunset in UTC, in seconds.
-        zone.sunrise = util_time.parse_time(zone.almanac["sunrise"])
-        zone.sunset = util_time.parse_time(zone.almanac["sunset"])
-        # ------------------------------------------------------------
-
-        # Calls can take a little. Update the display between.
-        update_display()
-
-        # Check again a minute after sunset and DST changes to get the
-        # sunrise/sunset for the next day and new DST values.
-        # NOTES
-        #   1) sunrise doesn't appear to update until after sunset has passed.
-        #   2) we don't use dst_start and dst_end to change the UTC offset. They're
-        #       just used to determine when to call the API again. So if DST ends,
-        #       we'll call the API a minute after and it will return the new UTC offset.
-        zone.next_check = min(zone.sunset, zone.dst_start, zone.dst_end) + 60
-        # In case something weird happens, make sure we don't update too soon.
-        if zone.next_check < now_s:
-            zone.next_check = now_s + 60 * 60 * 1
-
-        s = "({sunrise}, {sunset}), ({dst_start}, {dst_end}) => {nextcheck}".format(
-            sunrise=util_time.format_time(time.localtime(zone.sunrise)),
-            sunset=util_time.format_time(time.localtime(zone.sunset)),
-            dst_start=util_time.format_time(time.localtime(zone.dst_start)),
-            dst_end=util_time.format_time(time.localtime(zone.dst_end)),
-            nextcheck=util_time.format_time(time.localtime(zone.next_check)))
-        util.log(s)
-        # set_status("api")
-        # network.push_to_io(appconfig["feed_log"],
-        #     "zone {zone} almanac: {almanac}".format(zone=idx, almanac=s))
+# Offsets come from a state shared by every location with the same tz_name,
+# so each zone is only worked out (or fetched) once.
+# zone:  the ZoneInfo to display.
+# idx:   the line number where zone will be displayed.
+# fetch: True to ask timeapi.io if the zone's state isn't known. The caller
+#        has already checked the connection.
+# Returns False if the zone still needs timeapi.io, because fetch was False or
+# the fetch failed. Until then it keeps showing the last state it had (stale
+# while revalidate), and next_check is left due so it's asked again.
+def update_time_zone(zone, idx, fetch):
+    now_utc_s = rtc.utc_s
+
+    # ------------------------------------------------------------
+    # --    Time zone info from the shared state, or lat/long.
+    # ------------------------------------------------------------
+    state = util_tz.zone_state(zone.tz_name, now_utc_s)
+    if state is None and fetch:
+        try:
+            state = fetch_zone_state(zone, now_utc_s)
+        except (OSError, RuntimeError) as e:
+            util.log("timeapi failed for zone {zone}, retry in {s} s: {e}".format(zone=idx, s=round(timeapi.retry_in()), e=e))
+    if state is None:
+        # Keep the sun times moving on the offset we last had, if any.
+        state = util_tz.stale_state(zone.tz_name)
+        if state is not None:
+            zone.utc_offset_sec = state.utc_offset
+            sun = util_almanac.current_sun_times(zone.almanac, now_utc_s)
+            if sun is not None:
+                zone.sunrise, zone.sunset = sun
+        return False
+    zone.utc_offset_sec = state.utc_offset
+    zone.dst_start = state.dst_start
+    zone.dst_end = state.dst_end
+    next_dst_change = state.valid_until
+    if not next_dst_change:
+        # No DST. Only the almanac needs checking.
+        next_dst_change = now_utc_s + 24 * 60 * 60
+    # ------------------------------------------------------------
+
+    # ------------------------------------------------------------
+    # Get the almanac (sunrise/sunset) info.
+    # ------------------------------------------------------------
+    sun = util_almanac.current_sun_times(zone.almanac, now_utc_s)
+    if sun is None:
+        # Out of days. Work out the next few.
+        util.log("computing almanac {zone} info".format(zone=idx))
+        zone.almanac = util_almanac.sun_table(zone.latitude, zone.longitude,
+            now_utc_s, zone.utc_offset_sec, appconfig["almanac_days"])
+        sun = util_almanac.current_sun_times(zone.almanac, now_utc_s)
+    # Get the sunrise and sunset in UTC, in seconds.
+    zone.sunrise, zone.sunset = sun
+    # ------------------------------------------------------------
+
+    # Check again a minute after sunset and DST changes to get the
+    # sunrise/sunset for the next day and new DST values.
+    # NOTES
+    #   1) after sunset we move on to the next day in the almanac table.
+    #   2) we don't use dst_start and dst_end to change the UTC offset. They're
+    #       just used to determine when to check again. So if DST ends, we'll
+    #       look up the zone a minute after and get the new UTC offset.
+    zone.next_check = min(zone.sunset, next_dst_change) + 60
+    # In case something weird happens, make sure we don't update too soon.
+    if zone.next_check < now_utc_s:
+        zone.next_check = now_utc_s + 60 * 60 * 1
+
+    s = "({sunrise}, {sunset}), ({dst_start}, {dst_end}) => {nextcheck}".format(
+        sunrise=util_time.format_time(time.localtime(zone.sunrise)),
+        sunset=util_time.format_time(time.localtime(zone.sunset)),
+        dst_start=util_time.format_time(time.localtime(zone.dst_start)),
+        dst_end=util_time.format_time(time.localtime(zone.dst_end)),
+        nextcheck=util_time.format_time(time.localtime(zone.next_check)))
+    util.log(s)
+    # set_status("api")
+    # network.push_to_io(appconfig["feed_log"],
+    #     "zone {zone} almanac: {almanac}".format(zone=idx, almanac=s))
+    return True
+
+
+# Dims the panel between sunset and sunrise where the user is, or blanks it
+# if night_brightness is 0. Call after rtc.tick().
+def update_brightness():
+    level = 1
+    if len(zone_info):
+        zone = zone_info[0]
+        now_utc_s = rtc.utc_s
+        if (zone.sunrise != zone.sunset) and not ((zone.sunrise < now_utc_s) and (now_utc_s < zone.sunset)):
+            level = appconfig["night_brightness"]
+    if writer.set_level(level):
+        util.log("brightness {}".format(level))
+    power.dark = level == 0
 
 
 # Updates the display
 def update_display():
-    global next_update
-
-    if next_update < time.monotonic():
-        # Only update the display once per second.
-        next_update = time.monotonic() + 1
-
-        for idx in range(min(len(clock_lines), len(zone_info))):
-            if (aux_zone_index == -1) or (idx < aux_zones):
+    for idx in range(min(len(clock_lines), len(zone_info))):
+        if (aux_zone_index == -1) or (idx < aux_zones):
+            with util_heap.phase("update_time"):
                 update_time(zone=zone_info[idx], clock_lines_index = idx)
-            else:
-                # Update the last line with the current auxilliary zone.
+        else:
+            # Update the last line with the current auxilliary zone.
+            with util_heap.phase("update_time"):
                 update_time(zone=zone_info[aux_zone_index], clock_lines_index = idx)
 
 
-# Updates the time displayed
+# Updates the time displayed, as of the last rtc.tick().
 def update_time(*, zone=None, clock_lines_index=0, show_colon=False):
     # Current UTC time from our clock, in seconds.
-    now_utc_s = time.mktime(time.localtime())
-    # Current time in zone, in seconds.
-    now_s = now_utc_s + zone.utc_offset_sec
+    now_utc_s = rtc.utc_s
     # Current time in zone, in time_tuple.
-    now = time.localtime(now_s)
+    now = rtc.local(zone.utc_offset_sec)
 
     if now[0] == 2000:
         # Should only get this before the RTC has been set.
-        clock_lines[0].zone_label.text = "???"
+        scroller.set_text(clock_lines[0].zone_label, "???")
     elif int(round(zone.utc_offset_sec, 0)) == 0:
-        clock_lines[0].zone_label.text = "UTC"
-    elif (clock_lines_index == 0) or (aux_zones < 4):
-        clock_lines[clock_lines_index].zone_label.color = 0x0000FF
-        clock_lines[clock_lines_index].zone_label.text = zone.tz_abbr
+        scroller.set_text(clock_lines[0].zone_label, "UTC")
+    elif clock_lines[clock_lines_index].show_label:
+        writer.set(clock_lines[clock_lines_index].zone_label, "color", 0x0000FF)
+        scroller.set_text(clock_lines[clock_lines_index].zone_label,
+            zone.description if (label_descriptions and zone.description) else zone.tz_abbr)
 
     if zone.sunrise == zone.sunset:
         # No almanac informat yet. Show in red.
@@ -508,126 +759,342 @@ def update_time(*, zone=None, clock_lines_index=0, show_colon=False):
         # night = red
         clock_lines[clock_lines_index].SetClockColor(color[1])
 
-    clock_lines[clock_lines_index].SetTime(now, show_colon)
+    with util_heap.phase("SetTime"):
+        clock_lines[clock_lines_index].SetTime(now, show_colon)
 
-    # This is a red rectangle that shows within five minutes of the hour.
-    global warn_rect
-    if now[4] >= appconfig["warn_minutes"]:
-        warn_rect.x = display.width - (60 - now[4]) * 5
-    else:
-        # Shove it off the right of the display.
-        warn_rect.x = display.width
+    # This is a red rectangle that shows within five minutes of the hour, and
+    # is off the right of the display the rest of the time.
+    writer.set(warn_rect, "x", layout.warn_x[now[4]])
 
     # Move the seconds indicator each time.
-    global seconds_rect
-    x = round(now[5] * seconds_incr)
-    if x != seconds_rect.x:
-        seconds_rect.x = x
+    writer.set(seconds_rect, "x", layout.seconds_x[now[5]])
+
+# ------------------------------------------------------------------------------------
+# --    Scheduled tasks
+# ------------------------------------------------------------------------------------
+
+# Converts an RTC time (UTC seconds) to a scheduler deadline.
+def deadline_from_utc(utc_s):
+    return time.monotonic() + (utc_s - rtc.read())
+
+
+# Sets the clock from the network about once an hour.
+def rtc_task(now):
+    global next_time_update
+
+    rtc.tick()
+    update_time(zone=zone_info[0],
+        show_colon=True
+    )  # Make sure a colon is displayed while updating
+
+    ensure_connected()
+
+    msg = "Updating clock from {time}".format(time=util_time.format_time(time.localtime()))
+    # set_status("api")
+    # network.push_to_io(appconfig["feed_log"], msg)
+    util.log(msg)
+    set_status("RTC")
+
+    # Values before sync
+    t0 = time.time()
+    m0 = time.monotonic()
+    with adafruit_io:
+        network.get_local_time("Etc/UTC")
+    # Values after sync
+    t1 = time.time()
+    m1 = time.monotonic()
+    # Time required to set the clock, in seconds.
+    lag = m1 - m0
+    # Clock drift, in seconds.
+    drift = (t1 - t0) - lag
+
+    # Learn the RTC's drift, and check time again sooner or later depending on
+    # how well it was predicted.
+    interval_s = discipline.sync(t1, drift, lag)
+    next_time_update = t1 + interval_s
+
+    # Next update time, in time_tuple.
+    next_check = time.localtime(next_time_update)
+    # Update at about 5 minutes past the hour.
+    next_time_update = next_time_update - (next_check[4] * 60) + 5 * 60
+
+    msg = "drift: {drift}, lag: {lag}, rtc {ppm} ppm, error {error} s, next clock update at {nextcheck}".format(
+        drift=drift, lag=lag, ppm=round(discipline.ppm, 1), error=round(discipline.error_s, 2),
+        nextcheck=util_time.format_time(time.localtime(next_time_update)))
+    if adafruit_io.allow():
+        with adafruit_io:
+            network.push_to_io(appconfig["feed_log"], msg)
+    util.log(msg)
+
+    # Zone check times are RTC times, so work them out again against the new clock.
+    scheduler.run_soon("zones")
+
+    return deadline_from_utc(next_time_update)
+
+
+# Gets the config about once an hour so location updates are picked up.
+def config_task(now):
+    with util_timing.span("config"), util_heap.phase("get_config"):
+        get_config()
+    # Pick up new locations, or a bundle, without waiting for the next zone check.
+    scheduler.run_soon("zones")
+
+    return now + CONFIG_INTERVAL_S
+
+
+# Sends one summary of the timing spans to the log feed, instead of a push per event.
+def stats_task(now):
+    util.log("render: {frames} frames, {late} late, max {max_late} s late, {unlocked} unlocked".format(**render_stats))
+    util.log("display: {}".format(writer.stats()))
+
+    summary = util_timing.summary()
+    net = pool.stats()
+    if net:
+        util.log("net: {}".format(net))
+    retry = util_retry.summary()
+    if retry:
+        util.log("retry: {}".format(retry))
+    power_summary = power.summary()
+    util.log("power: {}".format(power_summary))
+    if (summary or net or retry) and adafruit_io.allow():
+        util.log("timing: {}".format(summary))
+        ensure_connected()
+        with adafruit_io:
+            network.push_to_io(appconfig["feed_log"], "timing: {summary} | net: {net} | retry: {retry} | power: {power}".format(
+                summary=summary, net=net, retry=retry, power=power_summary))
+
+    if util_heap.enabled:
+        util_heap.report()
+
+    return now + appconfig["stats_upload_s"]
+
+
+# Refreshes every zone whose next_check has passed, in one pass. Zones with
+# known rules, or in the same zone as one already looked up, don't need the
+# network. The others get one connection check and status per pass, and one
+# fetch each pass so the display gets a turn between requests.
+def zones_task(now):
+    # The RTC may have been set since the last frame.
+    rtc.tick()
+    now_utc_s = rtc.utc_s
+    # None until a zone needs the network this pass.
+    connected = None
+    waiting = 0
+
+    # Only the zones in memory. The rest are looked at when they're next on show.
+    zones = zone_info.resident()
+    for zone in zones:
+        idx = zone.index
+        if zone.next_check >= now_utc_s:
+            continue
+
+        fetch = False
+        if connected is None and util_tz.zone_state(zone.tz_name, now_utc_s) is None and timeapi.allow():
+            connected = ensure_connected()
+            if connected:
+                set_status("TZ{idx}".format(idx=idx))
+            fetch = connected
+
+        with util_heap.phase("update_time_zone"):
+            if not update_time_zone(zone, idx, fetch):
+                waiting += 1
+
+    if waiting:
+        if connected is False:
+            # In a minute if the network is down.
+            return now + 60
+        # The next fetch on the next pass, or once timeapi.io is worth asking again.
+        return now + timeapi.retry_in()
+
+    # Only writes if something changed, and not too often.
+    zone_cache.save(zones)
+
+    if not zones:
+        # Nothing loaded yet.
+        return now + 60
+
+    # A zone is due once the RTC is past next_check, and the RTC counts whole
+    # seconds, so wake a second later or this would spin until it ticks.
+    next_check = min([zone.next_check for zone in zones]) + 1
+    # Come back in time for a cache write that was held off.
+    return min(deadline_from_utc(next_check), now + appconfig["cache_write_s"])
+
+
+# Switches the last line to the next auxilliary zone.
+def aux_zone_task(now):
+    global aux_zone_index
+
+    if power.dark:
+        # Nobody can see it. Leave the board asleep.
+        return time.monotonic() + appconfig["dark_frame_s"]
+
+    if len(zone_info) <= len(clock_lines):
+        # Enough clock lines to hold all of the specified timezones without rotating through.
+        # Set to -1 so everyone knows this.
+        aux_zone_index = -1
+    else:
+        # Goes back to the last fixed zone after the last one.
+        aux_zone_index = zone_info.next_index(aux_zone_index)
+        if focus_zones():
+            # Work out the zones just read in before they're on show.
+            scheduler.run_soon("zones")
+
+    # The new zone is drawn on the next frame, and its name scrolls from
+    # scroll_loop() if it's long.
+    return time.monotonic() + appconfig["aux_time_zone_s"]
+
+
+zone_info = util_catalog.ZoneWindow(catalog, make_zone, aux_zones, appconfig["aux_prefetch"])
+
+# Show the zones from before the last reset while we get the config.
+zone_cache.load()
+if catalog.load():
+    set_zones(0)
+    print("{} zones from the catalog".format(len(zone_info)))
+elif zone_cache.records:
+    # No catalog on flash, so probably a read-only filesystem. The cache has
+    # the zones that were in memory.
+    load_locations(zone_cache.locations())
+if len(zone_info):
+    rtc.tick()
+    update_display()
+    writer.refresh()
 
 # Get the locations
 # load_locations(locations)
-get_config()
+with util_timing.span("config"), util_heap.phase("get_config"):
+    get_config()
 
+rtc.tick()
 update_time(zone=zone_info[0], show_colon=True)  # Display whatever time is on the board
+writer.refresh()
 
 for idx in range(len(clock_lines)):
     print("zone {} at ({}, {})".format(idx, clock_lines[idx].ClockGroup.x, clock_lines[idx].ClockGroup.y))
     
 print("{} zone_info".format(len(zone_info)))
 
-while True:
-    # Get the earliest next check.
-    next_check = next_time_update
-    for idx in range(len(zone_info)):
-        next_check = min(next_check, zone_info[idx].next_check)
-
-    try:
-        now_s = time.mktime(time.localtime())
-        if next_check < now_s:
-            update_time(zone=zone_info[0],
-                show_colon=True
-            )  # Make sure a colon is displayed while updating
-
-            ensure_connected()
-
-            if next_time_update < now_s:
-                msg = "Updating clock from {time}".format(time=util_time.format_time(time.localtime()))
-                # set_status("api")
-                # network.push_to_io(appconfig["feed_log"], msg)
-                util.log(msg)
-                set_status("RTC")
-
-                # Values before sync
-                t0 = time.mktime(time.localtime())
-                m0 = time.monotonic()
-                network.get_local_time("Etc/UTC")
-                # Values after sync
-                t1 = time.mktime(time.localtime())
-                m1 = time.monotonic()
-                # Time required to set the clock, in seconds.
-                lag = m1 - m0
-                # Clock drift, in seconds.
-                drift = (t1 - t0) - lag
-
-                # Check time again in an hour
-                next_time_update = time.mktime(time.localtime()) + 60 * 60
-
-                # Next update time, in time_tuple.
-                next_check = time.localtime(next_time_update)
-                # Update at about 5 minutes past the hour.
-                next_time_update = next_time_update - (next_check[4] * 60) + 5 * 60
-
-                network.push_to_io(appconfig["feed_log"], "drift: {drift}, lag: {lag} next clock update at {nextcheck}".format(drift=drift, lag=lag, nextcheck=util_time.format_time(time.localtime(next_time_update))))
-                util.log("drift: {drift}, lag: {lag} next clock update at {nextcheck}".format(drift=drift, lag=lag, nextcheck=util_time.format_time(time.localtime(next_time_update))))
-
-                # We already have this from startup, but get it every time so that location updates
-                # can be captured at least once per hour.
-                get_config()
-
-        for idx in range(len(zone_info)):
-            # We can always call this. It will only do the update if needed.
-            update_time_zone(zone_info[idx], idx)
-
-        if next_aux_zone_time <= time.mktime(time.localtime()):
-            # Time to switch to the next zone
-            if len(zone_info) <= len(clock_lines):
-                # Enough clock lines to hold all of the specified timezones without rotating through.
-                # Set to -1 so everyone knows this.
-                aux_zone_index = -1
+# Draws the clock at a fixed cadence, whatever the network is doing.
+#
+# With render_phase_lock, frames follow the RTC's second edge instead of the
+# time since boot, so a new second is on the panel a few ms after the RTC has
+# it. The time from the edge to the frame being out is timed as "latency".
+async def render_loop():
+    phase_lock = appconfig["render_phase_lock"]
+    edge = util_phase.SecondEdge()
+    next_frame = time.monotonic()
+    while True:
+        # How far behind the frame we are. Anything over a frame is a visible stall.
+        late = time.monotonic() - next_frame
+        render_stats["frames"] += 1
+        render_stats["max_late"] = max(render_stats["max_late"], late)
+        if late > FRAME_S:
+            render_stats["late"] += 1
+
+        if phase_lock and not power.dark:
+            # Watch for the RTC to tick over. The task loop runs meanwhile.
+            await edge.wait()
+
+        with util_timing.span("render"):
+            # One RTC read for every zone on this frame.
+            rtc.tick()
+            update_brightness()
+            if not power.dark:
+                writer.set(clock_lines[1].zone_label, "color", 0x0000FF)
+                update_display()
+            # Push this frame's changes to the panel in one go.
+            writer.refresh()
+        if phase_lock and not power.dark:
+            if edge.locked:
+                util_timing.span("latency").record(edge.latency_ms())
             else:
-                aux_zone_index += 1
-                if aux_zone_index >= len(zone_info):
-                    # Rollover
-                    aux_zone_index = min(aux_zones, len(zone_info)) - 1
-            
-            # Set this after we update the timezone info, because the update is expensive
-            next_aux_zone_time = time.mktime(time.localtime()) + appconfig["aux_time_zone_s"]
-
-            hardware.scroll_text(0.05)
-
-    except BrokenPipeError as e:
-        print("BrokenPipeError")
-        print(e)
-        clock_lines[0].zone_label.text = "bpe"
-
-    except ConnectionError as e:
-        print("ConnectionError")
-        print(e)
-        clock_lines[0].zone_label.text = "c.e"
-
-    except OSError as e:
-        print("OSError")
-        print(e)
-        clock_lines[0].zone_label.text = "ose"
-
-    except RuntimeError as e:
-        print(e)
-        print("An error occured, will retry")
-        next_check = time.monotonic() + 10 * 60
-
-    clock_lines[1].zone_label.color = 0x0000FF
+                render_stats["unlocked"] += 1
+        # The frame is out, so a collection now won't tear it.
+        util_heap.idle(appconfig["gc_idle_free"])
+
+        now = time.monotonic()
+        if power.dark:
+            # Nothing shows. Just look for the end of the night now and then.
+            next_frame = now + appconfig["dark_frame_s"]
+        elif phase_lock:
+            # Just before the next edge.
+            next_frame = max(now, edge.next_wake())
+        else:
+            next_frame += FRAME_S
+            if next_frame < now:
+                # Missed frames. Don't try to catch up.
+                next_frame = now + FRAME_S
+        await power.sleep("render", next_frame - now)
 
-    update_display()
 
-    # Short nap to save power
-    time.sleep(0.1)
+# Runs the scheduled network and housekeeping tasks, one at a time, yielding
+# between them so the display keeps up.
+async def task_loop():
+    while True:
+        try:
+            with util_timing.span("loop"):
+                scheduler.run_next()
+
+        except BrokenPipeError as e:
+            print("BrokenPipeError")
+            print(e)
+            scroller.set_text(clock_lines[0].zone_label, "bpe")
+
+        except ConnectionError as e:
+            print("ConnectionError")
+            print(e)
+            scroller.set_text(clock_lines[0].zone_label, "c.e")
+
+        except OSError as e:
+            print("OSError")
+            print(e)
+            scroller.set_text(clock_lines[0].zone_label, "ose")
+
+        except util_retry.CircuitOpenError as e:
+            # Nothing was sent. The task waits until the service is worth trying.
+            print(e)
+
+        except RuntimeError as e:
+            # The scheduler has already set the task to retry after its backoff.
+            print(e)
+            print("An error occured, will retry")
+
+        # Sleep until the next task is due. Zero still lets the display run.
+        delay = scheduler.sleep_time()
+        await power.sleep("task", FRAME_S if delay is None else delay)
+
+
+# Steps zone names too long for their room, between frames, and sleeps a
+# frame at a time while none are.
+async def scroll_loop():
+    while True:
+        if power.dark:
+            await power.sleep("scroll", appconfig["dark_frame_s"])
+            continue
+        if scroller.step():
+            writer.refresh()
+        await power.sleep("scroll", appconfig["scroll_step_s"] if scroller.active() else FRAME_S)
+
+
+power.add("render")
+power.add("task")
+power.add("scroll")
+
+
+async def main():
+    await asyncio.gather(
+        asyncio.create_task(render_loop()),
+        asyncio.create_task(task_loop()),
+        asyncio.create_task(scroll_loop()),
+    )
+
+
+scheduler = util_scheduler.Scheduler()
+# Set the clock before anything that depends on it.
+scheduler.add("rtc", rtc_task, retry_s=60, max_retry_s=appconfig["retry_max_s"])
+scheduler.add("zones", zones_task, retry_s=60, max_retry_s=appconfig["retry_max_s"])
+scheduler.add("config", config_task, delay=CONFIG_INTERVAL_S, retry_s=10 * 60, max_retry_s=appconfig["retry_max_s"])
+scheduler.add("aux", aux_zone_task)
+scheduler.add("stats", stats_task, delay=appconfig["stats_upload_s"], retry_s=10 * 60, max_retry_s=appconfig["retry_max_s"])
+
+asyncio.run(main())
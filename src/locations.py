@@ -2,24 +2,28 @@ locations = [
     {
         'description': 'Madison, Wisconsin',
         'tz_abbr': 'MSN',
+        'tz_name': 'America/Chicago',
         'latitude': 43.073051,
         'longitude': -89.401230
     },
     {
         'description': 'Davis, California',
         'tz_abbr': 'Cali',
+        'tz_name': 'America/Los_Angeles',
         'latitude': 38.533958,
         'longitude': -121.744560
     },
     {
         'description': 'St. George, Utah',
         'tz_abbr': 'Utah',
+        'tz_name': 'America/Denver',
         'latitude': 37.108280,
         'longitude': -113.583282
     },
     {
         'description': 'Algorta, Spain',
         'tz_abbr': 'CET',
+        'tz_name': 'Europe/Madrid',
         'latitude': 43.348680,
         'longitude': -3.010120
     },
@@ -1,6 +1,8 @@
 import time
+import util_heap
 import util_time
 
 
 def log(message):
-    print("{time}: {msg}".format(time=util_time.format_time(time.localtime()), msg=message))
+    with util_heap.phase("util.log"):
+        print("{time}: {msg}".format(time=util_time.format_time(time.localtime()), msg=message))
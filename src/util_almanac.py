@@ -0,0 +1,107 @@
+import math
+
+SECONDS_PER_DAY = 24 * 60 * 60
+# Days from 1970-01-01 to 2000-01-01 (the J2000 epoch is noon that day).
+J2000_DAY = 10957
+# Sun's apparent radius plus refraction at the horizon, in degrees.
+SUN_ALTITUDE = -0.833
+
+
+# The sun's declination (as its sine) and the equation of time (in days) at
+# n + frac days from the J2000 epoch, following the NOAA Solar Calculator.
+#
+# Boards with single precision floats lose minutes of accuracy with full Julian
+# dates, so the whole days n are kept as an integer and the terms that grow
+# with them are split so only small numbers go through the float math.
+def _sun_position(n, frac):
+    # Julian centuries, for the slow terms.
+    t = (n + frac) / 36525
+    # Mean longitude and mean anomaly. 0.98564736 and 0.98560028 degrees a day
+    # are 1 - 0.01435264 and 1 - 0.01439972, so n % 360 is exact integer math.
+    l0 = ((n % 360) + 280.46646 - 0.01435264 * n + 0.98564736 * frac + 0.0003032 * t * t) % 360
+    m = ((n % 360) + 357.52911 - 0.01439972 * n + 0.98560028 * frac - 0.0001537 * t * t) % 360
+    e = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+    m_rad = math.radians(m)
+    # Equation of the center.
+    c = (math.sin(m_rad) * (1.914602 - t * (0.004817 + 0.000014 * t)) + math.sin(2 * m_rad) * (0.019993 - 0.000101 * t)
+        + math.sin(3 * m_rad) * 0.000289)
+    # Apparent longitude, corrected for nutation and aberration.
+    omega = math.radians(125.04 - 1934.136 * t)
+    lam = math.radians(l0 + c - 0.00569 - 0.00478 * math.sin(omega))
+    # Obliquity of the ecliptic.
+    eps = math.radians(23.4392911 - t * (0.0130042 + t * (0.00000016 - t * 0.000000504)) + 0.00256 * math.cos(omega))
+
+    sin_d = math.sin(eps) * math.sin(lam)
+    y = math.tan(eps / 2) ** 2
+    l0_rad = math.radians(l0)
+    eot = (y * math.sin(2 * l0_rad) - 2 * e * math.sin(m_rad) + 4 * e * y * math.sin(m_rad) * math.cos(2 * l0_rad)
+        - 0.5 * y * y * math.sin(4 * l0_rad) - 1.25 * e * e * math.sin(2 * m_rad))
+    return (sin_d, eot / (2 * math.pi))
+
+
+# The cosine of the sun's hour angle at sunrise and sunset.
+def _cos_hour_angle(latitude, sin_d):
+    phi = math.radians(latitude)
+    cos_d = math.cos(math.asin(sin_d))
+    return (math.sin(math.radians(SUN_ALTITUDE)) - math.sin(phi) * sin_d) / (math.cos(phi) * cos_d)
+
+
+# Computes sunrise and sunset for a location on a date.
+#
+# This is the NOAA Solar Calculator's algorithm. The sun's position is worked
+# out at solar noon, then again at each of sunrise and sunset, since the
+# declination moves by up to 0.4 degrees a day. That's within a second of the
+# calculator iterated to convergence for the locations in locations.py, and
+# within a minute near the polar circles, where the sun skims the horizon.
+#
+# latitude, longitude: degrees, north and east positive.
+# day: days since 1970-01-01, like util_time.days_from_civil().
+# Returns (sunrise, sunset) in UTC seconds.
+#   On days the sun doesn't set, sunrise is the start of the day and sunset is the end.
+#   On days the sun doesn't rise, sunrise is after sunset so it is never daytime.
+def sun_times(latitude, longitude, day):
+    n = day - J2000_DAY
+    # Fraction of a day from noon UTC to solar noon, before the equation of time.
+    mean_noon = -longitude / 360
+
+    sin_d, eot = _sun_position(n, mean_noon)
+    noon_frac = mean_noon - eot
+    noon = day * SECONDS_PER_DAY + SECONDS_PER_DAY // 2 + int(round(noon_frac * SECONDS_PER_DAY))
+
+    cos_w = _cos_hour_angle(latitude, sin_d)
+    if cos_w <= -1:
+        # Midnight sun.
+        start = noon - SECONDS_PER_DAY // 2
+        return (start, start + SECONDS_PER_DAY)
+    if cos_w >= 1:
+        # Polar night.
+        return (noon + 1, noon)
+
+    result = []
+    for sign in (-1, 1):
+        # Again with the sun where it is at the event.
+        w = math.acos(cos_w) / (2 * math.pi)
+        sin_d, eot = _sun_position(n, noon_frac + sign * w)
+        cos_event = _cos_hour_angle(latitude, sin_d)
+        if -1 < cos_event < 1:
+            w = math.acos(cos_event) / (2 * math.pi)
+        frac = mean_noon - eot + sign * w
+        result.append(day * SECONDS_PER_DAY + SECONDS_PER_DAY // 2 + int(round(frac * SECONDS_PER_DAY)))
+    return (result[0], result[1])
+
+
+# Builds a table of (sunrise, sunset) for a number of days, starting with the
+# local date at utc_s.
+def sun_table(latitude, longitude, utc_s, utc_offset_sec, days):
+    first_day = (utc_s + utc_offset_sec) // SECONDS_PER_DAY
+    return [sun_times(latitude, longitude, first_day + i) for i in range(days)]
+
+
+# Finds the sunrise and sunset to use at utc_s: today's, or the next day's after sunset.
+# Returns None if the table has run out.
+def current_sun_times(table, utc_s):
+    for entry in table:
+        if utc_s < entry[1]:
+            return entry
+
+    return None
@@ -0,0 +1,66 @@
+import struct
+import displayio
+from fontio import Glyph
+
+# Binary subset fonts made by tools/font2bin.py.
+#
+# Header: magic, glyph count, ascent, descent, bounding box (w, h, x, y).
+# Index:  one fixed size entry per glyph, sorted by character code:
+#         code, width, height, dx, dy, shift_x, offset into the bitmap data.
+# Bitmap data: each glyph's rows, MSB first, ceil(width / 8) bytes per row.
+MAGIC = b"MZF1"
+HEADER_FORMAT = "<4sHbbbbbb"
+INDEX_FORMAT = "<HBBbbbxH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+INDEX_SIZE = struct.calcsize(INDEX_FORMAT)
+
+
+# A font read from a binary subset file. Works anywhere a bitmap_font font does.
+class BinaryFont():
+    def __init__(self, path):
+        self.path = path
+        self._glyphs = {}
+
+        with open(path, "rb") as f:
+            header = bytearray(HEADER_SIZE)
+            f.readinto(header)
+            magic, count, self.ascent, self.descent, bb_w, bb_h, bb_x, bb_y = struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC:
+                raise ValueError("{} is not a binary font".format(path))
+            self._bounding_box = (bb_w, bb_h, bb_x, bb_y)
+
+            index = bytearray(count * INDEX_SIZE)
+            f.readinto(index)
+
+            # Everything after the index is bitmap data.
+            data_start = HEADER_SIZE + len(index)
+            data = bytearray(f.seek(0, 2) - data_start)
+            f.seek(data_start)
+            f.readinto(data)
+
+        for idx in range(count):
+            code, width, height, dx, dy, shift_x, offset = struct.unpack_from(INDEX_FORMAT, index, idx * INDEX_SIZE)
+            bitmap = displayio.Bitmap(max(1, width), max(1, height), 2)
+            stride = (width + 7) // 8
+            for y in range(height):
+                row = offset + y * stride
+                for x in range(width):
+                    if data[row + x // 8] & (0x80 >> (x % 8)):
+                        bitmap[x, y] = 1
+            self._glyphs[code] = Glyph(bitmap, 0, width, height, dx, dy, shift_x, 0)
+
+    def get_bounding_box(self):
+        return self._bounding_box
+
+    def get_glyph(self, code):
+        if code in self._glyphs:
+            return self._glyphs[code]
+        return None
+
+    # Everything is loaded up front. Here for bitmap_font compatibility.
+    def load_glyphs(self, code_points):
+        pass
+
+
+def load_font(path):
+    return BinaryFont(path)
@@ -0,0 +1,165 @@
+import os
+import struct
+import time
+from util_catalog import fit_text
+
+# Bump this when the record layout changes. Old files are ignored.
+CACHE_VERSION = 1
+CACHE_MAGIC = b"MZC"
+
+# Header: magic, version, record count.
+HEADER_FORMAT = "<3sBH"
+# Record: tz_abbr, tz_name, latitude, longitude, utc_offset_sec,
+#         dst_start, dst_end, sunrise, sunset, next_check.
+RECORD_FORMAT = "<8s32sffiiiiii"
+TZ_ABBR_SIZE = 8
+TZ_NAME_SIZE = 32
+
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# Locations match if their coordinates are this close. The file stores 32 bit floats.
+COORD_TOLERANCE = 0.0001
+
+
+def _text(value):
+    return value.rstrip(b"\x00").decode("utf-8")
+
+
+# Saves the state of each ZoneInfo to flash so a reset doesn't start from nothing.
+#
+# The filesystem is only writable by code when boot.py remounts it, so a
+# read-only filesystem just turns saving off.
+class ZoneCache():
+    def __init__(self, path, min_write_interval_s):
+        self.path = path
+        self.min_write_interval_s = min_write_interval_s
+        self.enabled = True
+        # Records read at startup, used to restore zones as they are loaded.
+        self.records = []
+        self._last_data = None
+        self._last_write = None
+        self.writes = 0
+
+    # Reads the cache file. Returns the number of records found.
+    def load(self):
+        self.records = []
+        data = None
+        # The temporary file is only left behind if we reset while swapping files.
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                break
+            except OSError:
+                pass
+
+        if data is None:
+            # No cache yet.
+            return 0
+
+        if len(data) < HEADER_SIZE:
+            return 0
+
+        magic, version, count = struct.unpack_from(HEADER_FORMAT, data, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            print("ignoring cache {} version {}".format(self.path, version))
+            return 0
+        if len(data) < HEADER_SIZE + count * RECORD_SIZE:
+            print("ignoring truncated cache {}".format(self.path))
+            return 0
+
+        for idx in range(count):
+            self.records.append(struct.unpack_from(RECORD_FORMAT, data, HEADER_SIZE + idx * RECORD_SIZE))
+
+        # Loading doesn't count as a change.
+        self._last_data = data
+        return count
+
+    # The location of each record, as config dicts like the ones in locations.py.
+    def locations(self):
+        result = []
+        for record in self.records:
+            loc = {
+                "tz_abbr": _text(record[0]),
+                "latitude": record[2],
+                "longitude": record[3],
+            }
+            if record[1][0]:
+                loc["tz_name"] = _text(record[1])
+            result.append(loc)
+
+        return result
+
+    # Copies cached state into a zone if there is a record for the same location.
+    # Returns True if the zone was restored.
+    def restore(self, zone):
+        for record in self.records:
+            # The record has tz_abbr cut to fit, so compare it cut the same way.
+            if (record[0].rstrip(b"\x00") == fit_text(zone.tz_abbr, TZ_ABBR_SIZE)
+                    and abs(record[2] - zone.latitude) < COORD_TOLERANCE
+                    and abs(record[3] - zone.longitude) < COORD_TOLERANCE):
+                self._copy_record(record, zone)
+                return True
+
+        return False
+
+    def _copy_record(self, record, zone):
+        tz_name = _text(record[1])
+        if tz_name and not zone.tz_name:
+            zone.tz_name = tz_name
+        zone.utc_offset_sec = record[4]
+        zone.dst_start = record[5]
+        zone.dst_end = record[6]
+        zone.sunrise = record[7]
+        zone.sunset = record[8]
+        zone.next_check = record[9]
+
+    # Writes the zones to flash if they changed and the last write wasn't too recent.
+    # Call as often as you like.
+    def save(self, zones):
+        if not self.enabled:
+            return False
+
+        data = bytearray(HEADER_SIZE + len(zones) * RECORD_SIZE)
+        struct.pack_into(HEADER_FORMAT, data, 0, CACHE_MAGIC, CACHE_VERSION, len(zones))
+        for idx in range(len(zones)):
+            zone = zones[idx]
+            tz_name = zone.tz_name.encode("utf-8")
+            if len(tz_name) > TZ_NAME_SIZE:
+                # Part of a name is no use. It's looked up again instead.
+                tz_name = b""
+            struct.pack_into(RECORD_FORMAT, data, HEADER_SIZE + idx * RECORD_SIZE,
+                fit_text(zone.tz_abbr, TZ_ABBR_SIZE), tz_name,
+                zone.latitude, zone.longitude, int(zone.utc_offset_sec),
+                zone.dst_start, zone.dst_end, zone.sunrise, zone.sunset, zone.next_check)
+
+        if data == self._last_data:
+            # Nothing changed.
+            return False
+
+        now = time.monotonic()
+        if (self._last_write is not None) and (now - self._last_write < self.min_write_interval_s):
+            # Limit flash wear. We'll get it on a later call.
+            return False
+
+        # Write a new file and swap it in so a reset mid-write can't leave a broken cache.
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            os.rename(temp_path, self.path)
+        except OSError as e:
+            # Usually a read-only filesystem.
+            print("zone cache disabled: {}".format(e))
+            self.enabled = False
+            return False
+
+        self._last_data = data
+        self._last_write = now
+        self.writes += 1
+        return True
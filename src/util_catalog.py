@@ -0,0 +1,340 @@
+import os
+import struct
+
+# Bump this when the record layout changes. Old files are ignored.
+CATALOG_VERSION = 2
+CATALOG_MAGIC = b"MZL"
+
+# Header: magic, version, record count.
+HEADER_FORMAT = "<3sBH"
+# Record: tz_abbr, tz_name, description, latitude, longitude, utc_offset (hours,
+# -999 if not set).
+RECORD_FORMAT = "<8s32s24sfff"
+TZ_ABBR_SIZE = 8
+TZ_NAME_SIZE = 32
+DESCRIPTION_SIZE = 24
+
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+
+def _text(value):
+    return value.rstrip(b"\x00").decode("utf-8")
+
+
+# text as UTF-8, cut to fit size bytes without splitting a character.
+def fit_text(text, size):
+    data = text.encode("utf-8")
+    if len(data) <= size:
+        return data
+    end = size
+    while end > 0 and (data[end] & 0xC0) == 0x80:
+        end -= 1
+    return data[:end]
+
+
+# Every configured location, as fixed-width records in a file on flash, so
+# there can be far more than fit in memory as dicts. Record n is at a fixed
+# offset from the header, so location(n) is one seek and read.
+#
+# A new list of locations is checked against the current one as it's read,
+# and only if it differs is it written to a temporary file and swapped in. If the filesystem is read-only,
+# the records are kept in a bytearray instead, which is still far smaller
+# than the dicts.
+#
+# A location only known after later ones can be held a place with hold() and
+# filled in with put(). It's checked against the current list then, so a held
+# place doesn't make an unchanged list look different.
+#
+#     catalog.begin()
+#     for loc in locations:
+#         catalog.add(loc)
+#     catalog.finish()
+#     catalog.location(12)["tz_abbr"]
+class Catalog():
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        # Open for reading while the catalog is on flash.
+        self._file = None
+        # The records, while the catalog is in memory.
+        self._ram = None
+        self._record = bytearray(RECORD_SIZE)
+        self._out = bytearray(RECORD_SIZE)
+        # tz_names learned for locations that didn't have one, by index.
+        self._learned = {}
+        # The list being written by begin() and add(): a file or a bytearray,
+        # or None while it matches the current one.
+        self._new = None
+        self._new_count = 0
+
+    def __len__(self):
+        return self.count
+
+    # Opens the catalog file. Returns the number of locations in it.
+    def load(self):
+        self._close()
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return 0
+
+        header = f.read(HEADER_SIZE)
+        if len(header) == HEADER_SIZE:
+            magic, version, count = struct.unpack(HEADER_FORMAT, header)
+            if magic == CATALOG_MAGIC and version == CATALOG_VERSION:
+                f.seek(0, 2)
+                if f.tell() >= HEADER_SIZE + count * RECORD_SIZE:
+                    self._file = f
+                    self.count = count
+                    return count
+            print("ignoring catalog {}".format(self.path))
+        f.close()
+        return 0
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._ram = None
+        self.count = 0
+        self._learned = {}
+
+    # The location at idx, as a config dict like the ones in locations.py.
+    def location(self, idx):
+        if idx < 0 or idx >= self.count:
+            raise IndexError("no location {}".format(idx))
+        record = struct.unpack(RECORD_FORMAT, self._read(idx))
+
+        result = {
+            "tz_abbr": _text(record[0]),
+            "description": _text(record[2]),
+            "latitude": record[3],
+            "longitude": record[4],
+        }
+        tz_name = _text(record[1]) or self._learned.get(idx)
+        if tz_name:
+            result["tz_name"] = tz_name
+        if record[5] != -999:
+            result["utc_offset"] = record[5]
+        return result
+
+    # Remembers a tz_name found for a location without one, until the list changes.
+    def learn(self, idx, tz_name):
+        if 0 <= idx < self.count:
+            self._learned[idx] = tz_name
+
+    # Starts writing a new list of locations.
+    def begin(self):
+        # In case the last list was left part way.
+        self.abort()
+
+    # Drops the list being written, and its temporary file, leaving the
+    # catalog as it was.
+    def abort(self):
+        new = self._new
+        self._new = None
+        self._new_count = 0
+        if new is not None and not isinstance(new, bytearray):
+            new.close()
+            try:
+                os.remove(self.path + ".tmp")
+            except OSError:
+                pass
+
+    # Adds a location to the list being written.
+    def add(self, loc):
+        self._write(self._new_count, loc)
+        self._new_count += 1
+
+    # Holds the next place in the list being written for a location that's
+    # only known after later ones. Fill it in with put().
+    def hold(self):
+        if self._new is None and self._new_count >= self.count:
+            self._diverge()
+        if self._new is not None:
+            self._place(self._new_count, bytes(RECORD_SIZE))
+        self._new_count += 1
+
+    # Replaces location idx in the list being written, for one that was only
+    # known after later ones.
+    def put(self, idx, loc):
+        self._write(idx, loc)
+
+    def _read(self, idx):
+        if self._ram is not None:
+            return self._ram[idx * RECORD_SIZE:(idx + 1) * RECORD_SIZE]
+        self._file.seek(HEADER_SIZE + idx * RECORD_SIZE)
+        self._file.readinto(self._record)
+        return self._record
+
+    # Records are only written once one differs from the current list, so
+    # reading an unchanged list again costs no flash writes.
+    def _write(self, idx, loc):
+        record = self._out
+        struct.pack_into(RECORD_FORMAT, record, 0,
+            fit_text(loc["tz_abbr"], TZ_ABBR_SIZE), fit_text(loc.get("tz_name", ""), TZ_NAME_SIZE),
+            fit_text(loc.get("description", loc.get("descr", "")), DESCRIPTION_SIZE),
+            loc["latitude"], loc["longitude"], loc.get("utc_offset", -999))
+        if self._new is None:
+            if idx < self.count and self._read(idx) == record:
+                return
+            self._diverge()
+        self._place(idx, record)
+
+    def _place(self, idx, record):
+        if isinstance(self._new, bytearray):
+            if idx * RECORD_SIZE < len(self._new):
+                self._new[idx * RECORD_SIZE:(idx + 1) * RECORD_SIZE] = record
+            else:
+                self._new.extend(record)
+        else:
+            self._new.seek(HEADER_SIZE + idx * RECORD_SIZE)
+            self._new.write(record)
+
+    # Starts the new list with the locations read so far, which match the
+    # current list.
+    def _diverge(self):
+        try:
+            new = open(self.path + ".tmp", "wb")
+            new.write(bytes(HEADER_SIZE))
+        except OSError:
+            # Read-only filesystem. Keep the new list in memory.
+            new = bytearray()
+        for idx in range(self._new_count):
+            if isinstance(new, bytearray):
+                new.extend(self._read(idx))
+            else:
+                new.write(self._read(idx))
+        self._new = new
+
+    # Makes the list written since begin() the catalog. Returns True if it
+    # differs from the last one.
+    def finish(self):
+        count = self._new_count
+        if self._new is None:
+            if count == self.count:
+                return False
+            # The same list, cut short.
+            self._diverge()
+        new = self._new
+        self._new = None
+
+        if isinstance(new, bytearray):
+            self._close()
+            self._ram = new
+            self.count = count
+            return True
+
+        temp_path = self.path + ".tmp"
+        try:
+            new.seek(0)
+            new.write(struct.pack(HEADER_FORMAT, CATALOG_MAGIC, CATALOG_VERSION, count))
+            new.close()
+            self._close()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            os.rename(temp_path, self.path)
+        except OSError as e:
+            # Keep the old list rather than half a new one.
+            print("catalog not saved: {}".format(e))
+            return False
+
+        self.load()
+        return True
+
+
+# The zones in memory: the fixed ones, and a window of the rotating ones
+# starting at the one on show. Anything else is read from the catalog when
+# asked for, and dropped again at the next focus().
+#
+# make_zone(config, idx) builds a zone for a catalog location.
+class ZoneWindow():
+    def __init__(self, catalog, make_zone, fixed, window):
+        self.catalog = catalog
+        self.make_zone = make_zone
+        # Zones 0 to fixed - 1 are always shown.
+        self.fixed = fixed
+        # Rotating zones kept, counting the one on show.
+        self.window = window
+        self._zones = {}
+        self._start = -1
+
+    def __len__(self):
+        return len(self.catalog)
+
+    def __getitem__(self, idx):
+        zone = self._zones.get(idx)
+        if zone is None:
+            zone = self.make_zone(self.catalog.location(idx), idx)
+            self._zones[idx] = zone
+        return zone
+
+    def is_resident(self, idx):
+        return idx in self._zones
+
+    # The zones in memory, in catalog order.
+    def resident(self):
+        return [self._zones[idx] for idx in sorted(self._zones)]
+
+    # The zone shown after idx on the rotating line. After the last one it
+    # goes back to the last fixed zone.
+    def next_index(self, idx):
+        idx += 1
+        if idx >= len(self):
+            idx = min(self.fixed, len(self)) - 1
+        return idx
+
+    # Keeps the fixed zones and the window from start, and drops the rest.
+    # Returns the number of zones read in.
+    def focus(self, start):
+        self._start = start
+        count = len(self)
+        wanted = list(range(min(self.fixed, count)))
+        idx = start
+        for n in range(self.window):
+            if idx < 0 or idx >= count:
+                break
+            if idx not in wanted:
+                wanted.append(idx)
+            idx = self.next_index(idx)
+
+        for idx in list(self._zones):
+            if idx not in wanted:
+                del self._zones[idx]
+        added = 0
+        for idx in wanted:
+            if idx not in self._zones:
+                self[idx]
+                added += 1
+        return added
+
+    # Call after the catalog changes, then focus(). Keeps zones whose
+    # location is still in the catalog, going by matches(zone, config), and
+    # moves each to its new index, so adding or removing a location doesn't
+    # lose the state of the ones after it. Zones have an index attribute.
+    def reload(self, matches):
+        old = self._zones
+        self._zones = {}
+        # Zones whose location isn't at the same index any more.
+        moved = []
+        for idx in old:
+            if idx < len(self) and matches(old[idx], self.catalog.location(idx)):
+                self._zones[idx] = old[idx]
+            else:
+                moved.append(old[idx])
+
+        # One pass over the catalog for the rest, stopping once they're all found.
+        idx = 0
+        while moved and idx < len(self):
+            if idx not in self._zones:
+                config = self.catalog.location(idx)
+                for zone in moved:
+                    if matches(zone, config):
+                        zone.index = idx
+                        self._zones[idx] = zone
+                        moved.remove(zone)
+                        break
+            idx += 1
@@ -0,0 +1,117 @@
+import time
+
+# Syncs kept for the frequency estimate.
+HISTORY = 8
+# Slowest a prediction error is slewed out, in seconds per second (500 ppm,
+# like NTP), so the seconds don't jump at a sync.
+SLEW_RATE = 0.0005
+# Longest a slew runs. Bigger errors are slewed out faster than SLEW_RATE.
+MAX_SLEW_S = 10 * 60
+# Prediction errors bigger than this are stepped instead of slewed.
+STEP_S = 2
+# Prediction errors bigger than this mean the RTC was reset or the history is
+# wrong. It's dropped and the estimate starts again.
+RESET_S = 60
+# Syncs whose request took longer than this say too little about the RTC.
+MAX_LAG_S = 5
+
+
+# Learns how fast the RTC runs from the network syncs, and corrects for it in
+# between so the syncs can be further apart.
+#
+# Each sync gives the drift: how far the RTC had fallen behind network time
+# since the last one. The estimated rate is the drift over the last few
+# intervals divided by their length, and the correction grows at that rate
+# from the last sync. The RTC itself is only set by the sync; the correction is
+# added when it's read (see util_time.TimeService).
+#
+# When a correction predicted the drift to within tolerance_s, the next sync
+# interval doubles, up to max_interval_s. When it was off by more than twice
+# that, the interval halves, down to min_interval_s.
+#
+# The display is stepped to the synced time when the error is within
+# tolerance_s, which with a whole second RTC is mostly rounding, and when it's
+# more than STEP_S. Only the errors in between are slewed out, over
+# MAX_SLEW_S at most.
+class ClockDiscipline():
+    def __init__(self, min_interval_s, max_interval_s, tolerance_s):
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max(min_interval_s, max_interval_s)
+        self.tolerance_s = tolerance_s
+        self.interval_s = min_interval_s
+        # [interval_s, drift_s, lag_s] for recent syncs.
+        self.samples = []
+        # Seconds of correction per RTC second.
+        self.rate = 0.0
+        # RTC time of the last sync, or None before the first.
+        self.last_sync = None
+        # Left over prediction error from the last sync, being slewed out,
+        # and how fast, in seconds per second.
+        self.slew_s = 0.0
+        self.slew_rate = SLEW_RATE
+        # Prediction error at the last sync.
+        self.error_s = 0.0
+
+    # The RTC's frequency error in parts per million. Positive if it runs fast.
+    @property
+    def ppm(self):
+        return -self.rate * 1000000
+
+    # Seconds to add to the RTC reading utc_s.
+    def correction(self, utc_s):
+        if self.last_sync is None:
+            return 0
+        elapsed = utc_s - self.last_sync
+        result = self.rate * elapsed
+        if self.slew_s:
+            left = abs(self.slew_s) - self.slew_rate * elapsed
+            if left > 0:
+                result += left if self.slew_s > 0 else -left
+        return round(result)
+
+    # Call just after the RTC was set. utc_s is its time then, drift and lag
+    # as worked out around the sync. Returns the seconds until the next one.
+    def sync(self, utc_s, drift, lag):
+        if self.last_sync is None:
+            # The RTC was never set, so there's nothing to learn yet.
+            self.last_sync = utc_s
+            return self.interval_s
+
+        interval = utc_s - self.last_sync
+        # What the display was off by just before the sync.
+        error = drift - self.correction(utc_s - drift)
+        self.last_sync = utc_s
+        self.error_s = error
+
+        if abs(error) > RESET_S or interval <= 0:
+            self.samples = []
+            self.rate = 0.0
+            self.slew_s = 0.0
+            self.interval_s = self.min_interval_s
+            return self.interval_s
+
+        # Take out what the display was off by gradually, unless it's rounding
+        # or a lot.
+        if self.tolerance_s < abs(error) <= STEP_S:
+            self.slew_s = -error
+            self.slew_rate = max(SLEW_RATE, abs(error) / MAX_SLEW_S)
+        else:
+            self.slew_s = 0.0
+
+        if lag <= MAX_LAG_S:
+            self.samples.append([interval, drift, lag])
+            if len(self.samples) > HISTORY:
+                self.samples.pop(0)
+            total_interval = 0
+            total_drift = 0
+            for sample in self.samples:
+                total_interval += sample[0]
+                total_drift += sample[1]
+            self.rate = total_drift / total_interval
+
+            if abs(error) <= self.tolerance_s:
+                self.interval_s = min(self.max_interval_s, self.interval_s * 2)
+            elif abs(error) > 2 * self.tolerance_s:
+                self.interval_s = max(self.min_interval_s, self.interval_s // 2)
+
+        return self.interval_s
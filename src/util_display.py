@@ -0,0 +1,141 @@
+# Marker for "never written", since None is a valid value.
+_UNSET = object()
+# Properties that hold a color, and are dimmed with the panel.
+COLOR_ATTRS = ("color", "fill")
+
+
+# Drops display writes that wouldn't change anything.
+#
+# Every property write on a displayio object marks part of the screen dirty,
+# even when the value is the same. Writes made through here are compared with
+# the last value written and skipped if they match. With auto refresh off,
+# the real changes are pushed to the panel by one refresh() per frame.
+#
+# Everything that writes a property through here must always do so, or the
+# remembered values will be wrong.
+#
+# The remembered values are kept in a dict per object, keyed by the object,
+# and in it by the property name or index. After the first write to each
+# there's nothing to allocate, so the frames don't make garbage.
+#
+# Colors are scaled by level on the way to the display, which is how the
+# panel is dimmed: the matrix itself is either on or off. The remembered
+# values are the undimmed ones, so a new level can be applied to everything.
+class ShadowWriter():
+    def __init__(self):
+        self.display = None
+        # {obj: {attr or index: value}}
+        self._shadow = {}
+        self._dirty = False
+        # Brightness, from 0 (dark) to 1.
+        self.level = 1
+        # Objects with a color written through here, and whether they're
+        # palettes, whose items are all colors.
+        self._colored = {}
+        # Writes asked for, and writes that actually changed something.
+        self.requested = 0
+        self.applied = 0
+        self.refreshes = 0
+
+    # Takes over refreshing the display, so changes are pushed once per frame.
+    def attach(self, display, batch_refresh):
+        self.display = display
+        if batch_refresh:
+            display.auto_refresh = False
+
+    # The remembered values for obj.
+    def _values(self, obj):
+        values = self._shadow.get(obj)
+        if values is None:
+            values = {}
+            self._shadow[obj] = values
+        return values
+
+    # Sets obj.attr = value if it isn't already. Returns True if it was written.
+    def set(self, obj, attr, value):
+        self.requested += 1
+        values = self._values(obj)
+        if values.get(attr, _UNSET) == value:
+            return False
+
+        values[attr] = value
+        if attr in COLOR_ATTRS:
+            self._colored[obj] = False
+            value = self._dim(value)
+        setattr(obj, attr, value)
+        self.applied += 1
+        self._dirty = True
+        return True
+
+    # Sets a palette color if it isn't already, dimmed like the color properties.
+    def set_color_item(self, palette, index, color):
+        self.requested += 1
+        values = self._values(palette)
+        if values.get(index, _UNSET) == color:
+            return False
+
+        values[index] = color
+        self._colored[palette] = True
+        palette[index] = self._dim(color)
+        self.applied += 1
+        self._dirty = True
+        return True
+
+    def _dim(self, color):
+        if self.level >= 1 or color is None:
+            return color
+        level = self.level
+        return ((int(((color >> 16) & 0xFF) * level) << 16)
+            | (int(((color >> 8) & 0xFF) * level) << 8)
+            | int((color & 0xFF) * level))
+
+    # Changes the brightness of everything with a color written through here.
+    # Returns True if it changed.
+    def set_level(self, level):
+        if level == self.level:
+            return False
+
+        self.level = level
+        for obj in self._colored:
+            palette = self._colored[obj]
+            values = self._shadow[obj]
+            for key in values:
+                if palette:
+                    obj[key] = self._dim(values[key])
+                elif key in COLOR_ATTRS:
+                    setattr(obj, key, self._dim(values[key]))
+        self._dirty = True
+        return True
+
+    # Sets obj[index] = value if it isn't already, for TileGrid cells and palettes.
+    def set_item(self, obj, index, value):
+        self.requested += 1
+        values = self._values(obj)
+        if values.get(index, _UNSET) == value:
+            return False
+
+        values[index] = value
+        obj[index] = value
+        self.applied += 1
+        self._dirty = True
+        return True
+
+    # Pushes any changes to the panel. Does nothing if auto refresh is on.
+    def refresh(self):
+        if self._dirty and self.display and not self.display.auto_refresh:
+            self.display.refresh()
+            self.refreshes += 1
+        self._dirty = False
+
+    # Writes requested vs applied since the last call, then starts counting again.
+    def stats(self):
+        result = "{applied}/{requested} writes applied, {refreshes} refreshes".format(
+            applied=self.applied, requested=self.requested, refreshes=self.refreshes)
+        self.requested = 0
+        self.applied = 0
+        self.refreshes = 0
+        return result
+
+
+# Shared by the clock lines and code.py.
+writer = ShadowWriter()
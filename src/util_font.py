@@ -0,0 +1,135 @@
+import gc
+import time
+from adafruit_bitmap_font import bitmap_font
+import util_binfont
+
+# Clock layout measurements, keyed by font. Lines that share a font share these.
+_metrics = {}
+
+
+# Measurements a clock line needs from its font.
+class ClockMetrics():
+    def __init__(self, hours_width, separator_width, minutes_width, height):
+        # Widest "00" to "23".
+        self.hours_width = hours_width
+        # Width of ":".
+        self.separator_width = separator_width
+        # Widest "00" to "59".
+        self.minutes_width = minutes_width
+        # Height of the digits.
+        self.height = height
+
+
+# Width of text the way a Label's bounding box measures it, from the glyph
+# advance widths instead of laying out a Label.
+def text_width(font, text):
+    x = 0
+    left = 0
+    right = 0
+    for c in text:
+        glyph = font.get_glyph(ord(c))
+        if not glyph:
+            continue
+        if x == 0:
+            left = min(left, glyph.dx)
+        right = max(right, x + glyph.shift_x, x + glyph.dx + glyph.width)
+        x += glyph.shift_x
+
+    return right - left
+
+
+# Columns from the left of each glyph to just past its last lit pixel, keyed
+# by (font, code point). Glyph boxes can be wider than what they draw: every
+# terminalio glyph is a 6 pixel cell with a blank column on the right.
+_ink = {}
+
+
+def _ink_right(font, c, glyph):
+    key = (id(font), c)
+    right = _ink.get(key)
+    if right is None:
+        right = 0
+        bitmap = glyph.bitmap
+        # Glyphs can be tiles of one bitmap, a row of tiles at a time.
+        per_row = max(1, bitmap.width // max(1, glyph.width))
+        left = (glyph.tile_index % per_row) * glyph.width
+        top = (glyph.tile_index // per_row) * glyph.height
+        for x in range(glyph.width - 1, -1, -1):
+            for y in range(glyph.height):
+                if bitmap[left + x, top + y]:
+                    right = x + 1
+                    break
+            if right:
+                break
+        _ink[key] = right
+    return right
+
+
+# Width of the pixels text draws, from where a Label starts it. Unlike
+# text_width() the space after the last lit pixel doesn't count, so this is
+# what has to fit between a label and whatever is beside it.
+def ink_width(font, text):
+    x = 0
+    left = 0
+    right = 0
+    for c in text:
+        glyph = font.get_glyph(ord(c))
+        if not glyph:
+            continue
+        if x == 0:
+            left = min(left, glyph.dx)
+        if glyph.width and glyph.height:
+            right = max(right, x + glyph.dx + _ink_right(font, c, glyph))
+        x += glyph.shift_x
+
+    return right - left
+
+
+# Gets the clock measurements for a font, working them out the first time.
+def clock_metrics(font):
+    key = id(font)
+    if key in _metrics:
+        return _metrics[key]
+
+    # Most fonts have the same width for every digit, but don't count on it.
+    max_hr_width = 0
+    max_w = 0
+    for i in range(0, 60):
+        max_w = max(max_w, text_width(font, "{value:02d}".format(value=i)))
+
+        if i == 23:
+            max_hr_width = max_w
+
+    # Tight height of the digits, like Label's bounding box.
+    top = None
+    bottom = None
+    for d in "0123456789":
+        glyph = font.get_glyph(ord(d))
+        if glyph:
+            top = glyph.height + glyph.dy if top is None else max(top, glyph.height + glyph.dy)
+            bottom = glyph.dy if bottom is None else min(bottom, glyph.dy)
+
+    metrics = ClockMetrics(max_hr_width, text_width(font, ":"), max_w, top - bottom)
+    _metrics[key] = metrics
+    print("font metrics: {}, {}, {}, {}".format(max_hr_width, metrics.separator_width, max_w, metrics.height))
+    return metrics
+
+
+# Loads a BDF font, or a binary subset font made by tools/font2bin.py, and
+# prints how long it took and how much memory it used.
+# preload: characters to load now. BDF glyphs otherwise load on first use.
+def load_font(path, preload="0123456789: "):
+    gc.collect()
+    mem_start = gc.mem_free()
+    start_time = time.monotonic()
+
+    if path.endswith(".bin"):
+        font = util_binfont.load_font(path)
+    else:
+        font = bitmap_font.load_font(path)
+        if preload:
+            font.load_glyphs(preload)
+
+    gc.collect()
+    print("font {path}: {sec} s, {mem} bytes".format(path=path, sec=time.monotonic() - start_time, mem=mem_start - gc.mem_free()))
+    return font
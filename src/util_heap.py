@@ -0,0 +1,137 @@
+import gc
+import time
+
+# Phases code.py samples when profiling is on.
+PHASES = ("update_time", "SetTime", "update_time_zone", "get_config", "util.log")
+
+# Granularity of the largest free block probe, in bytes.
+PROBE_STEP = 256
+
+
+# Heap bytes allocated inside one piece of work.
+#
+# Counts are inclusive: update_time includes the SetTime it calls. If the
+# garbage collector runs during a phase, the allocations can't be told from
+# what was freed, so the call is only counted as interrupted.
+class Phase():
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.alloc = 0
+        self.max_alloc = 0
+        self.interrupted = 0
+        self._start = 0
+
+    def __enter__(self):
+        self._start = gc.mem_alloc()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        used = gc.mem_alloc() - self._start
+        self.calls += 1
+        if used < 0:
+            self.interrupted += 1
+        else:
+            self.alloc += used
+            if used > self.max_alloc:
+                self.max_alloc = used
+        return False
+
+
+# Stands in for every phase when profiling is off.
+class _NoPhase():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_no_phase = _NoPhase()
+_phases = {}
+enabled = False
+
+# Lowest free memory seen at an idle point, and the smallest largest free block.
+min_free = None
+min_largest = None
+# Collections made at idle points, and the longest one in ms.
+idle_collects = 0
+max_collect_ms = 0
+
+
+# Turns profiling on.
+def enable():
+    global enabled
+    enabled = True
+    for name in PHASES:
+        _phases[name] = Phase(name)
+
+
+# What to put in a with statement around a phase of the main loop.
+def phase(name):
+    if not enabled:
+        return _no_phase
+    result = _phases.get(name)
+    if result is None:
+        result = Phase(name)
+        _phases[name] = result
+    return result
+
+
+# Biggest single allocation that would succeed right now, to PROBE_STEP bytes.
+# Fragmentation shows up as this falling well below mem_free(). Allocates, so
+# only call it at idle points.
+def largest_free_block():
+    low = 0
+    high = gc.mem_free()
+    while high - low > PROBE_STEP:
+        size = (low + high) // 2
+        try:
+            block = bytearray(size)
+            del block
+            low = size
+        except MemoryError:
+            high = size
+    return low
+
+
+# Call between frames, when a pause won't be seen. Collects if less than
+# collect_below bytes are free, so the collector doesn't have to run in the
+# middle of a render. 0 leaves collecting to the allocator.
+def idle(collect_below):
+    global idle_collects, max_collect_ms, min_free
+
+    free = gc.mem_free()
+    if free < collect_below:
+        start = time.monotonic_ns()
+        gc.collect()
+        ms = (time.monotonic_ns() - start) // 1000000
+        idle_collects += 1
+        if ms > max_collect_ms:
+            max_collect_ms = ms
+        free = gc.mem_free()
+
+    if enabled and (min_free is None or free < min_free):
+        min_free = free
+
+
+# Prints the heap state and per-phase allocations to the serial console.
+def report():
+    global min_largest
+
+    # Measure what's really in use, and clear away the probe afterwards.
+    gc.collect()
+    largest = largest_free_block()
+    gc.collect()
+    if min_largest is None or largest < min_largest:
+        min_largest = largest
+
+    print("heap: {free} free (min {min_free}), {alloc} allocated, largest block {largest} (min {min_largest}), {collects} idle collects (max {ms} ms)".format(
+        free=gc.mem_free(), min_free=min_free, alloc=gc.mem_alloc(), largest=largest,
+        min_largest=min_largest, collects=idle_collects, ms=max_collect_ms))
+    for name in _phases:
+        p = _phases[name]
+        if p.calls:
+            print("  {name}: {calls} calls, {avg} B avg, {max} B max, {interrupted} interrupted by gc".format(
+                name=p.name, calls=p.calls, avg=p.alloc // max(1, p.calls - p.interrupted),
+                max=p.max_alloc, interrupted=p.interrupted))
@@ -0,0 +1,219 @@
+import json
+
+# Bytes read from a response at a time.
+CHUNK_SIZE = 64
+
+_QUOTE = 0x22       # "
+_BACKSLASH = 0x5C   # \
+_COLON = 0x3A       # :
+_COMMA = 0x2C       # ,
+_OPEN_OBJECT = 0x7B   # {
+_CLOSE_OBJECT = 0x7D  # }
+_OPEN_ARRAY = 0x5B    # [
+_CLOSE_ARRAY = 0x5D   # ]
+# Space and below. Outside strings that can only be whitespace.
+_SPACE = 0x20
+
+
+# Pulls a few fields out of a JSON document as it streams in, without keeping
+# the text or building the rest of the document.
+#
+# paths are dotted key paths like "dstInterval.dstStart". A "*" matches every
+# element of an array, so "locations.*" gives a list of the locations. Only the
+# values asked for are parsed, one at a time, with json.loads.
+#
+# With on_item(path, value), each element matched by a "*" path is passed to it
+# as soon as it's read instead of being kept, so a long list never has to fit
+# in memory at once.
+#
+#     fields = util_json.Extractor(("timeZone", "currentUtcOffset.seconds"))
+#     fields.read(response)
+#     fields.results["timeZone"]
+class Extractor():
+    def __init__(self, paths, on_item=None):
+        self._paths = []
+        self._on_item = on_item
+        self.results = {}
+        # Paths with a "*", whose results are lists.
+        self._lists = []
+        for path in paths:
+            parts = tuple(path.split("."))
+            self._paths.append((path, parts))
+            if "*" in parts:
+                self._lists.append(path)
+                self.results[path] = []
+        self._max_depth = max([len(parts) for path, parts in self._paths])
+        # Paths without a "*" still to be found. Reading stops when there are none.
+        self._wanted = len(self._paths) - len(self._lists)
+
+        # One [key or index, expecting a key] entry per open object or array.
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        # Key being read, or None if the string is a value.
+        self._key = None
+        # In a number, true, false or null.
+        self._in_scalar = False
+        # Value being kept: its path, the stack depth it started at, and its bytes.
+        self._capture_path = None
+        self._capture_depth = 0
+        self._capture = None
+        # Cheap hash of every byte fed, to tell whether a document changed.
+        self.checksum = 0
+
+    # True once every path without a "*" has been found and there are no lists to fill.
+    @property
+    def done(self):
+        return self._wanted == 0 and not self._lists
+
+    # Reads a response in small chunks until the fields are found or it ends.
+    def read(self, response):
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            self.feed(chunk)
+            if self.done:
+                break
+        return self.results
+
+    def feed(self, chunk):
+        checksum = self.checksum
+        for b in chunk:
+            # djb2, kept under 2**24 so it stays a small int on the board.
+            checksum = ((checksum << 5) + checksum + b) & 0xFFFFFF
+            self._byte(b)
+        self.checksum = checksum
+
+    def _byte(self, b):
+        capture = self._capture
+
+        if self._in_string:
+            if self._key is not None:
+                if capture is not None:
+                    capture.append(b)
+                if self._escape:
+                    self._escape = False
+                    self._key.append(b)
+                elif b == _BACKSLASH:
+                    self._escape = True
+                    self._key.append(b)
+                elif b == _QUOTE:
+                    self._stack[-1][0] = self._key.decode("utf-8")
+                    self._key = None
+                    self._in_string = False
+                else:
+                    self._key.append(b)
+                return
+
+            if capture is not None:
+                capture.append(b)
+            if self._escape:
+                self._escape = False
+            elif b == _BACKSLASH:
+                self._escape = True
+            elif b == _QUOTE:
+                self._in_string = False
+                self._end_value(len(self._stack))
+            return
+
+        if self._in_scalar:
+            if b <= _SPACE or b == _COMMA or b == _CLOSE_OBJECT or b == _CLOSE_ARRAY:
+                self._in_scalar = False
+                self._end_value(len(self._stack))
+                capture = self._capture
+            else:
+                if capture is not None:
+                    capture.append(b)
+                return
+
+        if b <= _SPACE:
+            return
+
+        stack = self._stack
+        if b == _QUOTE:
+            if stack and stack[-1][1]:
+                # A key.
+                if capture is not None:
+                    capture.append(b)
+                self._key = bytearray()
+                self._in_string = True
+                return
+            self._start_value(b)
+            self._in_string = True
+        elif b == _COLON:
+            if capture is not None:
+                capture.append(b)
+            stack[-1][1] = False
+        elif b == _COMMA:
+            if capture is not None:
+                capture.append(b)
+            top = stack[-1]
+            if top[1] is None:
+                # Next array element.
+                top[0] += 1
+            else:
+                top[1] = True
+        elif b == _OPEN_OBJECT:
+            self._start_value(b)
+            stack.append([None, True])
+        elif b == _OPEN_ARRAY:
+            self._start_value(b)
+            stack.append([0, None])
+        elif b == _CLOSE_OBJECT or b == _CLOSE_ARRAY:
+            stack.pop()
+            if capture is not None:
+                capture.append(b)
+            self._end_value(len(stack))
+        else:
+            self._start_value(b)
+            self._in_scalar = True
+
+    # A value starts at the current position. Keeps it if its path is wanted.
+    def _start_value(self, b):
+        if self._capture is not None:
+            self._capture.append(b)
+            return
+
+        stack = self._stack
+        if len(stack) > self._max_depth:
+            return
+        for path, parts in self._paths:
+            if len(parts) != len(stack):
+                continue
+            match = True
+            for idx in range(len(parts)):
+                part = parts[idx]
+                if part != "*" and part != stack[idx][0]:
+                    match = False
+                    break
+                if part == "*" and stack[idx][1] is not None:
+                    # "*" only matches array elements.
+                    match = False
+                    break
+            if match:
+                self._capture_path = path
+                self._capture_depth = len(stack)
+                self._capture = bytearray((b,))
+                return
+
+    # A value ended with the stack at depth. Parses it if it's the one being kept.
+    def _end_value(self, depth):
+        if self._capture is None or depth != self._capture_depth:
+            return
+
+        value = json.loads(self._capture.decode("utf-8"))
+        path = self._capture_path
+        self._capture = None
+        self._capture_path = None
+        if path in self._lists:
+            if self._on_item is not None:
+                self._on_item(path, value)
+            else:
+                self.results[path].append(value)
+        else:
+            if path not in self.results:
+                self._wanted -= 1
+            self.results[path] = value
+
+
+# Reads just the given paths from a response. Missing paths are left out.
+def extract(response, paths):
+    return Extractor(paths).read(response)
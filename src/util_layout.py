@@ -0,0 +1,109 @@
+# Pixels from the start of a column to the aux zones in it. The column
+# divider is the pixel before the column.
+COLUMN_GAP = 2
+# Pixels between the main zone and the aux zones, for the divider and the seconds bar.
+MAIN_GAP = 3
+# Top of the first line when each zone gets an equal share of the height.
+SPLIT_TOP = 8
+# Pixels the warning box moves per minute.
+WARN_STEP = 5
+
+
+# Where one clock line goes.
+class Slot():
+    def __init__(self, x, y, show_label, label_width):
+        self.x = x
+        self.y = y
+        # False if there's no room for the zone name next to the time.
+        self.show_label = show_label
+        # Pixels the zone name can use. Longer names scroll.
+        self.label_width = label_width
+
+
+# Where everything on the clock goes, worked out once at startup from the
+# display size and the font measurements, for any number of aux zones and any
+# size of display, including chained panels. Nothing is laid out per frame:
+# the seconds bar and the warning box look their positions up in tables.
+#
+# The main zone is at the top, then a divider, then the aux zones in a grid,
+# filled a row at a time. With one aux zone, the two zones split the display
+# instead and both use the clock font.
+#
+#     layout = util_layout.Layout(display.width, display.height, 10, 30, 9, 30, 18, 4)
+#     layout.slots[2].x
+#     layout.seconds_x[now[5]]
+class Layout():
+    # clock_height, clock_width: size of the main zone's time.
+    # aux_height, aux_width:     size of an aux zone's time.
+    # label_width:               room a zone name needs next to the time.
+    # aux_zones:                 zones to show below the main one.
+    # columns:                   columns of aux zones, or 0 to use as few as fit.
+    # y_offset:                  moves the lines when they split the display.
+    # warn_minutes:              minute of the hour the warning box comes on.
+    def __init__(self, width, height, clock_height, clock_width, aux_height, aux_width, label_width,
+            aux_zones, columns=0, y_offset=0, warn_minutes=55):
+        self.width = width
+        self.height = height
+        self.split = aux_zones == 1
+        # Where each clock line goes. slots[0] is the main zone.
+        self.slots = [Slot(0, 0, True, width - clock_width - 1)]
+        # (x, y, width, height) of each divider.
+        self.dividers = []
+
+        if self.split:
+            self.columns = 1
+            self.aux_height = clock_height
+            self.slots = [Slot(0, SPLIT_TOP + (height // 2 + 1) * idx + y_offset, True, width - clock_width - 1)
+                for idx in range(2)]
+        else:
+            self.aux_height = aux_height
+            top = clock_height + MAIN_GAP
+            rows = max(1, (height - top) // aux_height)
+            most_columns = max(1, width // (aux_width + COLUMN_GAP))
+            if not columns:
+                columns = min(most_columns, (aux_zones + rows - 1) // rows)
+            columns = max(1, columns)
+            if aux_zones > rows * columns:
+                print("only {} of {} aux zones fit".format(rows * columns, aux_zones))
+                aux_zones = rows * columns
+            self.columns = columns
+
+            column_width = width // columns
+            show_label = column_width - COLUMN_GAP >= aux_width + 1 + label_width
+            for idx in range(aux_zones):
+                row = idx // columns
+                column = idx % columns
+                x = column * column_width
+                if column:
+                    x += COLUMN_GAP
+                # Up to the next column's divider, or the edge of the display.
+                right = width if column == columns - 1 else (column + 1) * column_width - 1
+                self.slots.append(Slot(x, top + row * aux_height, columns == 1 or show_label,
+                    right - x - aux_width - 1))
+
+            for column in range(1, columns):
+                self.dividers.append((column * column_width - 1, clock_height + 2, 1, height - clock_height - 2))
+
+        # Under the main zone.
+        self.line_y = clock_height + 2
+        self.dividers.insert(0, (0, self.line_y, width, 1))
+
+        # The seconds bar moves across under the divider once a minute.
+        self.seconds_width = round(width / 12)
+        self.seconds_y = self.line_y + 1
+        seconds_incr = (width - width / 12) / 60
+        self.seconds_x = [round(second * seconds_incr) for second in range(60)]
+
+        # The warning box moves in from the right near the end of the hour,
+        # and sits just off the display the rest of the time.
+        self.warn_y = self.line_y - 1
+        self.warn_x = []
+        for minute in range(60):
+            if minute >= warn_minutes:
+                self.warn_x.append(width - (60 - minute) * WARN_STEP)
+            else:
+                self.warn_x.append(width)
+
+    # Number of aux zones that fit.
+    def aux_zones(self):
+        return len(self.slots) - 1
@@ -1,2 +1,158 @@
+import time
+import adafruit_requests as requests
 
 
+# Counters for one host since the last stats() call.
+class HostStats():
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        # New connections, each one a TLS handshake on the ESP32.
+        self.handshakes = 0
+        self.failures = 0
+        self.total_ms = 0
+        self.max_ms = 0
+
+
+# A kept-alive session for one host.
+class _Entry():
+    def __init__(self, session, now):
+        self.session = session
+        self.last_used = now
+        self.stats = HostStats()
+
+
+# Keeps one adafruit_requests session per host, so repeated calls to the same
+# API reuse the open socket instead of doing a new TLS handshake each time.
+#
+# Connections idle longer than idle_s are closed before the server does it for
+# us. A request on a kept-alive connection that fails is tried once more on a
+# new one. At most max_hosts hosts are kept, since the ESP32 only has a few
+# sockets and portalbase needs one for Adafruit IO.
+#
+# This reaches into adafruit_requests 1.x for the open sockets. If the
+# installed version doesn't have them, the pool is off and every request goes
+# through portalbase's own session, which is said once at startup.
+#
+# The caller must close() each response, so the socket can be reused.
+class SessionPool():
+    def __init__(self, network, idle_s=30, max_hosts=2):
+        self.network = network
+        self.idle_s = idle_s
+        self.max_hosts = max_hosts
+        self._entries = {}
+        self.enabled = self._check()
+
+    # True if adafruit_requests has the internals the pool uses.
+    def _check(self):
+        try:
+            session = self._new_session()
+        except AttributeError as e:
+            reason = e
+        else:
+            if hasattr(session, "_open_sockets") and hasattr(session, "_close_socket"):
+                return True
+            reason = "no _open_sockets or _close_socket"
+        print("connection pool off, adafruit_requests not as expected: {}".format(reason))
+        return False
+
+    # Makes a session on the same sockets and TLS context as portalbase's.
+    def _new_session(self):
+        base = self.network._wifi.requests
+        # Older portalbase keeps the adafruit_requests module here, whose
+        # default session set_socket() made.
+        base = getattr(base, "_default_session", base)
+        return requests.Session(base._socket_pool, base._ssl_context)
+
+    # Closes the connection a session has open, if any.
+    def _close(self, entry):
+        session = entry.session
+        sockets = session._open_sockets
+        if not sockets:
+            return
+        for key in list(sockets):
+            try:
+                session._close_socket(sockets[key])
+            except (OSError, RuntimeError, KeyError):
+                # Already gone. Forget it anyway.
+                sockets.pop(key, None)
+
+    # True if the session has a connection it will reuse.
+    def _connected(self, entry):
+        return bool(entry.session._open_sockets)
+
+    # Closes connections that have been idle too long.
+    def evict_idle(self):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        for host in self._entries:
+            entry = self._entries[host]
+            if now - entry.last_used > self.idle_s:
+                self._close(entry)
+
+    # Closes the least recently used connection if host would be one too many.
+    def _make_room(self, host):
+        connected = [h for h in self._entries if h != host and self._connected(self._entries[h])]
+        if len(connected) >= self.max_hosts:
+            oldest = min(connected, key=lambda h: self._entries[h].last_used)
+            self._close(self._entries[oldest])
+
+    def _entry(self, host):
+        entry = self._entries.get(host)
+        if entry is None:
+            entry = _Entry(self._new_session() if self.enabled else None, time.monotonic())
+            self._entries[host] = entry
+        return entry
+
+    # GET url on the host's kept-alive session. Returns the response.
+    def get(self, url, headers=None, timeout=10):
+        host = url.split("://", 1)[-1].split("/", 1)[0]
+        self.evict_idle()
+        entry = self._entry(host)
+        if self.enabled and not self._connected(entry):
+            self._make_room(host)
+
+        for attempt in range(2):
+            # With the pool off there's no telling, so each request counts as a handshake.
+            reused = self.enabled and self._connected(entry)
+            start = time.monotonic_ns()
+            try:
+                if self.enabled:
+                    response = entry.session.get(url, headers=headers, timeout=timeout)
+                else:
+                    response = self.network.fetch(url, headers=headers, timeout=timeout)
+            except (OSError, RuntimeError):
+                entry.stats.failures += 1
+                if self.enabled:
+                    self._close(entry)
+                if not reused or attempt:
+                    raise
+                # The server had already closed the kept-alive connection. Try once on a new one.
+                continue
+
+            ms = (time.monotonic_ns() - start) // 1000000
+            stats = entry.stats
+            stats.requests += 1
+            if not reused:
+                stats.handshakes += 1
+            stats.total_ms += ms
+            if ms > stats.max_ms:
+                stats.max_ms = ms
+            entry.last_used = time.monotonic()
+            return response
+
+    # Per-host counts since the last call, like "www.timeapi.io 12 req 1 hs 0 fail 850 avg 3300 max ms",
+    # separated by "; ". Then starts counting again.
+    def stats(self):
+        parts = []
+        for host in self._entries:
+            s = self._entries[host].stats
+            if s.requests or s.failures:
+                parts.append("{host} {requests} req {handshakes} hs {failures} fail {avg} avg {max} max ms".format(
+                    host=host, requests=s.requests, handshakes=s.handshakes, failures=s.failures,
+                    avg=s.total_ms // max(1, s.requests), max=s.max_ms))
+                s.reset()
+        return "; ".join(parts)
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+# How long before the predicted edge to start watching the RTC once locked.
+EARLY_NS = 20000000
+# Time between RTC reads while watching for the edge, in seconds.
+POLL_S = 0.005
+# Longest to watch for an edge before giving up, a second and a bit.
+WATCH_NS = 1100000000
+SECOND_NS = 1000000000
+
+
+# Finds when the RTC's seconds tick over, on the monotonic clock, so frames can
+# be drawn just after and show each new second as soon as it exists.
+#
+# The RTC only reads in whole seconds, so the edge is seen by reading it every
+# POLL_S until it changes. Once that's happened, later edges are a second
+# apart, and only EARLY_NS of watching is needed before each. If a wait finds
+# the second has already changed, the edge came earlier than predicted (the
+# RTC was set, say), so the watch starts twice as early next time until the
+# edge is seen again.
+#
+# Times are monotonic_ns, which keeps its precision however long the board
+# has been up.
+class SecondEdge():
+    def __init__(self, read=time.time):
+        self.read = read
+        # monotonic_ns of the last edge seen, or None.
+        self.edge_ns = None
+        # How long before the predicted edge to start watching.
+        self.window_ns = SECOND_NS
+        # True if the last wait() saw the edge.
+        self.locked = False
+        # RTC second at the last wait().
+        self.second = None
+
+    # monotonic() time to start the next wait(). May be in the past.
+    def next_wake(self):
+        if self.edge_ns is None:
+            return time.monotonic()
+        now_ns = time.monotonic_ns()
+        edges = (now_ns - self.edge_ns) // SECOND_NS + 1
+        return (self.edge_ns + edges * SECOND_NS - self.window_ns) / 1000000000
+
+    # Waits for the RTC second to change, if it hasn't since the last call.
+    async def wait(self):
+        start_ns = time.monotonic_ns()
+        second = self.read()
+        if second != self.second and self.second is not None:
+            # Missed it. It's somewhere between the last frame and now.
+            self.locked = False
+            self.window_ns = min(SECOND_NS, self.window_ns * 2)
+            self.second = second
+            return
+
+        watching = second
+        # Last time the RTC still read the old second. The edge came after.
+        before_ns = start_ns
+        while second == watching and before_ns - start_ns < WATCH_NS:
+            before_ns = time.monotonic_ns()
+            await asyncio.sleep(POLL_S)
+            second = self.read()
+        self.second = second
+        if second == watching:
+            # The RTC isn't ticking. Try again next frame.
+            self.locked = False
+            return
+
+        # Put the edge at the last read before it, so latency_ms() errs long.
+        self.edge_ns = before_ns
+        self.window_ns = EARLY_NS
+        self.locked = True
+
+    # Milliseconds since the last edge seen, at most POLL_S over.
+    def latency_ms(self):
+        return (time.monotonic_ns() - self.edge_ns) // 1000000
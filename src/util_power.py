@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+try:
+    import alarm
+except ImportError:
+    # Not on this board or CircuitPython version. Idle in asyncio.sleep().
+    alarm = None
+
+# Shortest idle worth a light sleep. Going to sleep and waking take a few ms.
+MIN_LIGHT_SLEEP_S = 0.05
+
+
+# Puts the board to sleep between deadlines, and counts how it spends its time.
+#
+# Each loop waits with power.sleep(name, seconds) instead of asyncio.sleep(),
+# which tells this when the loop next has work. When the last one starts
+# waiting, nothing can run until the earliest of those deadlines, so that's
+# idle time, and with light_sleep it's spent in alarm.light_sleep_until_alarms().
+# Light sleep also stops the matrix refresh, so it's only used while the
+# panel is dark.
+#
+#     power.add("render")
+#     await power.sleep("render", next_frame - time.monotonic())
+class PowerManager():
+    def __init__(self, light_sleep):
+        self.light_sleep = light_sleep and alarm is not None
+        # True while nothing shows on the panel.
+        self.dark = False
+        # Each loop's deadline while it waits, or None while it runs.
+        self._deadlines = {}
+        # Times each loop woke up since the last summary.
+        self._wakeups = {}
+        self.idle_s = 0
+        self.light_s = 0
+        self.light_sleeps = 0
+        self._since = time.monotonic()
+
+    # Adds a loop that waits with sleep(name, ...). Until it first waits it
+    # counts as running.
+    def add(self, name):
+        self._deadlines[name] = None
+        self._wakeups[name] = 0
+
+    # The earliest deadline if every loop is waiting, else None.
+    def _idle_until(self):
+        earliest = None
+        for name in self._deadlines:
+            deadline = self._deadlines[name]
+            if deadline is None:
+                return None
+            if earliest is None or deadline < earliest:
+                earliest = deadline
+        return earliest
+
+    # Waits seconds, sleeping the board if nothing else can run meanwhile.
+    async def sleep(self, name, seconds):
+        now = time.monotonic()
+        deadline = now + max(0, seconds)
+        self._deadlines[name] = deadline
+        idle_until = self._idle_until()
+        if idle_until is not None:
+            self.idle_s += max(0, idle_until - now)
+            if self.light_sleep and self.dark and idle_until - now >= MIN_LIGHT_SLEEP_S:
+                alarm.light_sleep_until_alarms(alarm.time.TimeAlarm(monotonic_time=idle_until))
+                self.light_s += time.monotonic() - now
+                self.light_sleeps += 1
+
+        await asyncio.sleep(max(0, deadline - time.monotonic()))
+        self._deadlines[name] = None
+        self._wakeups[name] += 1
+
+    # One line like "idle 97%, light sleep 80% (412), wakeups/min render 60 task 21",
+    # then starts counting again.
+    def summary(self):
+        now = time.monotonic()
+        elapsed = max(now - self._since, 0.001)
+        wakeups = " ".join(["{} {}".format(name, round(self._wakeups[name] * 60 / elapsed, 1)) for name in self._wakeups])
+        result = "idle {idle}%, light sleep {light}% ({count}), wakeups/min {wakeups}".format(
+            idle=round(self.idle_s * 100 / elapsed), light=round(self.light_s * 100 / elapsed),
+            count=self.light_sleeps, wakeups=wakeups)
+
+        self._since = now
+        self.idle_s = 0
+        self.light_s = 0
+        self.light_sleeps = 0
+        for name in self._wakeups:
+            self._wakeups[name] = 0
+        return result
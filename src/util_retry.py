@@ -0,0 +1,152 @@
+import errno
+import random
+import time
+
+
+# Raised instead of calling an endpoint whose breaker is open.
+class CircuitOpenError(RuntimeError):
+    def __init__(self, name, retry_at):
+        super().__init__("{name} is failing, not trying again for {s} s".format(
+            name=name, s=max(0, round(retry_at - time.monotonic()))))
+        self.name = name
+        # time.monotonic() when it's worth trying again.
+        self.retry_at = retry_at
+
+
+# Exponential backoff with jitter: base_s after the first failure, doubling
+# after each one after that up to max_s. Up to jitter of each delay is taken
+# off at random, so devices that failed together don't all retry together.
+class Backoff():
+    def __init__(self, base_s, max_s, jitter=0.25):
+        self.base_s = base_s
+        self.max_s = max(base_s, max_s)
+        self.jitter = jitter
+
+    # Seconds to wait after the given number of failures in a row.
+    def delay(self, failures):
+        delay = self.base_s
+        for idx in range(1, failures):
+            delay *= 2
+            if delay >= self.max_s:
+                delay = self.max_s
+                break
+        return delay - random.uniform(0, delay * self.jitter)
+
+
+# Failure tracking for one remote service.
+#
+# Every failure pushes retry_at out by the backoff, and allow() is False until
+# then, so nothing calls a failing service in a tight loop. After threshold
+# failures in a row the breaker is open: callers should serve what they have
+# instead of waiting on it. Once retry_at passes, one call is let through to
+# probe it. Any success closes the breaker again.
+#
+#     with timeapi:
+#         response = pool.get(...)
+#
+# counts an OSError or RuntimeError from the block as a failure, anything else
+# getting to the end as a success, and raises CircuitOpenError instead of
+# running the block if allow() is False.
+#
+# Requests block the display while they wait, so timeout_s, the socket timeout
+# to use, starts short. Each timeout doubles it, up to max_timeout_s, so a
+# slow service still gets through, and each success brings it back down
+# towards twice what the call took.
+class Endpoint():
+    def __init__(self, name, base_s, max_s, threshold, timeout_s=10, max_timeout_s=None):
+        self.name = name
+        self.backoff = Backoff(base_s, max_s)
+        self.threshold = threshold
+        # Failures in a row.
+        self.failures = 0
+        self.retry_at = 0
+        self.min_timeout_s = timeout_s
+        self.max_timeout_s = max(timeout_s, max_timeout_s or timeout_s)
+        self.timeout_s = timeout_s
+        # When the call in the with block started.
+        self._start = 0
+        # Totals since the last summary().
+        self.calls = 0
+        self.failed = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def is_open(self):
+        return self.failures >= self.threshold
+
+    # True if a call now is worth making.
+    def allow(self):
+        return time.monotonic() >= self.retry_at
+
+    # Seconds until allow() is True.
+    def retry_in(self):
+        return max(0, self.retry_at - time.monotonic())
+
+    # Records a success. elapsed_s: how long the call took, if known.
+    def success(self, elapsed_s=None):
+        self.calls += 1
+        self.failures = 0
+        self.retry_at = 0
+        if elapsed_s is not None:
+            self.timeout_s = max(self.min_timeout_s, min(self.timeout_s, 2 * elapsed_s))
+
+    # Records a failure and returns the seconds until the next try.
+    # timed_out: True if the call ran out of time, which lengthens timeout_s.
+    def failure(self, timed_out=False):
+        if timed_out:
+            self.timeout_s = min(self.max_timeout_s, self.timeout_s * 2)
+        self.calls += 1
+        self.failed += 1
+        self.failures += 1
+        if self.failures == self.threshold:
+            self.opened += 1
+        delay = self.backoff.delay(self.failures)
+        self.retry_at = time.monotonic() + delay
+        return delay
+
+    def __enter__(self):
+        if not self.allow():
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_at)
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.success(time.monotonic() - self._start)
+        elif issubclass(exc_type, (OSError, RuntimeError)):
+            self.failure(is_timeout(exc_value))
+        return False
+
+
+# True if an error from a request means it ran out of time.
+def is_timeout(e):
+    return isinstance(e, TimeoutError) or (isinstance(e, OSError) and bool(e.args) and e.args[0] == errno.ETIMEDOUT)
+
+
+endpoints = []
+
+
+# Makes an Endpoint and keeps it for summary().
+def endpoint(name, base_s=30, max_s=60 * 60, threshold=3, timeout_s=10, max_timeout_s=None):
+    result = Endpoint(name, base_s, max_s, threshold, timeout_s, max_timeout_s)
+    endpoints.append(result)
+    return result
+
+
+# One line for the endpoints that had trouble since the last call, like
+# "timeapi 4 calls 3 failed 2 rejected 1 opened (open, 240 s)", separated
+# by "; ". Then starts counting again.
+def summary():
+    parts = []
+    for e in endpoints:
+        if e.failed or e.rejected or e.is_open:
+            state = "open, {} s".format(round(e.retry_in())) if e.is_open else "closed"
+            parts.append("{name} {calls} calls {failed} failed {rejected} rejected {opened} opened ({state})".format(
+                name=e.name, calls=e.calls, failed=e.failed, rejected=e.rejected, opened=e.opened, state=state))
+        e.calls = 0
+        e.failed = 0
+        e.rejected = 0
+        e.opened = 0
+    return "; ".join(parts)
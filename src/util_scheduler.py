@@ -0,0 +1,137 @@
+import time
+import util_retry
+
+
+# A job the scheduler runs at a deadline.
+# The callback gets the current time and returns the next deadline, or None to stop.
+class Task():
+    def __init__(self, name, callback, retry_s, max_retry_s):
+        self.name = name
+        self.callback = callback
+        # How long to wait before running again if the callback raises. Doubles
+        # with each failure in a row, up to max_retry_s.
+        self.retry_s = retry_s
+        self.backoff = util_retry.Backoff(retry_s, max_retry_s or retry_s)
+        # Failures in a row.
+        self.failures = 0
+        self.deadline = None
+        self.runs = 0
+        # Bumped on every reschedule so older heap entries can be skipped.
+        self._version = 0
+
+
+# Runs tasks in deadline order from a heap, so the main loop can sleep until
+# the next one is due instead of polling.
+#
+# clock defaults to the board's, but can be swapped for a virtual clock to
+# run the schedule faster than real time.
+class Scheduler():
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.tasks = {}
+        # Entries are [deadline, sequence, version, task].
+        self._heap = []
+        self._sequence = 0
+
+    # Adds a task that first runs after delay seconds.
+    def add(self, name, callback, delay=0, retry_s=10, max_retry_s=None):
+        task = Task(name, callback, retry_s, max_retry_s)
+        self.tasks[name] = task
+        self.schedule(task, self.clock() + delay)
+        return task
+
+    # Sets a new deadline for a task. Pass None to pause it.
+    def schedule(self, task, deadline):
+        task._version += 1
+        task.deadline = deadline
+        if deadline is not None:
+            self._sequence += 1
+            self._push([deadline, self._sequence, task._version, task])
+
+    # Runs a task on the next pass, whatever its deadline.
+    def run_soon(self, name):
+        if name in self.tasks:
+            self.schedule(self.tasks[name], self.clock())
+
+    def _push(self, entry):
+        heap = self._heap
+        heap.append(entry)
+        idx = len(heap) - 1
+        while idx > 0:
+            parent = (idx - 1) // 2
+            if heap[parent] <= entry:
+                break
+            heap[idx] = heap[parent]
+            idx = parent
+        heap[idx] = entry
+
+    def _pop(self):
+        heap = self._heap
+        last = heap.pop()
+        if not heap:
+            return last
+
+        top = heap[0]
+        size = len(heap)
+        idx = 0
+        while True:
+            child = 2 * idx + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if last <= heap[child]:
+                break
+            heap[idx] = heap[child]
+            idx = child
+        heap[idx] = last
+        return top
+
+    # Drops heap entries for tasks that were rescheduled.
+    def _discard_stale(self):
+        heap = self._heap
+        while heap and heap[0][2] != heap[0][3]._version:
+            self._pop()
+
+    # Deadline of the next task, or None if there are none.
+    def next_deadline(self):
+        self._discard_stale()
+        if self._heap:
+            return self._heap[0][0]
+        return None
+
+    # Runs the most overdue task, if any are due. Returns True if one ran.
+    # If the task raises, it is retried after its backoff and the error is passed on.
+    # An error with a retry_at, like CircuitOpenError, isn't retried before then.
+    def run_next(self):
+        self._discard_stale()
+        now = self.clock()
+        if not self._heap or self._heap[0][0] > now:
+            return False
+
+        task = self._pop()[3]
+        version = task._version
+        task.runs += 1
+        try:
+            deadline = task.callback(now)
+        except Exception as e:
+            task.failures += 1
+            retry = self.clock() + task.backoff.delay(task.failures)
+            retry_at = getattr(e, "retry_at", None)
+            if retry_at is not None and retry_at > retry:
+                retry = retry_at
+            self.schedule(task, retry)
+            raise
+        task.failures = 0
+        if task._version == version:
+            # The callback didn't reschedule the task itself.
+            self.schedule(task, deadline)
+
+        return True
+
+    # Seconds until the next task is due.
+    def sleep_time(self):
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        return max(0, deadline - self.clock())
@@ -0,0 +1,104 @@
+from util_display import writer
+import util_font
+
+
+# One label that may need to scroll.
+class _Entry():
+    def __init__(self, font, room):
+        self.font = font
+        # Pixels the text can use.
+        self.room = room
+        self.text = None
+        # The text at each step of the scroll, or None if it fits.
+        self.windows = None
+        self.pos = 0
+        # Steps left to wait before moving on.
+        self.hold = 0
+
+
+# Scrolls labels whose text doesn't fit, a step at a time, so each step is a
+# quick write between frames instead of a loop that holds up the clock.
+#
+# Labels can't be clipped, so moving one left would draw over the time beside
+# it. Instead the label shows a window of the text that fits its room, and each
+# step moves the window on a character. The windows are worked out once when
+# the text changes, so a step only sets the label's text. Text that fits is
+# just shown.
+#
+#     scroller.add(line.zone_label, font, 30)
+#     scroller.set_text(line.zone_label, "St. George, Utah")
+#     scroller.step()   # every step_s
+class Scroller():
+    # hold_steps: steps to wait at each end of the text.
+    def __init__(self, hold_steps):
+        self.hold_steps = hold_steps
+        self._entries = {}
+        # Entries that are scrolling.
+        self._scrolling = []
+
+    # Lets a label scroll. room is its width in pixels.
+    def add(self, label, font, room):
+        self._entries[id(label)] = (label, _Entry(font, room))
+
+    # Shows text on a label, scrolling it if it doesn't fit. Does nothing if
+    # it's the text already shown, so it's fine to call every frame.
+    def set_text(self, label, text):
+        item = self._entries.get(id(label))
+        if item is None:
+            writer.set(label, "text", text)
+            return
+        entry = item[1]
+        if text == entry.text:
+            return
+
+        entry.text = text
+        entry.windows = self._windows(entry.font, text, entry.room)
+        entry.pos = 0
+        entry.hold = self.hold_steps
+        if entry.windows is None:
+            if item in self._scrolling:
+                self._scrolling.remove(item)
+            writer.set(label, "text", text)
+        else:
+            if item not in self._scrolling:
+                self._scrolling.append(item)
+            writer.set(label, "text", entry.windows[0])
+
+    # The longest piece of text from each character on that fits in room,
+    # up to the one that reaches the end. None if it all fits. Text fits if its
+    # pixels do: the last character's advance may hang past the edge.
+    def _windows(self, font, text, room):
+        if room <= 0 or util_font.ink_width(font, text) <= room:
+            return None
+
+        windows = []
+        end = 0
+        for start in range(len(text)):
+            end = max(end, start)
+            while end < len(text) and util_font.ink_width(font, text[start:end + 1]) <= room:
+                end += 1
+            windows.append(text[start:end])
+            if end == len(text):
+                break
+        return windows
+
+    # True if any label is scrolling.
+    def active(self):
+        return len(self._scrolling) > 0
+
+    # Moves each scrolling label on a step. After the end it waits, then
+    # starts again. Returns True if any label changed.
+    def step(self):
+        changed = False
+        for label, entry in self._scrolling:
+            if entry.hold:
+                entry.hold -= 1
+                continue
+            entry.pos += 1
+            if entry.pos >= len(entry.windows):
+                entry.pos = 0
+            if entry.pos == 0 or entry.pos == len(entry.windows) - 1:
+                entry.hold = self.hold_steps
+            writer.set(label, "text", entry.windows[entry.pos])
+            changed = True
+        return changed
@@ -1,6 +1,9 @@
-import re
 import time
 
+SECONDS_PER_DAY = 24 * 60 * 60
+# Local times kept by TimeService before it starts over.
+MAX_CACHED_OFFSETS = 32
+
 
 # Adds a specified number of seconds to a time_tuple
 def add_seconds(value, seconds):
@@ -12,19 +15,144 @@ def format_time(value):
     return "{year}-{month:02d}-{day:02d} {hours}:{minutes:02d}:{seconds:02d}".format(year=value[0], month=value[1], day=value[2], hours=value[3], minutes=value[4], seconds=value[5])
 
 
-# Converts an ISO formatted date/time string like 2023-02-17T14:35:27 to a time in seconds.
+# Converts an ISO 8601 date/time like 2023-02-17T14:35:27 to UTC seconds.
+# Fractional seconds (dropped) and a Z or +hh:mm/-hh:mm/+hhmm offset may
+# follow. Times without an offset are taken as UTC. Returns 0 if value
+# doesn't start with a date/time.
+#
+# Fixed positions and integer date arithmetic, so no regex and no mktime.
 def parse_time(value):
-    result = 0
+    if len(value) < 19 or value[4] != "-" or value[7] != "-" or value[13] != ":" or value[16] != ":":
+        return 0
+
+    try:
+        result = (days_from_civil(int(value[0:4]), int(value[5:7]), int(value[8:10])) * SECONDS_PER_DAY
+            + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19]))
 
-    m = re.search("(\d*)-(\d*)-(\d*)T(\d*):(\d*):(\d*)", value)
-    if m:
-        t = (
-            int(m.group(1)), int(m.group(2)), int(m.group(3)),
-            int(m.group(4)), int(m.group(5)), int(m.group(6)),
-            -1, -1, -1,
-        )
+        idx = 19
+        end = len(value)
+        if idx < end and value[idx] == ".":
+            # Fractional seconds.
+            idx += 1
+            while idx < end and "0" <= value[idx] <= "9":
+                idx += 1
 
-        result = time.mktime(t)
+        if idx < end and (value[idx] == "+" or value[idx] == "-"):
+            sign = 1 if value[idx] == "+" else -1
+            hours = int(value[idx + 1:idx + 3])
+            idx += 3
+            if idx < end and value[idx] == ":":
+                idx += 1
+            minutes = int(value[idx:idx + 2]) if idx + 2 <= end else 0
+            # Local time is ahead of UTC by the offset.
+            result -= sign * (hours * 3600 + minutes * 60)
+    except ValueError:
+        return 0
 
     return result
 
+
+# Number of days from 1970-01-01 to the given civil date (proleptic Gregorian).
+# Pure integer arithmetic, so it doesn't depend on the board's mktime/localtime.
+def days_from_civil(year, month, day):
+    if month <= 2:
+        year -= 1
+    era = year // 400
+    yoe = year - era * 400
+    mp = (month + 9) % 12
+    doy = (153 * mp + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+# Converts a day number from 1970-01-01 back to a (year, month, day) tuple.
+def civil_from_days(days):
+    days += 719468
+    era = days // 146097
+    doe = days - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = mp + 3 if mp < 10 else mp - 9
+    year = yoe + era * 400
+    if month <= 2:
+        year += 1
+    return (year, month, day)
+
+
+# Day of the week for a day number from 1970-01-01. 0 = Sunday.
+def weekday_from_days(days):
+    # 1970-01-01 was a Thursday.
+    return (days + 4) % 7
+
+
+# Number of days in a month.
+def days_in_month(year, month):
+    if month == 2:
+        leap = (year % 4 == 0) and ((year % 100 != 0) or (year % 400 == 0))
+        return 29 if leap else 28
+    return 30 if month in (4, 6, 9, 11) else 31
+
+
+# Reads the RTC once per tick and works out local times from that reading.
+#
+# Local times are cached per UTC offset, so zones in the same offset share
+# one. Within a minute only the seconds change, so the date, hours and
+# minutes are only worked out again when the minute rolls over.
+class TimeService():
+    def __init__(self):
+        # UTC seconds at the last tick.
+        self.utc_s = 0
+        # UTC offset -> [local minute number, time_tuple-like list].
+        self._local = {}
+        # Corrects the RTC between syncs, if set. See util_clock.
+        self.discipline = None
+
+    # The RTC's UTC seconds, corrected.
+    def read(self):
+        utc_s = time.time()
+        if self.discipline is not None:
+            utc_s += self.discipline.correction(utc_s)
+        return utc_s
+
+    # Reads the RTC. Call once per tick, and again after the RTC is set.
+    def tick(self):
+        self.utc_s = self.read()
+        return self.utc_s
+
+    # Local time at the last tick for a UTC offset, as a list laid out like a
+    # time_tuple. The list is reused, so copy it to keep it past this tick.
+    def local(self, offset_s):
+        offset_s = int(offset_s)
+        local_s = self.utc_s + offset_s
+        minute = local_s // 60
+
+        entry = self._local.get(offset_s)
+        if entry is None:
+            if len(self._local) >= MAX_CACHED_OFFSETS:
+                # Offsets from zones that are gone, or from before DST changes.
+                self._local.clear()
+            entry = [None, [0, 0, 0, 0, 0, 0, 0, 0, -1]]
+            self._local[offset_s] = entry
+
+        parts = entry[1]
+        if entry[0] != minute:
+            entry[0] = minute
+            days = local_s // SECONDS_PER_DAY
+            minute_of_day = minute - days * 24 * 60
+            year, month, day = civil_from_days(days)
+            parts[0] = year
+            parts[1] = month
+            parts[2] = day
+            parts[3] = minute_of_day // 60
+            parts[4] = minute_of_day % 60
+            # Monday = 0, like time_tuple.
+            parts[6] = (days + 3) % 7
+            parts[7] = days - days_from_civil(year, 1, 1) + 1
+        parts[5] = local_s - minute * 60
+        return parts
+
+
+# Shared by code.py and the tasks it runs.
+rtc = TimeService()
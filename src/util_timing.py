@@ -0,0 +1,89 @@
+import array
+import time
+
+# Histogram buckets. Bucket 0 counts spans under 1 ms, bucket i spans under
+# 2**i ms, and the last bucket everything longer (over 8 s).
+BUCKETS = 14
+
+# Spans code.py times. Made up front so timing a span never allocates.
+SPANS = ("fetch", "json", "config", "render", "latency", "loop")
+
+
+# Durations for one named piece of work.
+#
+# Use it as a context manager:
+#     with util_timing.span("fetch"):
+#         network.fetch(...)
+class Span():
+    def __init__(self, name):
+        self.name = name
+        self.counts = array.array("L", [0] * BUCKETS)
+        self.count = 0
+        self.total_ms = 0
+        self.max_ms = 0
+        self._start_ns = 0
+
+    def __enter__(self):
+        self._start_ns = time.monotonic_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.record((time.monotonic_ns() - self._start_ns) // 1000000)
+        # Don't swallow exceptions.
+        return False
+
+    # Adds one duration, in whole milliseconds.
+    def record(self, ms):
+        bucket = 0
+        limit = 1
+        while ms >= limit and bucket < BUCKETS - 1:
+            bucket += 1
+            limit <<= 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    # One line like "fetch 12 830 4100 0.0.0.0.0.0.0.0.0.0.3.5.4": count,
+    # average ms, max ms, then the bucket counts up to the last non-empty one.
+    def summary(self):
+        last = BUCKETS - 1
+        while last > 0 and self.counts[last] == 0:
+            last -= 1
+        return "{name} {count} {avg} {max} {hist}".format(
+            name=self.name, count=self.count, avg=self.total_ms // self.count, max=self.max_ms,
+            hist=".".join([str(self.counts[idx]) for idx in range(last + 1)]))
+
+    def reset(self):
+        for bucket in range(BUCKETS):
+            self.counts[bucket] = 0
+        self.count = 0
+        self.total_ms = 0
+        self.max_ms = 0
+
+
+_spans = {}
+for _name in SPANS:
+    _spans[_name] = Span(_name)
+
+
+# The Span for name. Names not in SPANS get one made the first time.
+def span(name):
+    result = _spans.get(name)
+    if result is None:
+        result = Span(name)
+        _spans[name] = result
+    return result
+
+
+# All spans that ran since the last call, separated by "; ", then starts
+# counting again. Returns "" if nothing ran.
+def summary():
+    parts = []
+    for name in _spans:
+        s = _spans[name]
+        if s.count:
+            parts.append(s.summary())
+            s.reset()
+    return "; ".join(parts)
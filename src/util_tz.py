@@ -0,0 +1,290 @@
+import util_time
+
+# Time zone rules, one "IANA_NAME POSIX_TZ" pair per line.
+# Built from the tz database by tools/make_tzdata.py.
+TZ_DATA_FILE = "tzdata.txt"
+# How long an offset learned from the network is trusted without rules to check it.
+LEARNED_STATE_S = 24 * 60 * 60
+
+# Parsed rules, keyed by IANA name. None means we looked and didn't find it.
+_rules = {}
+
+
+# A POSIX TZ rule like "CST6CDT,M3.2.0,M11.1.0".
+# Offsets are stored in seconds east of UTC, which is the opposite sign of the
+# POSIX string but matches ZoneInfo.utc_offset_sec.
+class TzRule():
+    def __init__(self, posix):
+        self.posix = posix
+        self._pos = 0
+
+        self.std_name = self._parse_name()
+        self.std_offset = -self._parse_offset()
+        self.dst_name = None
+        self.dst_offset = self.std_offset
+        self.start = None
+        self.end = None
+
+        if self._pos < len(posix):
+            self.dst_name = self._parse_name()
+            if self._pos < len(posix) and posix[self._pos] != ",":
+                self.dst_offset = -self._parse_offset()
+            else:
+                # DST defaults to one hour ahead of standard time.
+                self.dst_offset = self.std_offset + 60 * 60
+
+            if self._pos < len(posix) and posix[self._pos] == ",":
+                self._pos += 1
+                self.start = self._parse_date()
+                self._expect(",")
+                self.end = self._parse_date()
+            else:
+                # No rule given. Use the current US rule, like glibc does.
+                self.start = ("M", 3, 2, 0, 2 * 60 * 60)
+                self.end = ("M", 11, 1, 0, 2 * 60 * 60)
+
+    def _expect(self, c):
+        if self._pos >= len(self.posix) or self.posix[self._pos] != c:
+            raise ValueError("bad TZ rule: {}".format(self.posix))
+        self._pos += 1
+
+    def _parse_name(self):
+        s = self.posix
+        start = self._pos
+        if start < len(s) and s[start] == "<":
+            # Quoted name like <+03>
+            end = s.find(">", start)
+            if end < 0:
+                raise ValueError("bad TZ rule: {}".format(s))
+            self._pos = end + 1
+            return s[start + 1:end]
+
+        while self._pos < len(s) and s[self._pos].isalpha():
+            self._pos += 1
+        if self._pos - start < 3:
+            raise ValueError("bad TZ rule: {}".format(s))
+        return s[start:self._pos]
+
+    def _parse_number(self):
+        s = self.posix
+        start = self._pos
+        while self._pos < len(s) and s[self._pos].isdigit():
+            self._pos += 1
+        if start == self._pos:
+            raise ValueError("bad TZ rule: {}".format(s))
+        return int(s[start:self._pos])
+
+    # [+|-]hh[:mm[:ss]] as seconds.
+    def _parse_offset(self):
+        s = self.posix
+        sign = 1
+        if self._pos < len(s) and s[self._pos] in "+-":
+            if s[self._pos] == "-":
+                sign = -1
+            self._pos += 1
+
+        seconds = self._parse_number() * 60 * 60
+        for scale in (60, 1):
+            if self._pos < len(s) and s[self._pos] == ":":
+                self._pos += 1
+                seconds += self._parse_number() * scale
+            else:
+                break
+
+        return sign * seconds
+
+    # Mm.w.d, Jn or n, with an optional /time.
+    def _parse_date(self):
+        s = self.posix
+        if self._pos >= len(s):
+            raise ValueError("bad TZ rule: {}".format(s))
+        if s[self._pos] == "M":
+            self._pos += 1
+            month = self._parse_number()
+            self._expect(".")
+            week = self._parse_number()
+            self._expect(".")
+            weekday = self._parse_number()
+            rule = ["M", month, week, weekday]
+        elif s[self._pos] == "J":
+            self._pos += 1
+            rule = ["J", self._parse_number()]
+        else:
+            rule = ["N", self._parse_number()]
+
+        seconds = 2 * 60 * 60
+        if self._pos < len(s) and s[self._pos] == "/":
+            self._pos += 1
+            seconds = self._parse_offset()
+        rule.append(seconds)
+
+        return tuple(rule)
+
+    # Local time of a transition rule, in seconds since 1970-01-01.
+    def _rule_local_time(self, rule, year):
+        if rule[0] == "M":
+            month, week, weekday = rule[1], rule[2], rule[3]
+            first = util_time.days_from_civil(year, month, 1)
+            day = first + (weekday - util_time.weekday_from_days(first)) % 7 + (week - 1) * 7
+            # Week 5 means "the last one", which may be the fourth.
+            while day >= first + util_time.days_in_month(year, month):
+                day -= 7
+        elif rule[0] == "J":
+            # Day 1-365, February 29 is never counted.
+            n = rule[1]
+            leap = util_time.days_in_month(year, 2) == 29
+            day = util_time.days_from_civil(year, 1, 1) + n - 1
+            if leap and n >= 60:
+                day += 1
+        else:
+            # Day 0-365, February 29 is counted.
+            day = util_time.days_from_civil(year, 1, 1) + rule[1]
+
+        return day * 24 * 60 * 60 + rule[-1]
+
+    def has_dst(self):
+        return self.dst_name is not None
+
+    # DST start and end for a year, in UTC seconds. (0, 0) if there's no DST.
+    def transitions(self, year):
+        if not self.has_dst():
+            return (0, 0)
+
+        # The start time is given in standard time and the end time in DST.
+        dst_start = self._rule_local_time(self.start, year) - self.std_offset
+        dst_end = self._rule_local_time(self.end, year) - self.dst_offset
+        return (dst_start, dst_end)
+
+    def _year(self, utc_s):
+        return util_time.civil_from_days((utc_s + self.std_offset) // (24 * 60 * 60))[0]
+
+    def is_dst(self, utc_s):
+        if not self.has_dst():
+            return False
+
+        dst_start, dst_end = self.transitions(self._year(utc_s))
+        if dst_start < dst_end:
+            return dst_start <= utc_s < dst_end
+        # Southern hemisphere. DST spans the new year.
+        return not (dst_end <= utc_s < dst_start)
+
+    # UTC offset in effect at a UTC time, in seconds.
+    def utc_offset(self, utc_s):
+        return self.dst_offset if self.is_dst(utc_s) else self.std_offset
+
+    # The first DST change after a UTC time, or 0 if there are none.
+    def next_transition(self, utc_s):
+        if not self.has_dst():
+            return 0
+
+        year = self._year(utc_s)
+        for y in (year, year + 1):
+            changes = sorted(self.transitions(y))
+            for change in changes:
+                if change > utc_s:
+                    return change
+
+        return 0
+
+    # The DST interval in effect at, or following, a UTC time.
+    def dst_interval(self, utc_s):
+        if not self.has_dst():
+            return (0, 0)
+
+        year = self._year(utc_s)
+        dst_start, dst_end = self.transitions(year)
+        if dst_start < dst_end:
+            if dst_end <= utc_s:
+                return self.transitions(year + 1)
+            return (dst_start, dst_end)
+
+        # Southern hemisphere: this year's start pairs with next year's end.
+        if utc_s < dst_end:
+            return (self.transitions(year - 1)[0], dst_end)
+        return (dst_start, self.transitions(year + 1)[1])
+
+
+# Finds the rule for an IANA time zone name like "America/Chicago".
+# Returns None if the zone isn't in the data file.
+def find_rule(tz_name):
+    if not tz_name:
+        return None
+
+    if tz_name in _rules:
+        return _rules[tz_name]
+
+    rule = None
+    prefix = tz_name + " "
+    try:
+        with open(TZ_DATA_FILE, "r") as f:
+            for line in f:
+                if line.startswith(prefix):
+                    rule = TzRule(line[len(prefix):].strip())
+                    break
+    except OSError as e:
+        print("can't read {}: {}".format(TZ_DATA_FILE, e))
+    except ValueError as e:
+        print(e)
+
+    _rules[tz_name] = rule
+    return rule
+
+
+# UTC offset and DST window of a time zone, worked out once and shared by
+# every location in the zone until it next changes.
+class ZoneState():
+    def __init__(self, utc_offset, dst_start, dst_end, valid_until, since):
+        self.utc_offset = utc_offset
+        self.dst_start = dst_start
+        self.dst_end = dst_end
+        # When the offset next changes, or a state learned from the network
+        # should be checked again, in UTC seconds. 0 if never.
+        self.valid_until = valid_until
+        # When it was worked out. Earlier times (the RTC went back) need it again.
+        self.since = since
+
+    def valid_at(self, utc_s):
+        return self.since <= utc_s and (self.valid_until == 0 or utc_s < self.valid_until)
+
+
+# Shared states, keyed by IANA name.
+_states = {}
+
+
+# The state of a time zone at utc_s, from the cache or its rules. None if
+# the rules aren't known and nothing learned from the network is still good.
+def zone_state(tz_name, utc_s):
+    state = _states.get(tz_name)
+    if state is not None and state.valid_at(utc_s):
+        return state
+
+    rule = find_rule(tz_name)
+    if rule is None:
+        return None
+
+    dst_start, dst_end = rule.dst_interval(utc_s)
+    state = ZoneState(rule.utc_offset(utc_s), dst_start, dst_end, rule.next_transition(utc_s), utc_s)
+    _states[tz_name] = state
+    return state
+
+
+# Last state worked out for a zone, even if it's out of date, or None. For
+# showing something while the network is down.
+def stale_state(tz_name):
+    return _states.get(tz_name)
+
+
+# Keeps a state learned from the network for a zone without known rules, so
+# other locations in the same zone don't have to ask again before it changes.
+# It's good until valid_until (a day from utc_s if not given) or the next DST
+# change, whichever is first.
+def remember(tz_name, utc_offset, dst_start, dst_end, utc_s, valid_until=None):
+    if valid_until is None:
+        valid_until = utc_s + LEARNED_STATE_S
+    for t in (dst_start, dst_end):
+        if utc_s < t < valid_until:
+            valid_until = t
+    state = ZoneState(utc_offset, dst_start, dst_end, valid_until, utc_s)
+    if tz_name:
+        _states[tz_name] = state
+    return state
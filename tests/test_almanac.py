@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import locations
+import util_almanac
+import util_time
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+# Published sunrise and sunset times, in local time rounded to the minute
+# as almanacs give them: (name, latitude, longitude, date, UTC offset in
+# hours, sunrise, sunset). A sunset after midnight is given as 24:mm.
+PUBLISHED = (
+    ("Madison", 43.073051, -89.401230, (2024, 12, 21), -6, (7, 26), (16, 25)),
+    ("Reykjavik", 64.1466, -21.9426, (2024, 6, 21), 0, (2, 55), (24, 3)),
+    ("Reykjavik", 64.1466, -21.9426, (2024, 12, 21), 0, (11, 22), (15, 29)),
+)
+# Allowed difference: the rounding to the minute, and about a minute more.
+TOLERANCE_S = 90
+
+TROMSO = (69.6492, 18.9553)
+
+
+# UTC seconds of a local time on a date.
+def local_time(date, utc_offset, hours_minutes):
+    day = util_time.days_from_civil(date[0], date[1], date[2])
+    return day * SECONDS_PER_DAY + (hours_minutes[0] - utc_offset) * 3600 + hours_minutes[1] * 60
+
+
+class SunTimesTest(unittest.TestCase):
+    def test_published_times(self):
+        for name, latitude, longitude, date, utc_offset, sunrise, sunset in PUBLISHED:
+            day = util_time.days_from_civil(date[0], date[1], date[2])
+            result = util_almanac.sun_times(latitude, longitude, day)
+            self.assertLessEqual(abs(result[0] - local_time(date, utc_offset, sunrise)), TOLERANCE_S, (name, date))
+            self.assertLessEqual(abs(result[1] - local_time(date, utc_offset, sunset)), TOLERANCE_S, (name, date))
+
+    def test_locations_have_a_day_every_day(self):
+        first = util_time.days_from_civil(2024, 1, 1)
+        for loc in locations.locations:
+            for day in range(first, first + 366):
+                sunrise, sunset = util_almanac.sun_times(loc["latitude"], loc["longitude"], day)
+                self.assertLess(sunrise, sunset)
+                # Well inside the UTC day around the location's local noon.
+                noon = (day * SECONDS_PER_DAY + SECONDS_PER_DAY // 2) - loc["longitude"] / 360 * SECONDS_PER_DAY
+                self.assertLess(abs((sunrise + sunset) / 2 - noon), 20 * 60, (loc["description"], day))
+
+    def test_polar_night(self):
+        # In Tromsø the sun doesn't rise from November 27 to January 14.
+        for date, dark in (((2024, 11, 26), False), ((2024, 11, 27), True), ((2024, 12, 21), True),
+                ((2025, 1, 14), True), ((2025, 1, 15), False)):
+            sunrise, sunset = util_almanac.sun_times(TROMSO[0], TROMSO[1], util_time.days_from_civil(*date))
+            self.assertEqual(sunrise > sunset, dark, date)
+
+    def test_midnight_sun(self):
+        sunrise, sunset = util_almanac.sun_times(TROMSO[0], TROMSO[1], util_time.days_from_civil(2025, 6, 21))
+        self.assertEqual(sunset - sunrise, SECONDS_PER_DAY)
+
+
+class SunTableTest(unittest.TestCase):
+    def test_current_sun_times(self):
+        loc = locations.locations[0]
+        utc_s = util_time.days_from_civil(2025, 3, 10) * SECONDS_PER_DAY + 18 * 60 * 60
+        table = util_almanac.sun_table(loc["latitude"], loc["longitude"], utc_s, -5 * 60 * 60, 3)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(util_almanac.current_sun_times(table, utc_s), table[0])
+        self.assertEqual(util_almanac.current_sun_times(table, table[0][1]), table[1])
+        self.assertIsNone(util_almanac.current_sun_times(table, table[2][1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
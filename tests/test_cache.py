@@ -0,0 +1,66 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import util_cache
+
+
+# The fields of a ZoneInfo the cache saves.
+class Zone():
+    def __init__(self, tz_abbr, tz_name, latitude, longitude):
+        self.tz_abbr = tz_abbr
+        self.tz_name = tz_name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.utc_offset_sec = -18000
+        self.dst_start = 100
+        self.dst_end = 200
+        self.sunrise = 300
+        self.sunset = 400
+        self.next_check = 500
+
+
+class ZoneCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "zone_cache.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    # Saves zones and reads them back in a new cache, like after a reset.
+    def reload(self, zones):
+        self.assertTrue(util_cache.ZoneCache(self.path, 0).save(zones))
+        cache = util_cache.ZoneCache(self.path, 0)
+        self.assertEqual(cache.load(), len(zones))
+        return cache
+
+    def test_restore(self):
+        cache = self.reload([Zone("MSN", "America/Chicago", 43.073051, -89.401230)])
+        zone = Zone("MSN", "", 43.073051, -89.401230)
+        zone.next_check = 0
+        self.assertTrue(cache.restore(zone))
+        self.assertEqual(zone.tz_name, "America/Chicago")
+        self.assertEqual(zone.next_check, 500)
+        self.assertFalse(cache.restore(Zone("CET", "", 43.073051, -89.401230)))
+
+    def test_long_tz_abbr_restores(self):
+        # Cut part way through the two byte "é".
+        cache = self.reload([Zone("Saint-Jérôme", "America/Toronto", 45.78, -74.0)])
+        self.assertTrue(cache.restore(Zone("Saint-Jérôme", "", 45.78, -74.0)))
+        self.assertEqual(cache.locations()[0]["tz_abbr"], "Saint-J")
+
+    def test_long_tz_name_is_dropped(self):
+        cache = self.reload([Zone("LONG", "Antarctica/Somewhere_With_A_Very_Long_Name", 1, 2)])
+        zone = Zone("LONG", "", 1, 2)
+        self.assertTrue(cache.restore(zone))
+        self.assertEqual(zone.tz_name, "")
+        self.assertNotIn("tz_name", cache.locations()[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import util_catalog
+
+
+def location(n):
+    return {"tz_abbr": "Z{}".format(n), "tz_name": "Etc/GMT", "latitude": float(n), "longitude": 1.0}
+
+
+# The parts of a ZoneInfo the window uses.
+class Zone():
+    def __init__(self, config, idx):
+        self.tz_abbr = config["tz_abbr"]
+        self.latitude = config["latitude"]
+        self.index = idx
+
+
+def matches(zone, config):
+    return zone.tz_abbr == config["tz_abbr"] and zone.latitude == config["latitude"]
+
+
+class CatalogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.catalog = util_catalog.Catalog(os.path.join(self.dir, "locations.bin"))
+        self.built = []
+
+    def tearDown(self):
+        self.catalog.abort()
+        self.catalog._close()
+        shutil.rmtree(self.dir)
+
+    def write(self, numbers):
+        self.catalog.begin()
+        for n in numbers:
+            self.catalog.add(location(n))
+        return self.catalog.finish()
+
+    def make_zone(self, config, idx):
+        zone = Zone(config, idx)
+        self.built.append(zone)
+        return zone
+
+
+class CatalogTest(CatalogTestCase):
+    def test_unchanged_list_isnt_written(self):
+        self.assertTrue(self.write(range(5)))
+        self.assertFalse(self.write(range(5)))
+        self.assertTrue(self.write(range(4)))
+        self.assertEqual(len(self.catalog), 4)
+        self.assertEqual(self.catalog.location(3)["tz_abbr"], "Z3")
+
+    def test_held_place(self):
+        self.catalog.begin()
+        self.catalog.hold()
+        self.catalog.add(location(1))
+        self.catalog.put(0, location(0))
+        self.assertTrue(self.catalog.finish())
+
+        self.catalog.begin()
+        self.catalog.hold()
+        self.catalog.add(location(1))
+        self.catalog.put(0, location(0))
+        self.assertFalse(self.catalog.finish())
+        self.assertFalse(os.path.exists(self.catalog.path + ".tmp"))
+
+    def test_abort_keeps_the_old_list(self):
+        self.write(range(3))
+        self.catalog.begin()
+        self.catalog.add(location(7))
+        self.catalog.abort()
+        self.assertFalse(os.path.exists(self.catalog.path + ".tmp"))
+        self.assertEqual(self.catalog.location(0)["tz_abbr"], "Z0")
+
+    def test_fit_text(self):
+        self.assertEqual(util_catalog.fit_text("abc", 8), b"abc")
+        self.assertEqual(util_catalog.fit_text("Saint-Jérôme", 8), b"Saint-J")
+
+
+class ZoneWindowTest(CatalogTestCase):
+    def test_reload_follows_moved_locations(self):
+        self.write(range(10))
+        window = util_catalog.ZoneWindow(self.catalog, self.make_zone, 2, 3)
+        window.focus(5)
+        kept = dict((zone.tz_abbr, zone) for zone in window.resident())
+        self.assertEqual(sorted(kept), ["Z0", "Z1", "Z5", "Z6", "Z7"])
+
+        # A new location moves every one after it on.
+        self.write([0, 1, 2, 99] + list(range(3, 10)))
+        window.reload(matches)
+        self.built = []
+        window.focus(6)
+        self.assertEqual(self.built, [])
+        for zone in window.resident():
+            self.assertIs(zone, kept[zone.tz_abbr])
+            self.assertEqual(self.catalog.location(zone.index)["tz_abbr"], zone.tz_abbr)
+
+    def test_reload_drops_removed_locations(self):
+        self.write(range(10))
+        window = util_catalog.ZoneWindow(self.catalog, self.make_zone, 2, 3)
+        window.focus(5)
+        self.write([0, 1, 2, 3, 4, 6, 7, 8, 9])
+        window.reload(matches)
+        self.assertEqual([zone.tz_abbr for zone in window.resident()], ["Z0", "Z1", "Z6", "Z7"])
+        self.assertEqual([zone.index for zone in window.resident()], [0, 1, 5, 6])
+
+
+if __name__ == "__main__":
+    unittest.main()
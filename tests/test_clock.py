@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import util_clock
+
+HOUR = 60 * 60
+START = 1750000000
+
+
+class ClockDisciplineTest(unittest.TestCase):
+    def setUp(self):
+        self.discipline = util_clock.ClockDiscipline(HOUR, 12 * HOUR, 1)
+        self.discipline.sync(START, 0, 0.5)
+
+    def test_learns_the_rate(self):
+        # An RTC that loses 3.6 s an hour.
+        self.discipline.sync(START + HOUR, 3.6, 0.5)
+        self.assertAlmostEqual(self.discipline.ppm, -1000)
+        self.assertEqual(self.discipline.correction(START + 2 * HOUR), round(3.6))
+
+    def test_small_errors_are_stepped(self):
+        # A second off is the whole second RTC rounding. Nothing is left to slew.
+        self.discipline.sync(START + HOUR, 1, 0.5)
+        self.assertEqual(self.discipline.slew_s, 0)
+        self.assertEqual(self.discipline.correction(START + HOUR), 0)
+        self.assertEqual(self.discipline.interval_s, 2 * HOUR)
+
+    def test_slew_is_capped(self):
+        self.discipline.sync(START + HOUR, 2, 0.5)
+        self.assertEqual(self.discipline.slew_s, -2)
+        # The display carries on where it was, and is right by MAX_SLEW_S.
+        rate = self.discipline.rate
+        self.assertEqual(self.discipline.correction(START + HOUR), -2)
+        after = START + HOUR + util_clock.MAX_SLEW_S
+        self.assertEqual(self.discipline.correction(after), round(rate * util_clock.MAX_SLEW_S))
+
+    def test_big_errors_are_stepped(self):
+        self.discipline.sync(START + HOUR, 0, 0.5)
+        self.discipline.sync(START + 3 * HOUR, 10, 0.5)
+        self.assertEqual(self.discipline.slew_s, 0)
+        self.assertEqual(self.discipline.interval_s, HOUR)
+
+    def test_reset(self):
+        self.discipline.sync(START + HOUR, 3.6, 0.5)
+        self.discipline.sync(START + 2 * HOUR, 300, 0.5)
+        self.assertEqual(self.discipline.rate, 0)
+        self.assertEqual(self.discipline.samples, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import util_display
+
+
+class Thing():
+    color = None
+    text = ""
+
+
+# Like a displayio Palette or TileGrid: indexed, and hashed by identity.
+class Cells(list):
+    __hash__ = object.__hash__
+
+
+class ShadowWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.writer = util_display.ShadowWriter()
+
+    def test_skips_unchanged_writes(self):
+        thing = Thing()
+        self.assertTrue(self.writer.set(thing, "text", "12"))
+        self.assertFalse(self.writer.set(thing, "text", "12"))
+        self.assertTrue(self.writer.set(thing, "text", "13"))
+        self.assertEqual(thing.text, "13")
+
+        cells = Cells([0, 0])
+        self.assertTrue(self.writer.set_item(cells, 1, 5))
+        self.assertFalse(self.writer.set_item(cells, 1, 5))
+        self.assertEqual(cells, [0, 5])
+
+    def test_objects_are_kept_apart(self):
+        first = Thing()
+        second = Thing()
+        self.writer.set(first, "text", "a")
+        self.assertTrue(self.writer.set(second, "text", "a"))
+
+    def test_dims_colors(self):
+        thing = Thing()
+        palette = Cells([0, 0])
+        self.writer.set(thing, "color", 0x8040FF)
+        self.writer.set(thing, "text", "12")
+        self.writer.set_color_item(palette, 1, 0xFF0000)
+        self.assertTrue(self.writer.set_level(0.5))
+        self.assertEqual(thing.color, 0x40207F)
+        self.assertEqual(palette[1], 0x7F0000)
+        self.assertEqual(thing.text, "12")
+
+        # Remembered undimmed, so the same color isn't written again.
+        self.assertFalse(self.writer.set(thing, "color", 0x8040FF))
+        self.writer.set_level(1)
+        self.assertEqual(thing.color, 0x8040FF)
+        self.assertEqual(palette[1], 0xFF0000)
+
+
+if __name__ == "__main__":
+    unittest.main()
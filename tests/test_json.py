@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import util_json
+
+DOCUMENT = {
+    "timeZone": "America/Chicago",
+    "currentUtcOffset": {"seconds": -18000, "milliseconds": -18000000},
+    "dstInterval": {"dstStart": "2024-03-10T08:00:00Z", "dstEnd": "2024-11-03T07:00:00Z"},
+    "note": "a \"quoted\" \\ string with { [ , : ] } in it",
+    "escaped \"key\"": 1,
+    "locations": [
+        {"tz_abbr": "MSN", "latitude": 43.07, "longitude": -89.4, "tags": [1, [2, 3], {"a": None}]},
+        {"tz_abbr": "Zürich", "latitude": 47.37, "longitude": 8.54, "tags": []},
+    ],
+    "flags": [True, False, None],
+}
+PATHS = ("timeZone", "currentUtcOffset.seconds", "dstInterval.dstEnd", "note", "locations.*", "flags.*")
+
+
+# A response that hands out body in chunks of the given size.
+class Response():
+    def __init__(self, body, size):
+        self.body = body
+        self.size = size
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), self.size):
+            yield self.body[start:start + self.size]
+
+
+def djb2(data):
+    checksum = 0
+    for b in data:
+        checksum = ((checksum << 5) + checksum + b) & 0xFFFFFF
+    return checksum
+
+
+class ExtractorTest(unittest.TestCase):
+    def setUp(self):
+        self.body = json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8")
+
+    def check(self, results):
+        self.assertEqual(results["timeZone"], "America/Chicago")
+        self.assertEqual(results["currentUtcOffset.seconds"], -18000)
+        self.assertEqual(results["dstInterval.dstEnd"], "2024-11-03T07:00:00Z")
+        self.assertEqual(results["note"], DOCUMENT["note"])
+        self.assertEqual(results["locations.*"], DOCUMENT["locations"])
+        self.assertEqual(results["flags.*"], [True, False, None])
+
+    def test_every_chunk_size(self):
+        # Keys, strings, escapes and numbers split at every possible place.
+        for size in range(1, 40):
+            fields = util_json.Extractor(PATHS)
+            for start in range(0, len(self.body), size):
+                fields.feed(self.body[start:start + size])
+            self.check(fields.results)
+
+    def test_read(self):
+        self.check(util_json.extract(Response(self.body, 7), PATHS))
+
+    def test_compact_and_spaced(self):
+        for body in (json.dumps(DOCUMENT, separators=(",", ":")), json.dumps(DOCUMENT, indent=4)):
+            self.check(util_json.extract(Response(body.encode("utf-8"), 5), PATHS))
+
+    def test_on_item(self):
+        items = []
+        fields = util_json.Extractor(PATHS, lambda path, value: items.append((path, value)))
+        fields.feed(self.body)
+        self.assertEqual(fields.results["locations.*"], [])
+        self.assertEqual([value for path, value in items if path == "locations.*"], DOCUMENT["locations"])
+        self.assertEqual([value for path, value in items if path == "flags.*"], [True, False, None])
+
+    def test_nested_paths(self):
+        body = b'{"a": {"b": [{"c": 1}, {"c": 2}], "d": {"e": {"f": [10, 20]}}}, "b": {"c": 3}}'
+        results = util_json.extract(Response(body, 3), ("a.d.e.f", "b.c"))
+        self.assertEqual(results, {"a.d.e.f": [10, 20], "b.c": 3})
+        # "*" only matches array elements.
+        results = util_json.extract(Response(body, 3), ("a.*", "a.b.*"))
+        self.assertEqual(results, {"a.*": [], "a.b.*": [{"c": 1}, {"c": 2}]})
+
+    def test_missing_paths_are_left_out(self):
+        results = util_json.extract(Response(b'{"timeZone": "UTC", "dstInterval": null}', 4),
+            ("timeZone", "dstInterval.dstStart"))
+        self.assertEqual(results, {"timeZone": "UTC"})
+
+    def test_stops_once_found(self):
+        body = b'{"timeZone": "UTC", "rest": "' + b"x" * 1000 + b'"}'
+        fields = util_json.Extractor(("timeZone",))
+        fields.read(Response(body, 16))
+        self.assertTrue(fields.done)
+        # Only the first chunk or two were read.
+        self.assertEqual(fields.checksum, djb2(body[:32]))
+
+    def test_checksum(self):
+        fields = util_json.Extractor(PATHS)
+        for start in range(0, len(self.body), 9):
+            fields.feed(self.body[start:start + 9])
+        self.assertEqual(fields.checksum, djb2(self.body))
+
+        other = util_json.Extractor(PATHS)
+        other.feed(self.body.replace(b"43.07", b"43.08"))
+        self.assertNotEqual(other.checksum, fields.checksum)
+
+
+if __name__ == "__main__":
+    unittest.main()
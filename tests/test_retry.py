@@ -0,0 +1,55 @@
+import errno
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import util_retry
+
+
+class EndpointTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        self.endpoint = util_retry.Endpoint("api", 10, 60, 3, timeout_s=1, max_timeout_s=8)
+
+    def test_timeouts_lengthen_it(self):
+        for expected in (2, 4, 8, 8):
+            self.endpoint.failure(timed_out=True)
+            self.assertEqual(self.endpoint.timeout_s, expected)
+
+    def test_other_failures_leave_it(self):
+        self.endpoint.failure()
+        self.assertEqual(self.endpoint.timeout_s, 1)
+
+    def test_success_brings_it_down(self):
+        for n in range(3):
+            self.endpoint.failure(timed_out=True)
+        # A slow service that answered keeps the timeout it needed.
+        self.endpoint.success(5)
+        self.assertEqual(self.endpoint.timeout_s, 8)
+        self.endpoint.success(1.5)
+        self.assertEqual(self.endpoint.timeout_s, 3)
+        self.endpoint.success(0.2)
+        self.assertEqual(self.endpoint.timeout_s, 1)
+
+    def test_with_block(self):
+        with self.assertRaises(TimeoutError):
+            with self.endpoint:
+                raise TimeoutError("timed out")
+        self.assertEqual(self.endpoint.timeout_s, 2)
+        self.assertEqual(self.endpoint.failures, 1)
+        self.endpoint.retry_at = 0
+        with self.endpoint:
+            pass
+        self.assertEqual(self.endpoint.failures, 0)
+        self.assertEqual(self.endpoint.timeout_s, 1)
+
+    def test_is_timeout(self):
+        self.assertTrue(util_retry.is_timeout(TimeoutError()))
+        self.assertTrue(util_retry.is_timeout(OSError(errno.ETIMEDOUT)))
+        self.assertFalse(util_retry.is_timeout(OSError(errno.ECONNRESET)))
+        self.assertFalse(util_retry.is_timeout(RuntimeError("HTTP 503")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import util_retry
+import util_scheduler
+
+
+# A monotonic clock that only moves when told to.
+class FakeClock():
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = util_scheduler.Scheduler(clock=self.clock)
+        self.ran = []
+
+    # A callback that records its runs and comes back every interval seconds.
+    def every(self, name, interval):
+        def callback(now):
+            self.ran.append((name, now))
+            return now + interval
+        return callback
+
+    # Runs everything due, like the main loop.
+    def run_due(self):
+        while self.scheduler.run_next():
+            pass
+
+    def test_runs_in_deadline_order(self):
+        self.scheduler.add("slow", self.every("slow", 30), delay=20)
+        self.scheduler.add("fast", self.every("fast", 10), delay=5)
+        for step in range(6):
+            self.clock.advance(10)
+            self.run_due()
+        # At 20 and 50 both are due, and the one scheduled first runs first.
+        self.assertEqual([name for name, now in self.ran], ["fast", "slow", "fast", "fast", "fast", "slow", "fast", "fast"])
+
+    def test_nothing_due(self):
+        self.scheduler.add("task", self.every("task", 10), delay=5)
+        self.assertFalse(self.scheduler.run_next())
+        self.assertEqual(self.scheduler.sleep_time(), 5)
+        self.clock.advance(5)
+        self.assertTrue(self.scheduler.run_next())
+        self.assertEqual(self.scheduler.sleep_time(), 10)
+
+    def test_none_stops_the_task(self):
+        self.scheduler.add("once", lambda now: None)
+        self.assertTrue(self.scheduler.run_next())
+        self.assertIsNone(self.scheduler.next_deadline())
+        self.assertIsNone(self.scheduler.sleep_time())
+
+    def test_run_soon(self):
+        self.scheduler.add("task", self.every("task", 60), delay=60)
+        self.scheduler.run_soon("task")
+        self.assertTrue(self.scheduler.run_next())
+        # The old deadline is skipped, not run again.
+        self.clock.advance(60)
+        self.run_due()
+        self.assertEqual(len(self.ran), 2)
+        self.assertEqual(self.scheduler.next_deadline(), self.clock() + 60)
+
+    def test_callback_reschedules_itself(self):
+        def callback(now):
+            self.scheduler.schedule(task, now + 7)
+            return now + 100
+        task = self.scheduler.add("task", callback)
+        self.scheduler.run_next()
+        self.assertEqual(task.deadline, self.clock() + 7)
+
+    def test_failure_backs_off(self):
+        def callback(now):
+            raise RuntimeError("no network")
+        task = self.scheduler.add("task", callback, retry_s=10, max_retry_s=40)
+        delays = []
+        for n in range(4):
+            with self.assertRaises(RuntimeError):
+                self.scheduler.run_next()
+            delays.append(self.scheduler.sleep_time())
+            self.clock.advance(delays[-1])
+        self.assertEqual(task.failures, 4)
+        # Up to a quarter is taken off each delay at random.
+        for delay, full in zip(delays, (10, 20, 40, 40)):
+            self.assertGreaterEqual(delay, full * 0.75)
+            self.assertLessEqual(delay, full)
+
+    def test_retry_at_holds_off(self):
+        def callback(now):
+            raise util_retry.CircuitOpenError("api", self.clock() + 300)
+        self.scheduler.add("task", callback, retry_s=10)
+        with self.assertRaises(util_retry.CircuitOpenError):
+            self.scheduler.run_next()
+        self.assertEqual(self.scheduler.sleep_time(), 300)
+
+    def test_success_resets_failures(self):
+        results = [RuntimeError("down"), 50]
+        def callback(now):
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return now + result
+        task = self.scheduler.add("task", callback, retry_s=10)
+        with self.assertRaises(RuntimeError):
+            self.scheduler.run_next()
+        self.clock.advance(10)
+        self.assertTrue(self.scheduler.run_next())
+        self.assertEqual(task.failures, 0)
+        self.assertEqual(self.scheduler.sleep_time(), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import util_time
+
+# 2023-02-17T14:35:27Z
+EXAMPLE = 1676644527
+
+
+class ParseTimeTest(unittest.TestCase):
+    def test_utc(self):
+        self.assertEqual(util_time.parse_time("2023-02-17T14:35:27"), EXAMPLE)
+        self.assertEqual(util_time.parse_time("2023-02-17T14:35:27Z"), EXAMPLE)
+        self.assertEqual(util_time.parse_time("2023-02-17T14:35:27.123456Z"), EXAMPLE)
+
+    def test_offsets(self):
+        self.assertEqual(util_time.parse_time("2023-02-17T08:35:27-06:00"), EXAMPLE)
+        self.assertEqual(util_time.parse_time("2023-02-17T20:05:27+05:30"), EXAMPLE)
+        self.assertEqual(util_time.parse_time("2023-02-17T20:05:27.5+0530"), EXAMPLE)
+        self.assertEqual(util_time.parse_time("2023-02-17T15:35:27+01"), EXAMPLE)
+
+    def test_malformed(self):
+        self.assertEqual(util_time.parse_time(""), 0)
+        self.assertEqual(util_time.parse_time("2023-02-17"), 0)
+        self.assertEqual(util_time.parse_time("2023-0a-17T14:35:27"), 0)
+        self.assertEqual(util_time.parse_time("2023-02-17T14:35:27+0a:00"), 0)
+        self.assertEqual(util_time.parse_time("2023-02-17T14:35:27+05:x0"), 0)
+        self.assertEqual(util_time.parse_time("2023-02-17T14:35:27-"), 0)
+
+
+class CivilDaysTest(unittest.TestCase):
+    def test_round_trip(self):
+        for days in (-1, 0, 59, 365, 11016, 19723, 20000, 50000):
+            self.assertEqual(util_time.days_from_civil(*util_time.civil_from_days(days)), days)
+
+    def test_known_days(self):
+        self.assertEqual(util_time.days_from_civil(1970, 1, 1), 0)
+        self.assertEqual(util_time.days_from_civil(2000, 3, 1), 11017)
+        self.assertEqual(util_time.days_from_civil(2024, 2, 29), 19782)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import util_time
+import util_tz
+
+HOUR = 60 * 60
+
+
+# UTC seconds at a UTC date and time.
+def utc(year, month, day, hour=0, minute=0):
+    return util_time.days_from_civil(year, month, day) * 24 * HOUR + hour * HOUR + minute * 60
+
+
+class TzRuleTest(unittest.TestCase):
+    # Checks each side of each of a year's changes.
+    def assert_changes(self, rule, year, start, end):
+        self.assertEqual(rule.transitions(year), (start, end))
+        for change, before, after in ((start, rule.std_offset, rule.dst_offset), (end, rule.dst_offset, rule.std_offset)):
+            self.assertEqual(rule.utc_offset(change - 1), before)
+            self.assertEqual(rule.utc_offset(change), after)
+            self.assertEqual(rule.next_transition(change - 1), change)
+
+    def test_northern(self):
+        rule = util_tz.TzRule("CST6CDT,M3.2.0,M11.1.0")
+        self.assertEqual((rule.std_name, rule.dst_name), ("CST", "CDT"))
+        self.assertEqual((rule.std_offset, rule.dst_offset), (-6 * HOUR, -5 * HOUR))
+        # 2:00 CST on March 10, and 2:00 CDT on November 3.
+        self.assert_changes(rule, 2024, utc(2024, 3, 10, 8), utc(2024, 11, 3, 7))
+        self.assertFalse(rule.is_dst(utc(2024, 1, 15)))
+        self.assertTrue(rule.is_dst(utc(2024, 7, 4)))
+
+    def test_last_week_and_time(self):
+        rule = util_tz.TzRule("CET-1CEST,M3.5.0,M10.5.0/3")
+        self.assert_changes(rule, 2024, utc(2024, 3, 31, 1), utc(2024, 10, 27, 1))
+        # March 2026 has five Sundays, March 2025 only has five Mondays.
+        self.assertEqual(rule.transitions(2025)[0], utc(2025, 3, 30, 1))
+        self.assertEqual(rule.transitions(2026)[0], utc(2026, 3, 29, 1))
+
+    def test_southern(self):
+        rule = util_tz.TzRule("AEST-10AEDT,M10.1.0,M4.1.0/3")
+        # DST ends at 3:00 AEDT on April 7 and starts at 2:00 AEST on October 6.
+        self.assert_changes(rule, 2024, utc(2024, 10, 5, 16), utc(2024, 4, 6, 16))
+        self.assertTrue(rule.is_dst(utc(2024, 1, 15)))
+        self.assertFalse(rule.is_dst(utc(2024, 7, 4)))
+        self.assertTrue(rule.is_dst(utc(2024, 12, 25)))
+        # Over the new year the interval pairs one year's start with the next year's end.
+        self.assertEqual(rule.dst_interval(utc(2024, 12, 25)), (utc(2024, 10, 5, 16), utc(2025, 4, 5, 16)))
+        self.assertEqual(rule.dst_interval(utc(2025, 1, 15)), (utc(2024, 10, 5, 16), utc(2025, 4, 5, 16)))
+        self.assertEqual(rule.next_transition(utc(2024, 12, 25)), utc(2025, 4, 5, 16))
+
+    def test_negative_times(self):
+        # Greenland changed at 1:00 UTC, which is the day before in local time.
+        rule = util_tz.TzRule("<-03>3<-02>,M3.5.0/-2,M10.5.0/-1")
+        self.assertEqual((rule.std_name, rule.dst_name), ("-03", "-02"))
+        self.assert_changes(rule, 2024, utc(2024, 3, 31, 1), utc(2024, 10, 27, 1))
+
+    def test_times_past_24_hours(self):
+        # Israel: the Friday before the last Sunday in March, given as Thursday at 26:00.
+        rule = util_tz.TzRule("IST-2IDT,M3.4.4/26,M10.5.0")
+        self.assert_changes(rule, 2024, utc(2024, 3, 29, 0), utc(2024, 10, 26, 23))
+
+    def test_no_dst(self):
+        rule = util_tz.TzRule("JST-9")
+        self.assertFalse(rule.has_dst())
+        self.assertEqual(rule.utc_offset(utc(2024, 7, 4)), 9 * HOUR)
+        self.assertEqual(rule.transitions(2024), (0, 0))
+        self.assertEqual(rule.next_transition(utc(2024, 7, 4)), 0)
+        self.assertEqual(rule.dst_interval(utc(2024, 7, 4)), (0, 0))
+
+    def test_offsets_with_minutes(self):
+        self.assertEqual(util_tz.TzRule("<+0330>-3:30").std_offset, 3 * HOUR + 30 * 60)
+        self.assertEqual(util_tz.TzRule("<-0930>9:30").std_offset, -(9 * HOUR + 30 * 60))
+        rule = util_tz.TzRule("<+1030>-10:30<+11>-11,M10.1.0,M4.1.0")
+        self.assertEqual((rule.std_offset, rule.dst_offset), (10 * HOUR + 30 * 60, 11 * HOUR))
+
+    def test_defaults(self):
+        # DST an hour ahead, on the US rules.
+        rule = util_tz.TzRule("EST5EDT")
+        self.assertEqual(rule.dst_offset, -4 * HOUR)
+        self.assertEqual(rule.transitions(2024), (utc(2024, 3, 10, 7), utc(2024, 11, 3, 6)))
+
+    def test_julian_days(self):
+        # J60 is March 1 whether or not there's a February 29. 59 counts from 0, so it's
+        # March 1 in a common year and February 29 in a leap year.
+        rule = util_tz.TzRule("XST0XDT,J60/0,59/0")
+        self.assertEqual(rule.transitions(2023)[0], utc(2023, 3, 1))
+        self.assertEqual(rule.transitions(2024)[0], utc(2024, 3, 1))
+        self.assertEqual(rule.transitions(2023)[1], utc(2023, 3, 1) - HOUR)
+        self.assertEqual(rule.transitions(2024)[1], utc(2024, 2, 29) - HOUR)
+
+    def test_bad_rules(self):
+        for posix in ("X5", "CST6CDT,M3.2", "CST6CDT,M3.2.0", "CST6CDT,M3.2.0,", "CST", "<+03", ""):
+            with self.assertRaises(ValueError):
+                util_tz.TzRule(posix)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Compares the per-tick cost of the Label and atlas clock lines.
+#
+# Copy this next to code.py on the board and run "import bench_clockline"
+# from the REPL. It draws into a group that isn't shown, so it doesn't need
+# the matrix.
+
+import gc
+import time
+import displayio
+import terminalio
+from adafruit_bitmap_font import bitmap_font
+from appconfig import appconfig
+from clock_line import ClockLine
+from clock_line_atlas import AtlasClockLine
+
+# Small enough that the heap doesn't fill with the collector off.
+TICKS = 120
+COLORS = (0xFF0000, 0x85FF00)
+
+
+def bench(name, line_class, font):
+    group = displayio.Group()
+    line = line_class(font, 10, terminalio.FONT, 9, group)
+
+    gc.collect()
+    # Keep the collector out of the way so every allocation shows up.
+    gc.disable()
+    alloc_start = gc.mem_alloc()
+    start = time.monotonic_ns()
+    for tick in range(TICKS):
+        # One simulated second: minutes roll every 60 ticks, color every 60.
+        now = (2024, 1, 1, (tick // 3600) % 24, (tick // 60) % 60, tick % 60, 0, 1, -1)
+        line.SetClockColor(COLORS[(tick // 60) % 2])
+        line.SetTime(now, False)
+    elapsed_ns = time.monotonic_ns() - start
+    alloc = gc.mem_alloc() - alloc_start
+    gc.enable()
+
+    print("{name}: {us} us/tick, {bytes} bytes allocated/tick".format(
+        name=name, us=elapsed_ns // TICKS // 1000, bytes=alloc // TICKS))
+
+
+font = bitmap_font.load_font(appconfig["clock_font"])
+bench("label", ClockLine, font)
+bench("atlas", AtlasClockLine, font)
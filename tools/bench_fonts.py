@@ -0,0 +1,32 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Compares load time and memory for BDF fonts and their binary subsets.
+#
+# Make the .bin files with tools/font2bin.py, copy this next to code.py on
+# the board and run "import bench_fonts" from the REPL. Each font in
+# appconfig is loaded both ways if both files are there.
+
+from appconfig import appconfig
+import util_font
+
+# Characters each font needs. The label font also draws zone names and status codes.
+FONTS = (
+    ("clock_font", "0123456789: "),
+    ("label_font", "0123456789: ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz?."),
+)
+
+for key, chars in FONTS:
+    path = appconfig[key]
+    if not (path.endswith(".bdf") or path.endswith(".bin")):
+        print("{}: {} is built in, nothing to compare".format(key, path))
+        continue
+
+    base = path[:-4]
+    for ext in (".bdf", ".bin"):
+        try:
+            # load_font prints the time and bytes used.
+            util_font.load_font(base + ext, chars)
+        except OSError as e:
+            print("{}: {}".format(base + ext, e))
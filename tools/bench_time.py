@@ -0,0 +1,77 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Compares the old and new ways of getting zone times and parsing timestamps.
+#
+# Copy this next to code.py on the board and run "import bench_time" from the
+# REPL. It also runs on a desktop Python with src on the path.
+
+import gc
+import re
+import time
+import util_time
+
+# Ticks per run. Each tick works out the time in every zone, like a frame.
+TICKS = 300
+ZONE_OFFSETS = (-5 * 3600, -8 * 3600, -7 * 3600, 2 * 3600)
+TIMESTAMPS = ("2026-03-08T08:00:00Z", "2026-11-01T07:00:00.1234567Z", "2026-03-29T03:00:00+02:00")
+PARSES = 300
+
+
+# How update_time() worked before: two RTC reads and a localtime per zone.
+def old_tick(start):
+    for offset in ZONE_OFFSETS:
+        now_utc_s = time.mktime(time.localtime())
+        now = time.localtime(now_utc_s + offset)
+
+
+# Reading the RTC once, then the cached local time for each zone.
+def new_tick(service):
+    service.tick()
+    for offset in ZONE_OFFSETS:
+        now = service.local(offset)
+
+
+# The regex parser that util_time.parse_time() replaced.
+def old_parse_time(value):
+    result = 0
+
+    m = re.search(r"(\d*)-(\d*)-(\d*)T(\d*):(\d*):(\d*)", value)
+    if m:
+        t = (
+            int(m.group(1)), int(m.group(2)), int(m.group(3)),
+            int(m.group(4)), int(m.group(5)), int(m.group(6)),
+            -1, -1, -1,
+        )
+
+        result = time.mktime(t)
+
+    return result
+
+
+def bench(name, count, function, arg):
+    gc.collect()
+    # Keep the collector out of the way so every allocation shows up.
+    gc.disable()
+    alloc_start = gc.mem_alloc() if hasattr(gc, "mem_alloc") else 0
+    start = time.monotonic_ns()
+    for idx in range(count):
+        function(arg)
+    elapsed_ns = time.monotonic_ns() - start
+    alloc = (gc.mem_alloc() if hasattr(gc, "mem_alloc") else 0) - alloc_start
+    gc.enable()
+
+    print("{name}: {us} us each, {bytes} bytes allocated each".format(
+        name=name, us=elapsed_ns // count // 1000, bytes=alloc // count))
+
+
+def parse_all(parser):
+    for value in TIMESTAMPS:
+        parser(value)
+
+
+bench("zone times, localtime per zone", TICKS, old_tick, None)
+bench("zone times, TimeService", TICKS, new_tick, util_time.TimeService())
+bench("parse 3 timestamps, regex", PARSES, parse_all, old_parse_time)
+bench("parse 3 timestamps, fixed fields", PARSES, parse_all, util_time.parse_time)
@@ -0,0 +1,189 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Serves the clock's config, with a zone bundle, for secrets["config_endpoint"].
+#
+# The config is a JSON file like the config feed's value, with a tz_name for
+# the user's location and every other one:
+#
+#     {"latitude": 41.9, "longitude": -87.6, "tz_name": "America/Chicago",
+#      "locations": [{"descr": "Tokyo", "latitude": 35.7, "longitude": 139.7,
+#                     "tz_abbr": "TYO", "tz_name": "Asia/Tokyo"}, ...]}
+#
+# The reply adds a "bundle" with each zone's UTC offset, DST window and a few
+# days of sunrise/sunset, worked out here, so the clocks don't have to ask
+# timeapi.io or compute the almanac. The bundle is cached in a file and only
+# rebuilt once a day or when the config changes, so any number of clocks can
+# poll it. Replies carry an ETag, so a poll with nothing new is a 304.
+#
+# usage: python3 tools/bundle_server.py config.json [--port 8080] [--days 3] [--cache bundle.json]
+#        python3 tools/bundle_server.py config.json --print
+
+import argparse
+import datetime
+import hashlib
+import http.server
+import json
+import os
+import sys
+import time
+import zoneinfo
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import util_almanac
+
+SECONDS_PER_DAY = 24 * 60 * 60
+# Rebuild the bundle this long after it was built.
+REBUILD_S = SECONDS_PER_DAY
+# How far back and ahead to look for DST changes.
+SEARCH_DAYS = 400
+
+
+def utc_offset(tz, utc_s):
+    return int(datetime.datetime.fromtimestamp(utc_s, tz).utcoffset().total_seconds())
+
+
+# First second with the new offset, between low (old offset) and high (new offset).
+def _find_change(tz, low, high):
+    before = utc_offset(tz, low)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if utc_offset(tz, middle) == before:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+# (dst_start, dst_end) of the DST interval in effect at utc_s or the next one,
+# like timeapi.io's dstInterval. (0, 0) for zones without DST.
+def dst_interval(tz, utc_s):
+    changes = []
+    day = utc_s - SEARCH_DAYS * SECONDS_PER_DAY
+    previous = utc_offset(tz, day)
+    while day < utc_s + SEARCH_DAYS * SECONDS_PER_DAY:
+        day += SECONDS_PER_DAY
+        current = utc_offset(tz, day)
+        if current != previous:
+            changes.append((_find_change(tz, day - SECONDS_PER_DAY, day), current > previous))
+            previous = current
+
+    for start, is_start in changes:
+        if not is_start:
+            continue
+        ends = [t for t, is_end in changes if not is_end and t > start]
+        if ends and ends[0] > utc_s:
+            return start, ends[0]
+    return 0, 0
+
+
+# One bundle entry: [tz_name, utc_offset, dst_start, dst_end, [[sunrise, sunset], ...]].
+def zone_entry(latitude, longitude, tz_name, utc_s, days):
+    tz = zoneinfo.ZoneInfo(tz_name)
+    offset = utc_offset(tz, utc_s)
+    dst_start, dst_end = dst_interval(tz, utc_s)
+    sun = util_almanac.sun_table(latitude, longitude, utc_s, offset, days)
+    return [tz_name, offset, dst_start, dst_end, [list(day) for day in sun]]
+
+
+# The bundle for a config at utc_s. zones[0] is the user's location, then one
+# per entry in "locations", in order. Offsets are good until valid_until or
+# the next DST change, whichever is first.
+def build_bundle(config, utc_s, days):
+    places = [config] + config.get("locations", [])
+    zones = []
+    for place in places:
+        if not place.get("tz_name"):
+            raise ValueError("no tz_name for {}".format(place.get("descr", "the user's location")))
+        zones.append(zone_entry(place["latitude"], place["longitude"], place["tz_name"], utc_s, days))
+    return {
+        "built": utc_s,
+        "valid_until": utc_s + days * SECONDS_PER_DAY,
+        "zones": zones,
+    }
+
+
+# What the clock is sent: the config, less the server-only fields, plus the bundle.
+def build_reply(config, utc_s, days):
+    reply = {
+        "latitude": config["latitude"],
+        "longitude": config["longitude"],
+        "locations": config.get("locations", []),
+        "bundle": build_bundle(config, utc_s, days),
+    }
+    return json.dumps(reply, separators=(",", ":"))
+
+
+class BundleCache():
+    def __init__(self, config_file, cache_file, days):
+        self.config_file = config_file
+        self.cache_file = cache_file
+        self.days = days
+
+    # The reply body and its ETag, rebuilt if it's stale or the config changed.
+    def reply(self):
+        now = int(time.time())
+        if os.path.exists(self.cache_file):
+            cached_at = os.path.getmtime(self.cache_file)
+            if cached_at >= os.path.getmtime(self.config_file) and now - cached_at < REBUILD_S:
+                with open(self.cache_file) as f:
+                    body = f.read()
+                return body, _etag(body)
+
+        with open(self.config_file) as f:
+            config = json.load(f)
+        body = build_reply(config, now, self.days)
+        with open(self.cache_file, "w") as f:
+            f.write(body)
+        print("built bundle for {} zones, {} bytes".format(len(config.get("locations", [])) + 1, len(body)), file=sys.stderr)
+        return body, _etag(body)
+
+
+def _etag(body):
+    return '"{}"'.format(hashlib.sha1(body.encode("utf-8")).hexdigest()[:16])
+
+
+def make_handler(cache):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            body, etag = cache.reply()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the clock config with a zone bundle.")
+    parser.add_argument("config", help="config JSON file")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--days", type=int, default=3, help="days of sunrise/sunset per zone")
+    parser.add_argument("--cache", help="where to keep the built reply (default: next to the config)")
+    parser.add_argument("--print", action="store_true", help="print the reply and exit, for static hosting")
+    args = parser.parse_args()
+
+    cache_file = args.cache or os.path.splitext(args.config)[0] + ".bundle.json"
+    cache = BundleCache(args.config, cache_file, args.days)
+    if args.print:
+        print(cache.reply()[0])
+        return
+
+    server = http.server.HTTPServer(("", args.port), make_handler(cache))
+    print("serving {} on port {}".format(args.config, args.port))
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Converts a BDF font to the compact binary format read by src/util_binfont.py,
+# keeping only the characters the clock draws.
+#
+# usage: python3 tools/font2bin.py font.bdf font.bin ["characters"]
+#
+# The default characters are the digits, ':' and space, which is all the
+# clock font needs. A label font needs the zone names and status codes too.
+
+import struct
+import sys
+
+# Keep in step with src/util_binfont.py.
+MAGIC = b"MZF1"
+HEADER_FORMAT = "<4sHbbbbbb"
+INDEX_FORMAT = "<HBBbbbxH"
+
+DEFAULT_CHARS = "0123456789: "
+
+
+def read_bdf(path):
+    font = {"ascent": 0, "descent": 0, "bbox": (0, 0, 0, 0), "glyphs": {}}
+    glyph = None
+    rows = None
+
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            key = parts[0]
+
+            if rows is not None:
+                if key == "ENDCHAR":
+                    glyph["rows"] = rows
+                    font["glyphs"][glyph["code"]] = glyph
+                    glyph = None
+                    rows = None
+                else:
+                    # Each row is already padded to whole bytes, MSB first.
+                    rows.append(bytes.fromhex(key))
+            elif key == "FONT_ASCENT":
+                font["ascent"] = int(parts[1])
+            elif key == "FONT_DESCENT":
+                font["descent"] = int(parts[1])
+            elif key == "FONTBOUNDINGBOX":
+                font["bbox"] = tuple(int(p) for p in parts[1:5])
+            elif key == "STARTCHAR":
+                glyph = {}
+            elif glyph is not None and key == "ENCODING":
+                glyph["code"] = int(parts[1])
+            elif glyph is not None and key == "DWIDTH":
+                glyph["shift_x"] = int(parts[1])
+            elif glyph is not None and key == "BBX":
+                glyph["width"], glyph["height"], glyph["dx"], glyph["dy"] = (int(p) for p in parts[1:5])
+            elif glyph is not None and key == "BITMAP":
+                rows = []
+
+    return font
+
+
+# Packs a glyph's rows MSB first, ceil(width / 8) bytes per row, like BDF.
+def pack_rows(glyph):
+    stride = (glyph["width"] + 7) // 8
+    return b"".join(row[:stride] for row in glyph["rows"][:glyph["height"]])
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("usage: font2bin.py font.bdf font.bin [characters]")
+        sys.exit(1)
+
+    chars = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_CHARS
+    font = read_bdf(sys.argv[1])
+
+    codes = sorted(set(ord(c) for c in chars))
+    missing = [chr(c) for c in codes if c not in font["glyphs"]]
+    if missing:
+        print("not in font, skipped: {}".format("".join(missing)))
+    codes = [c for c in codes if c in font["glyphs"]]
+
+    index = bytearray()
+    bitmaps = bytearray()
+    for code in codes:
+        glyph = font["glyphs"][code]
+        index += struct.pack(INDEX_FORMAT, code, glyph["width"], glyph["height"],
+            glyph["dx"], glyph["dy"], glyph["shift_x"], len(bitmaps))
+        bitmaps += pack_rows(glyph)
+
+    bb_w, bb_h, bb_x, bb_y = font["bbox"]
+    header = struct.pack(HEADER_FORMAT, MAGIC, len(codes), font["ascent"], font["descent"], bb_w, bb_h, bb_x, bb_y)
+
+    with open(sys.argv[2], "wb") as f:
+        f.write(header)
+        f.write(index)
+        f.write(bitmaps)
+
+    print("{} glyphs, {} bytes".format(len(codes), len(header) + len(index) + len(bitmaps)))
+
+
+if __name__ == "__main__":
+    main()
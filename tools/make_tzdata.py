@@ -0,0 +1,52 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Builds src/tzdata.txt from the host's tz database.
+#
+# Each line is an IANA zone name and the POSIX TZ rule from the footer of its
+# TZif file. The clock uses these to work out UTC offsets and DST changes
+# without calling a web API.
+#
+# usage: python3 tools/make_tzdata.py [zoneinfo_dir] [output_file]
+
+import os
+import sys
+import zoneinfo
+
+
+def posix_rule(path):
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if not data.startswith(b"TZif"):
+        return None
+
+    # Version 2+ files end with "\n<POSIX TZ>\n".
+    footer = data.rstrip(b"\n").rsplit(b"\n", 1)
+    if len(footer) != 2 or not footer[1]:
+        return None
+
+    return footer[1].decode("ascii")
+
+
+def main():
+    zoneinfo_dir = sys.argv[1] if len(sys.argv) > 1 else "/usr/share/zoneinfo"
+    output = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(__file__), "..", "src", "tzdata.txt")
+
+    count = 0
+    with open(output, "w") as out:
+        for name in sorted(zoneinfo.available_timezones()):
+            if "/" not in name or name.startswith(("posix/", "right/", "SystemV/")):
+                # Skip legacy aliases like "EST5EDT" and duplicate trees.
+                continue
+            rule = posix_rule(os.path.join(zoneinfo_dir, name))
+            if rule:
+                out.write("{} {}\n".format(name, rule))
+                count += 1
+
+    print("wrote {} zones to {}".format(count, output))
+
+
+if __name__ == "__main__":
+    main()
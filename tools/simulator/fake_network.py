@@ -0,0 +1,275 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# A fake web and a stand-in for the MatrixPortal Network object.
+#
+# Requests cost virtual time (a TLS handshake on a new connection, plus a
+# round trip), so blocking calls show up as display stalls just like on the
+# board. Outage windows make requests fail the way the ESP32 does.
+
+import datetime
+import json
+import time as host_time
+import zoneinfo
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class FakeResponse():
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = body.encode("utf-8") if isinstance(body, str) else body
+        self.closed = False
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for idx in range(0, len(self.content), chunk_size):
+            yield self.content[idx:idx + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+# Counters for one host.
+class HostStats():
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.handshakes = 0
+        self.bytes = 0
+        self.time_s = 0.0
+
+
+class FakeWeb():
+    def __init__(self, clock, scenario):
+        self.clock = clock
+        self.scenario = scenario
+        self.hosts = {}
+        self.feed_pushes = []
+        # Extra faults the scenario can inject: host -> list of exceptions to raise, in order.
+        self.faults = {}
+
+    def host_stats(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = HostStats()
+        return self.hosts[host]
+
+    def in_outage(self):
+        for start, end in self.scenario.outages:
+            if start <= self.clock.now < end:
+                return True
+        return False
+
+    # Spends the virtual time a request takes and raises if the network is down.
+    # new_connection: True if this request needs a TLS handshake first.
+    def _spend(self, host, new_connection, timeout):
+        stats = self.host_stats(host)
+        stats.requests += 1
+        start = self.clock.now
+
+        if self.in_outage():
+            # Wait out the timeout, then fail.
+            self.clock.advance(min(timeout, self.scenario.latency_s * 4))
+            stats.failures += 1
+            stats.time_s += self.clock.now - start
+            raise ConnectionError("simulated outage")
+
+        if self.faults.get(host):
+            error = self.faults[host].pop(0)
+            self.clock.advance(self.scenario.latency_s)
+            stats.failures += 1
+            stats.time_s += self.clock.now - start
+            raise error
+
+        if new_connection:
+            stats.handshakes += 1
+            self.clock.advance(self.scenario.handshake_s)
+        latency_s = self.scenario.latency_s_for(host)
+        if latency_s > timeout:
+            # The socket times out waiting for the response.
+            self.clock.advance(timeout)
+            stats.failures += 1
+            stats.time_s += self.clock.now - start
+            raise TimeoutError("simulated timeout")
+        self.clock.advance(latency_s)
+        stats.time_s += self.clock.now - start
+
+    def request(self, session, method, url, data=None, json=None, headers=None, timeout=60):
+        host, path, query = split_url(url)
+        last_used = session._open_sockets.get(host)
+        if last_used is not None and self.clock.now - last_used > self.scenario.server_idle_s:
+            # The server closed the connection while it sat idle. The ESP32
+            # only finds out on the next send.
+            session._open_sockets.pop(host)
+            stats = self.host_stats(host)
+            stats.requests += 1
+            stats.failures += 1
+            raise BrokenPipeError("simulated connection closed by server")
+        new_connection = last_used is None
+        try:
+            self._spend(host, new_connection, timeout)
+        except Exception:
+            session._open_sockets.pop(host, None)
+            raise
+        session._open_sockets[host] = self.clock.now
+
+        response = self.route(host, path, query, headers or {})
+        self.host_stats(host).bytes += len(response.content)
+        return response
+
+    def route(self, host, path, query, headers):
+        for start, end in self.scenario.host_errors.get(host, ()):
+            if start <= self.clock.now < end:
+                self.host_stats(host).failures += 1
+                return FakeResponse(503, "service unavailable")
+
+        if host == "www.timeapi.io" and path == "/api/timezone/coordinate":
+            return self.timeapi(float(query["latitude"]), float(query["longitude"]))
+
+        if self.scenario.config_endpoint and self.scenario.config_endpoint.endswith(host + path):
+            body = json_dumps(self.scenario.config_payload(self.clock.true_time()))
+            etag = '"{}"'.format(hash(body) & 0xFFFFFFFF)
+            if headers.get("If-None-Match") == etag:
+                return FakeResponse(304, b"", {"ETag": etag})
+            return FakeResponse(200, body, {"Content-Type": "application/json", "ETag": etag})
+
+        return FakeResponse(404, "not found")
+
+    # What timeapi.io sends for a location.
+    def timeapi(self, latitude, longitude):
+        tz_name = self.scenario.tz_for(latitude, longitude)
+        now = int(self.clock.true_time())
+        offset, dst_start, dst_end = zone_facts(tz_name, now)
+        body = {
+            "timeZone": tz_name,
+            "currentUtcOffset": {"seconds": offset},
+            "dstInterval": None,
+        }
+        if dst_start:
+            body["dstInterval"] = {
+                "dstStart": iso_time(dst_start),
+                "dstEnd": iso_time(dst_end),
+            }
+        return FakeResponse(200, json_dumps(body), {"Content-Type": "application/json"})
+
+    # Adafruit IO calls go through the same accounting.
+    def io_call(self, timeout=10):
+        self._spend("io.adafruit.com", False, timeout)
+
+
+# Stand-in for adafruit_matrixportal.network.Network.
+class FakeNetwork():
+    def __init__(self, web, session_factory):
+        self.web = web
+        self.requests = session_factory()
+        # portalbase keeps the session on its WiFi object.
+        self._wifi = type("WiFi", (), {})()
+        self._wifi.requests = self.requests
+        self.connects = 0
+
+    @property
+    def is_connected(self):
+        return not self.web.in_outage()
+
+    def connect(self, max_attempts=10):
+        self.connects += 1
+        if self.web.in_outage():
+            raise OSError("simulated outage: no access point")
+
+    def fetch(self, url, *, headers=None, timeout=10):
+        return self.requests.get(url, headers=headers, timeout=timeout)
+
+    def fetch_data(self, url, *, headers=None, json_path=None, regexp_path=None, timeout=10):
+        response = self.fetch(url, headers=headers, timeout=timeout)
+        if response.status_code >= 400:
+            raise RuntimeError("HTTP {}".format(response.status_code))
+        return response.text
+
+    def get_io_feed(self, feed_key, detailed=False):
+        self.web.io_call()
+        scenario = self.web.scenario
+        return {
+            "last_value": json_dumps(scenario.config_payload(self.web.clock.true_time())),
+            "updated_at": iso_time(int(self.web.clock.true_time()) - SECONDS_PER_DAY),
+        }
+
+    def push_to_io(self, feed_key, data):
+        self.web.io_call()
+        self.web.feed_pushes.append((self.web.clock.now, feed_key, data))
+
+    def get_local_time(self, location=None):
+        self.web.io_call()
+        self.web.clock.set_rtc(int(self.web.clock.true_time()))
+
+
+def split_url(url):
+    rest = url.split("://", 1)[-1]
+    host, _, path = rest.partition("/")
+    path, _, query_string = ("/" + path).partition("?")
+    query = {}
+    for pair in query_string.split("&"):
+        if "=" in pair:
+            key, _, value = pair.partition("=")
+            query[key] = value
+    return host, path, query
+
+
+def json_dumps(value):
+    return json.dumps(value, separators=(",", ":"))
+
+
+def iso_time(epoch):
+    # Formatted by hand: datetime.strftime would import the virtual time module.
+    t = host_time.gmtime(epoch)
+    return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z".format(t[0], t[1], t[2], t[3], t[4], t[5])
+
+
+def utc_offset(tz, epoch):
+    return int(datetime.datetime.fromtimestamp(epoch, tz).utcoffset().total_seconds())
+
+
+# Finds the offset change between two times that differ in offset.
+def _find_change(tz, lo, hi):
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if utc_offset(tz, mid) == utc_offset(tz, lo):
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+# Current UTC offset, and the start and end of the DST interval in effect or next.
+def zone_facts(tz_name, now):
+    tz = zoneinfo.ZoneInfo(tz_name)
+    offset = utc_offset(tz, now)
+
+    changes = []
+    day = now - 200 * SECONDS_PER_DAY
+    previous = utc_offset(tz, day)
+    while day < now + 400 * SECONDS_PER_DAY and len(changes) < 4:
+        day += SECONDS_PER_DAY
+        current = utc_offset(tz, day)
+        if current != previous:
+            changes.append((_find_change(tz, day - SECONDS_PER_DAY, day), current > previous))
+            previous = current
+
+    starts = [t for t, is_start in changes if is_start]
+    ends = [t for t, is_start in changes if not is_start]
+    if not starts or not ends:
+        return offset, 0, 0
+
+    # The interval that contains now, or the next one.
+    for start in starts:
+        end = min([t for t in ends if t > start], default=0)
+        if end > now:
+            return offset, start, end
+    return offset, 0, 0
@@ -0,0 +1,171 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Benchmark scenarios for the simulator.
+
+import calendar
+import os
+import random
+import sys
+import zoneinfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bundle_server
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Where the default locations.py entries really are.
+DEFAULT_LOCATIONS = [
+    {"description": "Madison, Wisconsin", "tz_abbr": "MSN", "tz_name": "America/Chicago", "latitude": 43.073051, "longitude": -89.401230},
+    {"description": "Davis, California", "tz_abbr": "Cali", "tz_name": "America/Los_Angeles", "latitude": 38.533958, "longitude": -121.744560},
+    {"description": "St. George, Utah", "tz_abbr": "Utah", "tz_name": "America/Denver", "latitude": 37.108280, "longitude": -113.583282},
+    {"description": "Algorta, Spain", "tz_abbr": "CET", "tz_name": "Europe/Madrid", "latitude": 43.348680, "longitude": -3.010120},
+]
+
+
+def utc(year, month, day, hour=0, minute=0):
+    return calendar.timegm((year, month, day, hour, minute, 0, 0, 0, 0))
+
+
+class Scenario():
+    def __init__(self, name, description, **kwargs):
+        self.name = name
+        self.description = description
+        self.start_epoch = kwargs.get("start_epoch", utc(2026, 6, 15, 12))
+        self.duration_s = kwargs.get("duration_s", 2 * HOUR)
+        self.appconfig = kwargs.get("appconfig", {})
+        self.locations = kwargs.get("locations", DEFAULT_LOCATIONS)
+        # Locations as the clock is told about them. Defaults to the real ones.
+        self.config_locations = kwargs.get("config_locations", self.locations)
+        self.secrets = kwargs.get("secrets", {"ssid": "sim", "password": "sim", "timezone": "America/Chicago"})
+        self.config_endpoint = self.secrets.get("config_endpoint")
+        # (start, end) in seconds since boot when the network is down.
+        self.outages = kwargs.get("outages", [])
+        # host -> (start, end) windows when the network is up but the host answers 503.
+        self.host_errors = kwargs.get("host_errors", {})
+        self.latency_s = kwargs.get("latency_s", 0.8)
+        self.handshake_s = kwargs.get("handshake_s", 2.5)
+        self.host_latency_s = kwargs.get("host_latency_s", {})
+        # Servers close connections idle longer than this.
+        self.server_idle_s = kwargs.get("server_idle_s", 60)
+        self.rtc_drift_ppm = kwargs.get("rtc_drift_ppm", 20)
+        # Days of zone bundle the config endpoint adds, or 0 for none.
+        self.bundle_days = kwargs.get("bundle_days", 0)
+
+    def latency_s_for(self, host):
+        return self.host_latency_s.get(host, self.latency_s)
+
+    # Time zone of the known location nearest to a point.
+    def tz_for(self, latitude, longitude):
+        best = min(self.locations, key=lambda loc: (loc["latitude"] - latitude) ** 2 + (loc["longitude"] - longitude) ** 2)
+        return best["tz_name"]
+
+    # What the config feed or endpoint sends. The first location is the user's.
+    def config_payload(self, now):
+        local = self.config_locations[0]
+        payload = {
+            "latitude": local["latitude"],
+            "longitude": local["longitude"],
+            "locations": self.config_locations[1:],
+        }
+        if self.bundle_days:
+            # Built once a day, like tools/bundle_server.py caches it.
+            config = dict(self.locations[0], locations=self.locations[1:])
+            payload["bundle"] = bundle_server.build_bundle(config, int(now) - int(now) % DAY, self.bundle_days)
+        return payload
+
+
+def many_locations(count, seed=1):
+    rng = random.Random(seed)
+    names = sorted(n for n in zoneinfo.available_timezones() if n.startswith(("America/", "Europe/", "Asia/", "Australia/", "Africa/")))
+    result = [DEFAULT_LOCATIONS[0]]
+    for idx in range(count - 1):
+        name = names[(idx * 7) % len(names)]
+        result.append({
+            "description": name.split("/")[-1].replace("_", " "),
+            "tz_abbr": name.split("/")[-1][:4],
+            "tz_name": name,
+            "latitude": round(rng.uniform(-55, 65), 4),
+            "longitude": round(rng.uniform(-179, 179), 4),
+        })
+    return result
+
+
+def without_tz_names(locations, every=2):
+    result = []
+    for idx in range(len(locations)):
+        loc = dict(locations[idx])
+        if idx % every == 1:
+            # The clock will have to ask timeapi.io.
+            del loc["tz_name"]
+        result.append(loc)
+    return result
+
+
+_many = many_locations(100)
+_wall = many_locations(1000)
+
+SCENARIOS = [
+    Scenario("aux1", "one aux zone, big fonts",
+        appconfig={"aux_zones": 1, "clock_font_height": 13}),
+    Scenario("aux2", "two aux zones (the default)"),
+    Scenario("atlas", "digits drawn from a tile atlas of the clock font",
+        appconfig={"clock_backend": "atlas"}),
+    Scenario("aux4", "four aux zones in two columns",
+        appconfig={"aux_zones": 4}),
+    Scenario("scroll", "location descriptions as zone names, scrolling when they don't fit",
+        appconfig={"zone_label": "description"}),
+    Scenario("chain", "two rows of two chained panels (128x64) showing eight aux zones",
+        appconfig={"display_width": 128, "display_height": 64, "display_tile_rows": 2, "aux_zones": 8},
+        locations=_many,
+        config_locations=_many,
+        secrets={"ssid": "sim", "password": "sim", "timezone": "America/Chicago", "config_feed": "sim-feed"}),
+    Scenario("many", "100 locations from the config feed, half without tz_name",
+        locations=_many,
+        config_locations=without_tz_names(_many),
+        secrets={"ssid": "sim", "password": "sim", "timezone": "America/Chicago", "config_feed": "sim-feed"}),
+    Scenario("endpoint", "100 locations from a config endpoint with ETags",
+        locations=_many,
+        config_locations=without_tz_names(_many),
+        secrets={"ssid": "sim", "password": "sim", "timezone": "America/Chicago", "config_endpoint": "https://config.example.com/clock.json"}),
+    Scenario("bundle", "100 locations from a config endpoint that sends a zone bundle",
+        locations=_many,
+        config_locations=without_tz_names(_many),
+        secrets={"ssid": "sim", "password": "sim", "timezone": "America/Chicago", "config_endpoint": "https://config.example.com/clock.json"},
+        bundle_days=3),
+    Scenario("wall", "1000 locations from a config endpoint, far more than fit in memory as zones",
+        locations=_wall,
+        config_locations=_wall,
+        secrets={"ssid": "sim", "password": "sim", "timezone": "America/Chicago", "config_endpoint": "https://config.example.com/clock.json"}),
+    Scenario("night", "boots just before sunset with the panel blanked at night, light sleeping",
+        appconfig={"night_brightness": 0, "stats_upload_s": 30 * 60},
+        start_epoch=utc(2026, 6, 16, 1), duration_s=4 * HOUR),
+    Scenario("dst", "US DST starts half an hour after boot",
+        start_epoch=utc(2026, 3, 8, 7, 30), duration_s=3 * HOUR),
+    Scenario("outage", "network down from 10 to 40 minutes after boot, and timeapi.io slow",
+        config_locations=without_tz_names(DEFAULT_LOCATIONS),
+        outages=[(10 * 60, 40 * 60)],
+        host_latency_s={"www.timeapi.io": 4.0}),
+    Scenario("flaky", "timeapi.io answers 503 for the first 45 minutes, 100 locations",
+        locations=_many,
+        config_locations=without_tz_names(_many),
+        secrets={"ssid": "sim", "password": "sim", "timezone": "America/Chicago", "config_feed": "sim-feed"},
+        host_errors={"www.timeapi.io": [(0, 45 * 60)]}),
+    Scenario("drift", "an RTC that runs 300 ppm fast, over a day",
+        duration_s=24 * HOUR,
+        rtc_drift_ppm=300),
+    Scenario("heap", "heap profiling on, 100 locations from the config feed",
+        appconfig={"heap_profile": True, "stats_upload_s": 30 * 60},
+        locations=_many,
+        config_locations=without_tz_names(_many),
+        secrets={"ssid": "sim", "password": "sim", "timezone": "America/Chicago", "config_feed": "sim-feed"}),
+]
+
+
+def find(name):
+    for scenario in SCENARIOS:
+        if scenario.name == name:
+            return scenario
+    raise KeyError("no scenario named {}".format(name))
@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Runs src/code.py unchanged on a Linux host, against stand-ins for the
+# CircuitPython libraries, a fake network and a virtual clock.
+#
+# usage: python3 tools/simulator/sim.py [--hours H] [--out DIR] [--images] [--list] [scenario ...]
+#
+# Each scenario runs in its own process so module state can't leak between
+# them. The report shows CPU time and allocations per event loop step, network
+# calls and handshakes per host, and how many distinct frames were drawn.
+# Frames are written as text (and PPM images with --images) under --out.
+#
+# CPU times are host times and allocations are CPython bytes, so compare runs
+# with each other rather than with the board.
+
+import argparse
+import os
+import runpy
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.normpath(os.path.join(HERE, "..", "..", "src"))
+STUBS = os.path.join(HERE, "stubs")
+
+# What gc.mem_free() counts down from. CPython objects are several times the
+# size of CircuitPython's, so this is not the board's 192 KB. It is only big
+# enough that free memory goes down when the clock holds on to more.
+HEAP_SIZE = 4 * 1024 * 1024
+
+
+def run_scenario(name, hours, out_dir, images):
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, STUBS)
+    sys.path.insert(0, SRC)
+
+    import scenarios
+    import simulation
+    import virtual
+
+    scenario = scenarios.find(name)
+    if hours:
+        scenario.duration_s = hours * 60 * 60
+
+    scenario_out = None
+    if out_dir:
+        scenario_out = os.path.join(out_dir, scenario.name)
+        os.makedirs(scenario_out, exist_ok=True)
+
+    sim = simulation.Simulation(scenario, scenario_out, images)
+    simulation.current = sim
+    loop = virtual.EventLoop(sim.clock, scenario.duration_s, sim.after_step)
+
+    # Configuration for this scenario, in place of the files on the board.
+    import appconfig
+    appconfig.appconfig.update(scenario.appconfig)
+    work_dir = scenario_out or os.path.join("/tmp", "mzc-sim-" + scenario.name)
+    os.makedirs(work_dir, exist_ok=True)
+    for key, name in (("cache_file", "zone_cache.bin"), ("catalog_file", "locations.bin")):
+        appconfig.appconfig[key] = os.path.join(work_dir, name)
+        if os.path.exists(appconfig.appconfig[key]):
+            os.remove(appconfig.appconfig[key])
+
+    secrets = types.ModuleType("secrets")
+    secrets.secrets = dict(scenario.secrets)
+    sys.modules["secrets"] = secrets
+    locations = types.ModuleType("locations")
+    locations.locations = scenario.config_locations
+    sys.modules["locations"] = locations
+
+    # Paths in appconfig are relative to the board's root, which is src.
+    os.chdir(SRC)
+
+    tracemalloc.start()
+    virtual.install(sim.clock, loop, HEAP_SIZE)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    code_globals = {}
+    error = None
+    try:
+        code_globals = runpy.run_path(os.path.join(SRC, "code.py"), run_name="__main__")
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        error = e
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    sim.frames.close()
+    report(scenario, sim, loop, code_globals, wall, cpu)
+    tracemalloc.stop()
+    if scenario_out:
+        print("frames written to {}".format(scenario_out))
+
+    return 1 if error else 0
+
+
+def report(scenario, sim, loop, code_globals, wall, cpu):
+    print("=== {}: {} ===".format(scenario.name, scenario.description))
+    simulated = sim.clock.now
+    print("simulated {:.0f} s in {:.1f} s wall, {:.1f} s CPU ({:.0f}x real time)".format(
+        simulated, wall, cpu, simulated / wall if wall else 0))
+    print("event loop: {} steps, idle {:.1f}% of the time".format(
+        sum(s.steps for s in loop.stats.values()), 100 * loop.idle_s / simulated if simulated else 0))
+
+    print("{:<14} {:>7} {:>11} {:>11} {:>12} {:>12}".format("task", "steps", "avg cpu ms", "max cpu ms", "avg alloc B", "max alloc B"))
+    for name in sorted(loop.stats):
+        s = loop.stats[name]
+        print("{:<14} {:>7} {:>11.3f} {:>11.3f} {:>12.0f} {:>12}".format(
+            name, s.steps, 1000 * s.cpu_s / s.steps, 1000 * s.max_cpu_s, s.alloc_bytes / s.steps, s.max_alloc_bytes))
+
+    print("{:<20} {:>8} {:>8} {:>10} {:>8} {:>9}".format("host", "requests", "failures", "handshakes", "bytes", "time s"))
+    for host in sorted(sim.web.hosts):
+        h = sim.web.hosts[host]
+        print("{:<20} {:>8} {:>8} {:>10} {:>8} {:>9.1f}".format(host, h.requests, h.failures, h.handshakes, h.bytes, h.time_s))
+    print("feed log pushes: {}, connects: {}".format(len(sim.web.feed_pushes), sim.network.connects))
+
+    display = sim.display
+    if display is not None:
+        print("display: {} refreshes, {} captures, {} distinct frames".format(
+            display.refreshes, sim.frames.captures, sim.frames.distinct))
+
+    if "render_stats" in code_globals:
+        print("render: {}".format(code_globals["render_stats"]))
+    if "writer" in code_globals:
+        print("writes since the last stats log: {}".format(code_globals["writer"].stats()))
+    if "util_heap" in code_globals and code_globals["util_heap"].enabled:
+        code_globals["util_heap"].report()
+
+    if sim.frames.last:
+        print("last frame:")
+        print(sim.frames.last)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run code.py on a virtual board.")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--hours", type=float, help="simulated hours per scenario")
+    parser.add_argument("--out", help="directory for frames and images")
+    parser.add_argument("--images", action="store_true", help="also write frames as PPM images")
+    parser.add_argument("--list", action="store_true", help="list the scenarios")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        sys.exit(run_scenario(args.run, args.hours, args.out, args.images))
+
+    sys.path.insert(0, HERE)
+    import scenarios
+
+    if args.list:
+        for scenario in scenarios.SCENARIOS:
+            print("{:<10} {}".format(scenario.name, scenario.description))
+        return
+
+    names = args.scenarios or [s.name for s in scenarios.SCENARIOS]
+    failed = []
+    for name in names:
+        command = [sys.executable, os.path.abspath(__file__), "--run", name]
+        if args.hours:
+            command += ["--hours", str(args.hours)]
+        if args.out:
+            command += ["--out", os.path.abspath(args.out)]
+        if args.images:
+            command.append("--images")
+        if subprocess.call(command) != 0:
+            failed.append(name)
+        print()
+
+    if failed:
+        print("failed: {}".format(", ".join(failed)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
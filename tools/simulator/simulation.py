@@ -0,0 +1,132 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# The pieces of one simulated board: clock, network, display and frame recorder.
+# The stubs for the CircuitPython libraries find them through `current`.
+
+import os
+
+import fake_network
+import virtual
+
+# The simulation being run. Set by sim.py before code.py starts.
+current = None
+
+# Characters for frame text, by color.
+COLOR_CHARS = (
+    (0xFF0000, "r"),
+    (0x550000, "w"),
+    (0xCC4000, "a"),
+    (0x85FF00, "g"),
+    (0x0000FF, "b"),
+    (0x000055, "-"),
+    (0x005555, "c"),
+)
+
+
+def color_char(color):
+    if not color:
+        return " "
+    for value, char in COLOR_CHARS:
+        if color == value:
+            return char
+    return "#"
+
+
+class FakeDisplay():
+    def __init__(self, simulation, width, height):
+        self.simulation = simulation
+        self.width = width
+        self.height = height
+        self.auto_refresh = True
+        self.brightness = 1.0
+        self.root_group = None
+        self.refreshes = 0
+        self.dirty = False
+
+    def show(self, group):
+        self.root_group = group
+
+    def refresh(self, *, target_frames_per_second=60, minimum_frames_per_second=1):
+        # The frame is captured after the step, so rendering it on the host
+        # isn't counted against the task that asked for the refresh.
+        self.refreshes += 1
+        self.dirty = True
+        return True
+
+    def render(self):
+        pixels = [[0] * self.width for _ in range(self.height)]
+        if self.root_group is not None and self.brightness > 0:
+            self.root_group.render(pixels, 0, 0)
+        return pixels
+
+
+# Counts distinct frames and writes each one, with the virtual time it first
+# appeared, to frames.txt. Only the last one is kept in memory, so the
+# recorder doesn't show up as heap growth in the clock's own numbers.
+class FrameRecorder():
+    def __init__(self, clock, out_dir, images):
+        self.clock = clock
+        self.out_dir = out_dir
+        self.images = images
+        self.distinct = 0
+        self.captures = 0
+        self.last = None
+        self._file = open(os.path.join(out_dir, "frames.txt"), "w") if out_dir else None
+
+    def capture(self, display):
+        self.captures += 1
+        pixels = display.render()
+        text = "\n".join("".join(color_char(c) for c in row) for row in pixels)
+        if text == self.last:
+            return
+        self.last = text
+        self.distinct += 1
+        if self._file:
+            self._file.write("--- t={:.1f}s rtc={} ---\n".format(self.clock.now, fake_network.iso_time(int(self.clock.rtc_time()))))
+            self._file.write(text)
+            self._file.write("\n")
+        if self.images and self.out_dir:
+            self._write_ppm(pixels, self.distinct)
+
+    def _write_ppm(self, pixels, number, scale=4):
+        path = os.path.join(self.out_dir, "frame{:05d}.ppm".format(number))
+        height = len(pixels)
+        width = len(pixels[0])
+        with open(path, "wb") as f:
+            f.write("P6 {} {} 255\n".format(width * scale, height * scale).encode("ascii"))
+            for row in pixels:
+                line = bytearray()
+                for color in row:
+                    line += bytes(((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF)) * scale
+                f.write(bytes(line) * scale)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class Simulation():
+    def __init__(self, scenario, out_dir, images):
+        self.scenario = scenario
+        self.clock = virtual.VirtualClock(scenario.start_epoch, scenario.rtc_drift_ppm)
+        self.web = fake_network.FakeWeb(self.clock, scenario)
+        import adafruit_requests
+        self.network = fake_network.FakeNetwork(self.web, adafruit_requests.Session)
+        self.frames = FrameRecorder(self.clock, out_dir, images)
+        self.display = None
+
+    def make_display(self, width, height):
+        if self.display is None:
+            self.display = FakeDisplay(self, width or 64, height or 32)
+        return self.display
+
+    # Called after each event loop step. With auto refresh on, the real
+    # display redraws by itself, so take a frame then too.
+    def after_step(self, task_name):
+        display = self.display
+        if display is not None and (display.dirty or display.auto_refresh):
+            display.dirty = False
+            self.frames.capture(display)
@@ -0,0 +1,70 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for adafruit_bitmap_font.bitmap_font that reads BDF files.
+
+import displayio
+from fontio import Glyph
+
+
+class BDF():
+    def __init__(self, path):
+        self.ascent = 0
+        self.descent = 0
+        self._bounding_box = (0, 0, 0, 0)
+        self._glyphs = {}
+        self._parse(path)
+
+    def _parse(self, path):
+        glyph = None
+        rows = None
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                key = parts[0]
+                if rows is not None:
+                    if key == "ENDCHAR":
+                        bitmap = displayio.Bitmap(max(1, glyph["w"]), max(1, glyph["h"]), 2)
+                        for y in range(glyph["h"]):
+                            bits = int(rows[y], 16)
+                            nbits = len(rows[y]) * 4
+                            for x in range(glyph["w"]):
+                                if bits & (1 << (nbits - 1 - x)):
+                                    bitmap[x, y] = 1
+                        self._glyphs[glyph["code"]] = Glyph(bitmap, 0, glyph["w"], glyph["h"], glyph["dx"], glyph["dy"], glyph["shift_x"], 0)
+                        glyph = None
+                        rows = None
+                    else:
+                        rows.append(key)
+                elif key == "FONT_ASCENT":
+                    self.ascent = int(parts[1])
+                elif key == "FONT_DESCENT":
+                    self.descent = int(parts[1])
+                elif key == "FONTBOUNDINGBOX":
+                    self._bounding_box = tuple(int(p) for p in parts[1:5])
+                elif key == "STARTCHAR":
+                    glyph = {}
+                elif key == "ENCODING":
+                    glyph["code"] = int(parts[1])
+                elif key == "DWIDTH":
+                    glyph["shift_x"] = int(parts[1])
+                elif key == "BBX":
+                    glyph["w"], glyph["h"], glyph["dx"], glyph["dy"] = (int(p) for p in parts[1:5])
+                elif key == "BITMAP":
+                    rows = []
+
+    def get_bounding_box(self):
+        return self._bounding_box
+
+    def get_glyph(self, code):
+        return self._glyphs.get(code)
+
+    def load_glyphs(self, code_points):
+        pass
+
+
+def load_font(path):
+    return BDF(path)
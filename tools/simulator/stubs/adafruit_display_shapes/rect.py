@@ -0,0 +1,24 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for adafruit_display_shapes.rect.
+
+
+class Rect():
+    def __init__(self, x, y, width, height, *, fill=None, outline=None, stroke=1):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.fill = fill
+        self.outline = outline
+        self.hidden = False
+
+    def render(self, pixels, ox, oy):
+        if self.hidden or self.fill is None:
+            return
+        for y in range(oy + self.y, oy + self.y + self.height):
+            for x in range(ox + self.x, ox + self.x + self.width):
+                if 0 <= y < len(pixels) and 0 <= x < len(pixels[0]):
+                    pixels[y][x] = self.fill
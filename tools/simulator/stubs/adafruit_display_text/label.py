@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for adafruit_display_text.label.Label.
+# Lays text out from the font's glyphs and draws it into frames.
+
+
+class Label():
+    def __init__(self, font, *, text="", color=0xFFFFFF, x=0, y=0, anchor_point=None, anchored_position=None, scale=1, **kwargs):
+        self.font = font
+        self.color = color
+        self.hidden = False
+        self.scale = scale
+        self._anchor_point = anchor_point
+        self._anchored_position = anchored_position
+        self.x = x
+        self.y = y
+        # Counts layouts, so the simulator can show how much text work is done.
+        self.layouts = 0
+        self._text = None
+        self.text = text
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        # The real Label lays the text out again on every assignment.
+        self._text = value
+        self.layouts += 1
+        self._layout()
+
+    def _layout(self):
+        x = 0
+        left = 0
+        right = 0
+        top = 0
+        bottom = 0
+        for c in self._text:
+            glyph = self.font.get_glyph(ord(c))
+            if not glyph:
+                continue
+            if x == 0:
+                left = min(left, glyph.dx)
+            right = max(right, x + glyph.shift_x, x + glyph.dx + glyph.width)
+            top = max(top, glyph.height + glyph.dy)
+            bottom = min(bottom, glyph.dy)
+            x += glyph.shift_x
+        self._box = (left, -top, right - left, top - bottom)
+        self._reposition()
+
+    @property
+    def bounding_box(self):
+        return self._box
+
+    @property
+    def anchor_point(self):
+        return self._anchor_point
+
+    @anchor_point.setter
+    def anchor_point(self, value):
+        self._anchor_point = value
+        self._reposition()
+
+    @property
+    def anchored_position(self):
+        return self._anchored_position
+
+    @anchored_position.setter
+    def anchored_position(self, value):
+        self._anchored_position = value
+        self._reposition()
+
+    def _reposition(self):
+        if self._anchor_point is None or self._anchored_position is None:
+            return
+        # x, y is the left end of the baseline.
+        self.x = int(self._anchored_position[0] - self._anchor_point[0] * self._box[2] - self._box[0])
+        self.y = int(self._anchored_position[1] - self._anchor_point[1] * self._box[3] - self._box[1])
+
+    def render(self, pixels, ox, oy):
+        if self.hidden or not self._text:
+            return
+        x = ox + self.x
+        for c in self._text:
+            glyph = self.font.get_glyph(ord(c))
+            if not glyph:
+                continue
+            bitmap = glyph.bitmap
+            tiles_per_row = max(1, bitmap.width // max(1, glyph.width))
+            sx0 = (glyph.tile_index % tiles_per_row) * glyph.width
+            sy0 = (glyph.tile_index // tiles_per_row) * glyph.height
+            top = oy + self.y - glyph.height - glyph.dy
+            for gy in range(glyph.height):
+                for gx in range(glyph.width):
+                    if bitmap[sx0 + gx, sy0 + gy]:
+                        px = x + glyph.dx + gx
+                        py = top + gy
+                        if 0 <= py < len(pixels) and 0 <= px < len(pixels[0]):
+                            pixels[py][px] = self.color
+            x += glyph.shift_x
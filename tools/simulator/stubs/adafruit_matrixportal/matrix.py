@@ -0,0 +1,11 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for adafruit_matrixportal.matrix.
+
+
+class Matrix():
+    def __init__(self, *, width=64, height=32, bit_depth=2, **kwargs):
+        import simulation
+        self.display = simulation.current.make_display(width, height)
@@ -0,0 +1,22 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for adafruit_matrixportal.matrixportal.MatrixPortal.
+# The display and network come from the running simulation.
+
+import simulation
+
+
+class MatrixPortal():
+    def __init__(self, *, width=None, height=None, bit_depth=2, debug=False, **kwargs):
+        self.display = simulation.current.make_display(width, height)
+        self.network = simulation.current.network
+        self.scrolls = 0
+
+    # The real one scrolls the text fields added with add_text(). The clock
+    # doesn't use add_text(), so this only refreshes the display.
+    def scroll_text(self, frame_delay=0.02):
+        self.scrolls += 1
+        if self.display.auto_refresh:
+            self.display.refresh()
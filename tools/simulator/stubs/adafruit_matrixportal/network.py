@@ -0,0 +1,11 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for adafruit_matrixportal.network. The simulation supplies the network.
+
+import simulation
+
+
+def Network(**kwargs):
+    return simulation.current.network
@@ -0,0 +1,30 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for adafruit_requests. Sessions send their requests to the
+# simulation's fake web.
+
+import simulation
+
+
+class Session():
+    def __init__(self, socket_pool=None, ssl_context=None):
+        self._socket_pool = socket_pool
+        self._ssl_context = ssl_context
+        # Hosts with an open connection, like the real session's socket reuse.
+        # The values stand in for the sockets.
+        self._open_sockets = {}
+
+    def _close_socket(self, sock):
+        for key in [key for key in self._open_sockets if self._open_sockets[key] is sock]:
+            del self._open_sockets[key]
+
+    def request(self, method, url, data=None, json=None, headers=None, timeout=60):
+        return simulation.current.web.request(self, method, url, data=data, json=json, headers=headers, timeout=timeout)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
@@ -0,0 +1,38 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for CircuitPython's alarm, enough for light sleep on a time alarm.
+# Sleeping is time.sleep(), so in the simulator it moves the virtual clock on,
+# and run on its own it really waits.
+
+# The clock, under a name the alarm.time submodule doesn't replace.
+import time as _clock
+
+# alarm.time, as on the board.
+from . import time
+
+# The alarm that ended the last light sleep.
+wake_alarm = None
+# Light sleeps taken, and seconds spent in them.
+sleeps = 0
+slept = 0.0
+
+
+# Sleeps until the first of the alarms goes off, and returns it.
+def light_sleep_until_alarms(*alarms):
+    global wake_alarm, sleeps, slept
+
+    if not alarms:
+        raise ValueError("no alarms")
+    first = alarms[0]
+    for a in alarms:
+        if a.monotonic_time < first.monotonic_time:
+            first = a
+
+    start = _clock.monotonic()
+    _clock.sleep(max(0, first.monotonic_time - start))
+    sleeps += 1
+    slept += _clock.monotonic() - start
+    wake_alarm = first
+    return first
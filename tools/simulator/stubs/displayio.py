@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for CircuitPython's displayio, enough for the clock to run on a host.
+
+
+class Bitmap():
+    def __init__(self, width, height, value_count):
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+        self._data = bytearray(width * height)
+
+    def _index(self, key):
+        if isinstance(key, tuple):
+            x, y = key
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise IndexError("pixel ({}, {}) out of range".format(x, y))
+            return y * self.width + x
+        return key
+
+    def __getitem__(self, key):
+        return self._data[self._index(key)]
+
+    def __setitem__(self, key, value):
+        self._data[self._index(key)] = value
+
+    def fill(self, value):
+        for idx in range(len(self._data)):
+            self._data[idx] = value
+
+
+class Palette():
+    def __init__(self, color_count):
+        self._colors = [0] * color_count
+        self._transparent = [False] * color_count
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def __setitem__(self, index, color):
+        self._colors[index] = color
+
+    def make_transparent(self, index):
+        self._transparent[index] = True
+
+    def make_opaque(self, index):
+        self._transparent[index] = False
+
+    def is_transparent(self, index):
+        return self._transparent[index]
+
+
+class TileGrid():
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1, tile_width=None, tile_height=None, default_tile=0, x=0, y=0):
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.tile_width = bitmap.width if tile_width is None else tile_width
+        self.tile_height = bitmap.height if tile_height is None else tile_height
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._tiles = [default_tile] * (width * height)
+
+    def _index(self, key):
+        if isinstance(key, tuple):
+            return key[1] * self.width + key[0]
+        return key
+
+    def __getitem__(self, key):
+        return self._tiles[self._index(key)]
+
+    def __setitem__(self, key, value):
+        self._tiles[self._index(key)] = value
+
+    # Draws into a frame: pixels[y][x] = color.
+    def render(self, pixels, ox, oy):
+        if self.hidden:
+            return
+        tiles_per_row = max(1, self.bitmap.width // self.tile_width)
+        for ty in range(self.height):
+            for tx in range(self.width):
+                tile = self._tiles[ty * self.width + tx]
+                sx0 = (tile % tiles_per_row) * self.tile_width
+                sy0 = (tile // tiles_per_row) * self.tile_height
+                for y in range(self.tile_height):
+                    for x in range(self.tile_width):
+                        value = self.bitmap[sx0 + x, sy0 + y]
+                        if self.pixel_shader.is_transparent(value):
+                            continue
+                        px = ox + self.x + tx * self.tile_width + x
+                        py = oy + self.y + ty * self.tile_height + y
+                        if 0 <= py < len(pixels) and 0 <= px < len(pixels[0]):
+                            pixels[py][px] = self.pixel_shader[value]
+
+
+class Group():
+    def __init__(self, *, scale=1, x=0, y=0):
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._children = []
+
+    def append(self, layer):
+        self._children.append(layer)
+
+    def insert(self, index, layer):
+        self._children.insert(index, layer)
+
+    def remove(self, layer):
+        self._children.remove(layer)
+
+    def pop(self, index=-1):
+        return self._children.pop(index)
+
+    def index(self, layer):
+        return self._children.index(layer)
+
+    def __len__(self):
+        return len(self._children)
+
+    def __getitem__(self, index):
+        return self._children[index]
+
+    def __iter__(self):
+        return iter(self._children)
+
+    def render(self, pixels, ox, oy):
+        if self.hidden:
+            return
+        for child in self._children:
+            child.render(pixels, ox + self.x, oy + self.y)
+
+
+def release_displays():
+    pass
@@ -0,0 +1,9 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for CircuitPython's fontio.
+
+from collections import namedtuple
+
+Glyph = namedtuple("Glyph", "bitmap tile_index width height dx dy shift_x shift_y")
@@ -0,0 +1,31 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Stand-in for CircuitPython's terminalio. The built in font is 6x12; here
+# every character is drawn as a block so text is visible in frames.
+
+import displayio
+from fontio import Glyph
+
+
+class BuiltinFont():
+    def __init__(self):
+        self.bitmap = displayio.Bitmap(6, 12, 2)
+        for y in range(3, 10):
+            for x in range(0, 5):
+                self.bitmap[x, y] = 1
+        self._blank = displayio.Bitmap(6, 12, 2)
+
+    def get_bounding_box(self):
+        return (6, 12)
+
+    def get_glyph(self, codepoint):
+        bitmap = self._blank if chr(codepoint) == " " else self.bitmap
+        return Glyph(bitmap, 0, 6, 12, 0, -2, 6, 0)
+
+    def load_glyphs(self, code_points):
+        pass
+
+
+FONT = BuiltinFont()
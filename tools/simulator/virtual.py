@@ -0,0 +1,289 @@
+# SPDX-FileCopyrightText: 2023 Dean A Yeazel
+#
+# SPDX-License-Identifier: MIT
+
+# Virtual clock and stand-ins for the CircuitPython time, gc and asyncio modules.
+#
+# Nothing here waits for real time. Sleeping, awaiting and blocking network
+# calls just move the virtual clock forward, so hours of clock run in seconds.
+
+import calendar
+import heapq
+import sys
+import time as host_time
+import tracemalloc
+import types
+
+# The board's RTC starts here until it is set from the network.
+RTC_UNSET_EPOCH = 946684800  # 2000-01-01
+
+
+class VirtualClock():
+    def __init__(self, start_epoch, rtc_drift_ppm=0):
+        # Seconds since the board started.
+        self.now = 0.0
+        # Real UTC time when the board started.
+        self.start_epoch = start_epoch
+        # How fast the RTC runs compared to real time, in parts per million.
+        self.rtc_drift_ppm = rtc_drift_ppm
+        self._rtc_base = RTC_UNSET_EPOCH
+        self._rtc_set_at = 0.0
+        self.slept = 0.0
+        self.sleeps = 0
+
+    def advance(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    # What the time really is, in UTC seconds.
+    def true_time(self):
+        return self.start_epoch + self.now
+
+    # What the board's RTC says, in UTC seconds.
+    def rtc_time(self):
+        elapsed = self.now - self._rtc_set_at
+        return self._rtc_base + elapsed * (1 + self.rtc_drift_ppm / 1000000)
+
+    def set_rtc(self, epoch):
+        self._rtc_base = epoch
+        self._rtc_set_at = self.now
+
+
+# A module that looks like CircuitPython's time, running on a VirtualClock.
+def make_time_module(clock):
+    module = types.ModuleType("time")
+    module.struct_time = host_time.struct_time
+
+    def monotonic():
+        return clock.now
+
+    def monotonic_ns():
+        return int(clock.now * 1000000000)
+
+    def time():
+        return int(clock.rtc_time())
+
+    def localtime(secs=None):
+        # The board's RTC is kept in UTC.
+        return host_time.gmtime(int(clock.rtc_time()) if secs is None else int(secs))
+
+    def mktime(t):
+        return calendar.timegm(tuple(t[:6]) + (0, 0, 0))
+
+    def sleep(seconds):
+        clock.slept += seconds
+        clock.sleeps += 1
+        clock.advance(seconds)
+
+    module.monotonic = monotonic
+    module.monotonic_ns = monotonic_ns
+    module.time = time
+    module.localtime = localtime
+    module.mktime = mktime
+    module.sleep = sleep
+    return module
+
+
+# A module that looks like CircuitPython's gc, using tracemalloc for the heap.
+#
+# CPython frees most objects as soon as they're dropped, but CircuitPython
+# only frees at a collection, so there mem_alloc() keeps going up until
+# gc.collect(). To act the same, mem_alloc() adds up how far the traced
+# memory climbed above where it was at the last call, and only drops back to
+# what's really in use on collect(). That undercounts objects that come and
+# go between calls, so per-phase numbers are peak use rather than totals.
+def make_gc_module(heap_size):
+    import gc as host_gc
+
+    module = types.ModuleType("gc")
+    module.enable = host_gc.enable
+    module.disable = host_gc.disable
+    module.isenabled = host_gc.isenabled
+    state = {"alloc": 0, "last": 0}
+
+    def _sample():
+        if not tracemalloc.is_tracing():
+            return 0
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        state["alloc"] += max(0, peak - state["last"])
+        state["last"] = current
+        return state["alloc"]
+
+    def collect():
+        host_gc.collect()
+        _sample()
+        state["alloc"] = state["last"]
+
+    def mem_alloc():
+        return _sample()
+
+    def mem_free():
+        return max(0, heap_size - _sample())
+
+    module.collect = collect
+    module.mem_alloc = mem_alloc
+    module.mem_free = mem_free
+    return module
+
+
+# ------------------------------------------------------------------------------------
+# --    asyncio stand-in
+# ------------------------------------------------------------------------------------
+
+class _Sleep():
+    def __init__(self, delay):
+        self.delay = delay
+
+    def __await__(self):
+        yield ("sleep", self.delay)
+
+
+class _Join():
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+    def __await__(self):
+        yield ("join", self.tasks)
+        return [task.result for task in self.tasks]
+
+
+class Task():
+    def __init__(self, coro, name):
+        self.coro = coro
+        self.name = name
+        self.done = False
+        self.result = None
+        self.waiters = []
+
+    def __await__(self):
+        if not self.done:
+            yield ("join", [self])
+        return self.result
+
+
+# Per-step measurements, by task name.
+class StepStats():
+    def __init__(self):
+        self.steps = 0
+        self.cpu_s = 0.0
+        self.max_cpu_s = 0.0
+        self.alloc_bytes = 0
+        self.max_alloc_bytes = 0
+
+    def add(self, cpu_s, alloc_bytes):
+        self.steps += 1
+        self.cpu_s += cpu_s
+        self.max_cpu_s = max(self.max_cpu_s, cpu_s)
+        self.alloc_bytes += alloc_bytes
+        self.max_alloc_bytes = max(self.max_alloc_bytes, alloc_bytes)
+
+
+# Runs coroutines on the virtual clock, one step at a time, and measures each step.
+class EventLoop():
+    def __init__(self, clock, duration_s, after_step=None):
+        self.clock = clock
+        self.duration_s = duration_s
+        self.after_step = after_step
+        self._ready = []
+        self._sequence = 0
+        self.stats = {}
+        self.idle_s = 0.0
+
+    def create_task(self, coro, name=None):
+        if name is None:
+            name = getattr(coro, "__name__", "task")
+        task = Task(coro, name)
+        self._schedule(task, self.clock.now)
+        return task
+
+    def _schedule(self, task, when):
+        self._sequence += 1
+        heapq.heappush(self._ready, (when, self._sequence, task))
+
+    def run(self, coro):
+        main = self.create_task(coro, "main")
+        while self._ready:
+            when, _, task = heapq.heappop(self._ready)
+            if when > self.duration_s:
+                break
+            if when > self.clock.now:
+                self.idle_s += when - self.clock.now
+                self.clock.now = when
+
+            self._step(task)
+            if main.done:
+                return main.result
+
+        return None
+
+    def _step(self, task):
+        cpu_start = host_time.process_time()
+        alloc_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        try:
+            request = task.coro.send(None)
+        except StopIteration as e:
+            request = None
+            task.done = True
+            task.result = e.value
+        cpu = host_time.process_time() - cpu_start
+        alloc = (tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0) - alloc_start
+
+        if task.name not in self.stats:
+            self.stats[task.name] = StepStats()
+        self.stats[task.name].add(cpu, max(0, alloc))
+
+        if self.after_step:
+            self.after_step(task.name)
+
+        if task.done:
+            for waiter in task.waiters:
+                self._wake_if_joined(waiter)
+            return
+
+        if request[0] == "sleep":
+            self._schedule(task, self.clock.now + max(0, request[1]))
+        elif request[0] == "join":
+            task.joining = request[1]
+            for other in request[1]:
+                other.waiters.append(task)
+            self._wake_if_joined(task)
+
+    def _wake_if_joined(self, task):
+        if all(other.done for other in task.joining):
+            self._schedule(task, self.clock.now)
+
+
+def make_asyncio_module(loop):
+    module = types.ModuleType("asyncio")
+
+    def sleep(delay):
+        return _Sleep(delay)
+
+    def sleep_ms(ms):
+        return _Sleep(ms / 1000)
+
+    def create_task(coro):
+        return loop.create_task(coro)
+
+    def gather(*aws):
+        tasks = [aw if isinstance(aw, Task) else loop.create_task(aw) for aw in aws]
+        return _Join(tasks)
+
+    def run(coro):
+        return loop.run(coro)
+
+    module.sleep = sleep
+    module.sleep_ms = sleep_ms
+    module.create_task = create_task
+    module.gather = gather
+    module.run = run
+    module.Task = Task
+    return module
+
+
+# Puts the stand-ins in place of the host modules for code that imports them from now on.
+def install(clock, loop, heap_size):
+    sys.modules["time"] = make_time_module(clock)
+    sys.modules["gc"] = make_gc_module(heap_size)
+    sys.modules["asyncio"] = make_asyncio_module(loop)